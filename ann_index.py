@@ -0,0 +1,296 @@
+# ann_index.py
+"""
+Approximate Nearest-Neighbour Index for JARVIS Memory
+-----------------------------------------------------
+• IVF (inverted file) over spherical k-means centroids, pure NumPy
+• Vectors are assumed unit-length; similarity is the dot product
+• The index holds IDs only: a query returns candidate IDs from the
+  `nprobe` closest lists, and the owner scores them exactly against its
+  own embedding matrix, so there is one copy of the vectors in RAM
+• Incremental inserts go to their nearest centroid; deletes are
+  tombstones (plus an ID floor for dropping the oldest entries), purged
+  once they make up a noticeable share of the lists
+• build() (k-means plus the initial assignment) needs no lock; the
+  owner then catches the result up with its own writes
+• Saved to / loaded from a single .npz file
+"""
+
+import math
+
+import numpy as np
+
+# ===================== CONFIG =====================
+
+DEFAULT_NPROBE = 12         # lists scanned per query
+MIN_LISTS = 16
+MAX_LISTS = 2048
+TRAIN_SAMPLE = 32768        # vectors k-means trains on, at most
+TRAIN_ITERATIONS = 8
+ASSIGN_CHUNK = 8192         # rows per matmul when assigning
+PURGE_RATIO = 0.2           # purge tombstones above this share of stored IDs
+FORMAT_VERSION = 1
+
+
+def list_count(n: int) -> int:
+    """
+    Lists for a corpus of n vectors: ~sqrt(n), which balances the
+    centroid scan against the list scan.
+    """
+    return int(min(MAX_LISTS, max(MIN_LISTS, round(math.sqrt(max(n, 1))))))
+
+
+def assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """
+    Index of the nearest centroid for every row.
+    """
+    out = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_CHUNK):
+        block = vectors[start:start + ASSIGN_CHUNK]
+        out[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+def kmeans(vectors: np.ndarray, k: int, iterations: int = TRAIN_ITERATIONS, seed: int = 0) -> np.ndarray:
+    """
+    Spherical k-means. Returns (k', dim) float32 unit centroids, k' <= k.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    k = max(1, min(k, n))
+    if n > TRAIN_SAMPLE:
+        vectors = vectors[rng.choice(n, TRAIN_SAMPLE, replace=False)]
+        n = TRAIN_SAMPLE
+
+    centroids = vectors[rng.choice(n, k, replace=False)].astype(np.float32, copy=True)
+    for _ in range(iterations):
+        labels = assign(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, vectors)
+        counts = np.bincount(labels, minlength=k)
+
+        # Empty lists restart on a random vector
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            sums[empty] = vectors[rng.choice(n, len(empty), replace=False)]
+
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+    return centroids
+
+
+def build(ids, vectors, nlist: int = None, nprobe: int = DEFAULT_NPROBE):
+    """
+    Trains centroids on the vectors and returns an IVFIndex holding the
+    IDs. The slow part of indexing; needs no lock.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    index = IVFIndex(kmeans(vectors, nlist or list_count(len(vectors))), nprobe=nprobe)
+    index.add(ids, vectors)
+    index.trained_size = max(len(vectors), 1)
+    return index
+
+
+class IVFIndex:
+    """
+        index = build(ids, vectors)                            # or IVFIndex(centroids)
+        index.add(more_ids, more_vectors)
+        ids = index.candidates(query_vec, k=5)                 # score these exactly
+        index.remove([42]); index.drop_below(1000)
+        index.save("memory.ivf.npz"); IVFIndex.load("memory.ivf.npz")
+    """
+
+    def __init__(self, centroids: np.ndarray, nprobe: int = DEFAULT_NPROBE):
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.nprobe = nprobe
+        self.trained_size = 0           # vectors present when the index was built
+        self.last_id = -1               # largest ID ever added
+        self._lists = [np.empty(0, dtype=np.int64) for _ in range(len(self.centroids))]
+        self._fill = np.zeros(len(self.centroids), dtype=np.int64)
+        self._stored = 0                # IDs in the lists, tombstoned or not
+        self._floor = 0                 # IDs below this are deleted
+        self._purged_floor = 0          # floor at the last purge
+        self._tombstones = set()
+        self._tombstone_array = None    # sorted cache of _tombstones
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @property
+    def dim(self) -> int:
+        return self.centroids.shape[1]
+
+    def __len__(self):
+        below = sum(
+            int(np.searchsorted(self._lists[lst][:self._fill[lst]], self._floor))
+            for lst in range(self.nlist)
+        ) if self._floor > self._purged_floor else 0
+        return self._stored - len(self._tombstones) - below
+
+    # ===================== WRITES =====================
+
+    def add(self, ids, vectors):
+        """
+        Inserts IDs with their unit vectors. IDs must be new and larger
+        than every ID added before (lists stay sorted).
+        """
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        if not len(ids):
+            return
+        if ids[0] <= self.last_id or (len(ids) > 1 and (np.diff(ids) <= 0).any()):
+            raise ValueError("IDs must be added in increasing order")
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+        labels = assign(vectors, self.centroids)
+        last_id = int(ids[-1])
+
+        order = np.argsort(labels, kind="stable")
+        labels, ids = labels[order], ids[order]
+        bounds = np.flatnonzero(np.diff(labels)) + 1
+        for group in np.split(np.arange(len(ids)), bounds):
+            lst = int(labels[group[0]])
+            self._append(lst, ids[group])
+        self._stored += len(ids)
+        self.last_id = last_id
+
+    def _append(self, lst: int, ids: np.ndarray):
+        fill = int(self._fill[lst])
+        needed = fill + len(ids)
+        current = self._lists[lst]
+        if needed > len(current):
+            grown = np.empty(max(needed, 2 * len(current), 8), dtype=np.int64)
+            grown[:fill] = current[:fill]
+            self._lists[lst] = current = grown
+        current[fill:needed] = ids
+        self._fill[lst] = needed
+
+    def remove(self, ids):
+        for i in np.asarray(ids, dtype=np.int64).reshape(-1).tolist():
+            if i >= self._floor:
+                self._tombstones.add(i)
+        self._tombstone_array = None
+        self._maybe_purge()
+
+    def drop_below(self, floor: int):
+        """
+        Deletes every ID below `floor` (IDs are handed out in increasing
+        order, so this drops the oldest entries).
+        """
+        if floor <= self._floor:
+            return
+        self._floor = floor
+        if self._tombstones and min(self._tombstones) < floor:
+            self._tombstones = {i for i in self._tombstones if i >= floor}
+            self._tombstone_array = None
+        self._maybe_purge()
+
+    def _maybe_purge(self):
+        # floor movement bounds the IDs it deleted; good enough to decide
+        dead = len(self._tombstones) + (self._floor - self._purged_floor)
+        if self._stored and dead > PURGE_RATIO * self._stored:
+            self.purge()
+
+    def purge(self):
+        """
+        Physically removes deleted IDs from the lists.
+        """
+        dead = self._dead()
+        stored = 0
+        for lst in range(self.nlist):
+            ids = self._lists[lst][:self._fill[lst]]
+            ids = ids[np.searchsorted(ids, self._floor):]
+            keep = ids[self._alive(ids, dead)] if len(dead) else ids
+            self._lists[lst] = keep.copy()
+            self._fill[lst] = len(keep)
+            stored += len(keep)
+        self._stored = stored
+        self._purged_floor = self._floor
+        self._tombstones.clear()
+        self._tombstone_array = None
+
+    # ===================== QUERIES =====================
+
+    def _dead(self):
+        if self._tombstone_array is None:
+            self._tombstone_array = np.array(sorted(self._tombstones), dtype=np.int64)
+        return self._tombstone_array
+
+    def _alive(self, ids: np.ndarray, dead: np.ndarray) -> np.ndarray:
+        mask = ids >= self._floor
+        if len(dead):
+            mask &= ~np.isin(ids, dead)
+        return mask
+
+    def candidates(self, query_vec, k: int = 1, nprobe: int = None) -> np.ndarray:
+        """
+        Live IDs in the lists closest to the query. Probes more lists
+        when the first `nprobe` hold fewer than k live IDs.
+        """
+        q = np.asarray(query_vec, dtype=np.float32).reshape(-1)
+        nprobe = min(self.nlist, max(1, nprobe or self.nprobe))
+        sims = self.centroids @ q
+        order = np.argsort(-sims) if nprobe * 4 >= self.nlist else None
+        dead = self._dead()
+
+        while True:
+            if order is None:
+                probe = np.argpartition(-sims, nprobe - 1)[:nprobe]
+            else:
+                probe = order[:nprobe]
+            parts = [self._lists[lst][:self._fill[lst]] for lst in probe.tolist()]
+            ids = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+            ids = ids[self._alive(ids, dead)]
+            if len(ids) >= k or nprobe >= self.nlist:
+                return ids
+            nprobe = min(self.nlist, nprobe * 2)
+            if order is None and nprobe * 4 >= self.nlist:
+                order = np.argsort(-sims)
+
+    def stats(self) -> dict:
+        sizes = self._fill
+        return {
+            "lists": self.nlist,
+            "nprobe": self.nprobe,
+            "stored": int(self._stored),
+            "live": len(self),
+            "largest_list": int(sizes.max()) if len(sizes) else 0,
+            "trained_size": self.trained_size
+        }
+
+    # ===================== PERSISTENCE =====================
+
+    def save(self, path, id_offset: int = 0):
+        """
+        Writes the index; stored IDs are shifted by id_offset (an owner
+        that renumbers its rows from 0 on load passes -first_id).
+        """
+        self.purge()
+        ids = np.concatenate([self._lists[lst][:self._fill[lst]] for lst in range(self.nlist)]) \
+            if self.nlist else np.empty(0, dtype=np.int64)
+        np.savez(
+            path,
+            version=np.array(FORMAT_VERSION),
+            centroids=self.centroids,
+            ids=ids + id_offset,
+            fill=self._fill,
+            nprobe=np.array(self.nprobe),
+            trained_size=np.array(self.trained_size),
+            last_id=np.array(self.last_id + id_offset)
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if int(data["version"]) != FORMAT_VERSION:
+                raise ValueError("unsupported index format")
+            index = cls(data["centroids"], nprobe=int(data["nprobe"]))
+            index.trained_size = int(data["trained_size"])
+            ids, fill = data["ids"], data["fill"]
+            index.last_id = int(data["last_id"])
+        if len(fill) != index.nlist or int(fill.sum()) != len(ids):
+            raise ValueError("corrupt index")
+        for lst, part in enumerate(np.split(ids, np.cumsum(fill)[:-1])):
+            index._lists[lst] = part.astype(np.int64, copy=True)
+        index._fill = fill.astype(np.int64, copy=True)
+        index._stored = len(ids)
+        return index
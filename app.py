@@ -3,6 +3,7 @@ import threading
 import queue
 import time
 import main
+import ui_stream
 import os
 
 # ================= GLOBAL STATE =================
@@ -21,7 +22,7 @@ def ensure_core_running():
         # 2. Start the brain loop in a separate thread
         # We use a lambda to start the arbiter which then runs the brain_loop
         core_thread = threading.Thread(
-            target=lambda: main.healing_arbiter.start(main.command_queue.qsize, main.brain_loop),
+            target=lambda: main.healing_arbiter.start(main.command_queue.depths, main.brain_loop),
             daemon=True,
             name="JarvisCoreThread"
         )
@@ -45,6 +46,11 @@ def app(page: ft.Page):
     page.window_min_width = 450
     page.window_min_height = 650
 
+    # Each page is its own conversation: its own session (so pages think
+    # in parallel on different brain workers) and its own output queue
+    session_id = f"ui-{page.session_id}"
+    replies = main.ui_queue(session_id)
+
     # ================= HEADER =================
     header = ft.Row(
         [
@@ -111,43 +117,32 @@ def app(page: ft.Page):
         chat.controls.append(user_bubble(text))
         
         # Send to main.py command queue
-        main.command_queue.put(("ui", text))
+        main.submit_command("ui", text, session_id)
         
         input_box.value = ""
         page.update()
 
     # ================= STREAM LISTENER =================
-    def stream_listener():
-        """Listens to main.stream_queue and updates the UI in real-time."""
-        buffer = ""
+    class ChatView:
+        """Assistant bubbles for ui_stream.listen()."""
         bubble = None
 
-        while ui_alive:
-            try:
-                # Poll the queue from main.py
-                token = main.stream_queue.get(timeout=0.1)
-
-                if token == "__END__":
-                    buffer = ""
-                    bubble = None
-                    page.update()
-                    continue
-
-                if bubble is None:
-                    bubble = assistant_bubble()
-                    chat.controls.append(bubble)
-                    page.update()
-
-                buffer += token
-                bubble.content.value = buffer
-                page.update()
-
-            except queue.Empty:
-                continue
-            except Exception as e:
-                print(f"⚠️ UI Stream Error: {e}")
-            
-            time.sleep(0.01)
+        def open(self):
+            self.bubble = assistant_bubble()
+            chat.controls.append(self.bubble)
+            page.update()
+
+        def show(self, text):
+            self.bubble.content.value = text
+            page.update()
+
+        def close(self):
+            self.bubble = None
+            page.update()
+
+    def stream_listener():
+        """Listens to this page's reply queue and updates the UI in real-time."""
+        ui_stream.listen(replies, ChatView(), alive=lambda: ui_alive)
 
     # Start the UI listener thread
     threading.Thread(target=stream_listener, daemon=True).start()
@@ -176,6 +171,7 @@ def app(page: ft.Page):
     def on_close(e):
         global ui_alive
         ui_alive = False
+        main.end_session(session_id)
         print("Shutting down UI...")
 
     page.on_close = on_close
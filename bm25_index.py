@@ -0,0 +1,278 @@
+# bm25_index.py
+"""
+BM25 Inverted Index for JARVIS Memory
+-------------------------------------
+• Word-token inverted index over memory texts, maintained incrementally:
+  insert one document at a time, delete the oldest by ID floor, clear
+• Posting lists are append-only typed arrays (doc IDs ascending, term
+  frequencies), scored as NumPy views without copying
+• Okapi BM25 ranking; ties go to the most recent memory
+• MaxScore-style pruning: very common words are only looked up for the
+  documents the rarer query words match, when that cannot change the
+  top k
+• Optional prefix matching ("dragon" also finds "dragons"), through a
+  sorted vocabulary
+• Not thread-safe on its own: the owning MemoryStore is guarded by
+  memory_manager's lock
+"""
+
+import re
+import math
+import bisect
+from array import array
+
+import numpy as np
+
+# ===================== CONFIG =====================
+
+K1 = 1.2
+B = 0.75
+PREFIX_MIN_LEN = 3          # shorter query tokens match exactly only
+PREFIX_MAX_TERMS = 32       # expansions per query token
+PREFIX_WEIGHT = 0.7         # expansions count less than the exact word
+COMMON_SHARE = 0.125        # words in more of the memories than this are pruned
+
+_TOKEN_RE = re.compile(r"\w+(?:'\w+)*")
+
+
+def tokenize(text: str) -> list:
+    """
+    Lowercased word tokens; apostrophes stay inside words.
+    """
+    return _TOKEN_RE.findall(text.lower())
+
+
+class _Postings:
+    __slots__ = ("ids", "tfs", "start")
+
+    def __init__(self):
+        self.ids = array("q")
+        self.tfs = array("H")
+        self.start = 0          # entries before this are below the floor
+
+
+class BM25Index:
+    """
+        index = BM25Index()
+        index.add(0, "Tony likes coffee")           # IDs must increase
+        index.search("coffee", limit=5)             # [(doc_id, score)] best first
+        index.search("dragon", prefix=True)
+        index.drop_below(1)                         # delete the oldest
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._vocab = []            # sorted terms, for prefix lookup
+        self._lengths = array("I")  # token count of doc (first_id + i)
+        self.first_id = 0           # lowest live doc ID
+        self._length_base = 0       # doc ID of _lengths[0]
+        self._total_length = 0      # over live docs
+        self.next_id = 0
+
+    def __len__(self):
+        return self.next_id - self.first_id
+
+    @property
+    def vocabulary(self) -> int:
+        return len(self._vocab)
+
+    # ===================== WRITES =====================
+
+    def add(self, doc_id: int, text: str):
+        """
+        Indexes one document. IDs must be handed out in increasing order
+        without gaps after the first (a store's row IDs are).
+        """
+        if len(self) == 0:
+            self.first_id = self._length_base = doc_id
+            self.next_id = doc_id
+            del self._lengths[:]
+        if doc_id != self.next_id:
+            raise ValueError(f"expected doc ID {self.next_id}, got {doc_id}")
+
+        tokens = tokenize(text)
+        counts = {}
+        for t in tokens:
+            counts[t] = counts.get(t, 0) + 1
+
+        for term, tf in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = _Postings()
+                bisect.insort(self._vocab, term)
+            postings.ids.append(doc_id)
+            postings.tfs.append(min(tf, 65535))
+
+        self._lengths.append(len(tokens))
+        self._total_length += len(tokens)
+        self.next_id = doc_id + 1
+
+    def drop_below(self, floor: int):
+        """
+        Deletes every document with an ID below `floor`.
+        """
+        floor = min(floor, self.next_id)
+        if floor <= self.first_id:
+            return
+        lo = self.first_id - self._length_base
+        hi = floor - self._length_base
+        self._total_length -= sum(self._lengths[lo:hi])
+        self.first_id = floor
+
+        # Trim the lengths array once half of it is dead
+        if hi > len(self._lengths) // 2:
+            del self._lengths[:hi]
+            self._length_base = floor
+
+    def clear(self):
+        self.__init__()
+
+    def _live(self, postings: _Postings) -> int:
+        """
+        Advances the posting list past deleted docs (compacting it once
+        most of it is dead) and returns the index of its first live entry.
+        """
+        ids = postings.ids
+        start = postings.start
+        if start < len(ids) and ids[start] < self.first_id:
+            start = int(np.searchsorted(np.frombuffer(ids, dtype=np.int64), self.first_id))
+            if start > len(ids) // 2:
+                del ids[:start], postings.tfs[:start]
+                start = 0
+            postings.start = start
+        return start
+
+    # ===================== QUERIES =====================
+
+    def document_frequency(self, term: str) -> int:
+        postings = self._postings.get(term)
+        if postings is None:
+            return 0
+        start = self._live(postings)        # may compact the list
+        return len(postings.ids) - start
+
+    def _expand(self, token: str) -> list:
+        """
+        [(term, weight)]: the token itself, plus vocabulary terms that
+        start with it (most frequent first).
+        """
+        terms = [(token, 1.0)] if token in self._postings else []
+        if len(token) < PREFIX_MIN_LEN:
+            return terms
+        matches = []
+        i = bisect.bisect_right(self._vocab, token)
+        while i < len(self._vocab) and self._vocab[i].startswith(token):
+            matches.append(self._vocab[i])
+            i += 1
+        if len(matches) > PREFIX_MAX_TERMS:
+            matches.sort(key=self.document_frequency, reverse=True)
+            matches = matches[:PREFIX_MAX_TERMS]
+        return terms + [(m, PREFIX_WEIGHT) for m in matches]
+
+    def _term_scores(self, ids, tfs, weight: float, avgdl: float):
+        """
+        BM25 contribution of one term to each document in `ids` (float32).
+        """
+        dl = np.frombuffer(self._lengths, dtype=np.uint32)[ids - self._length_base]
+        norm = (K1 * (1 - B) + (K1 * B / avgdl) * dl).astype(np.float32)
+        return np.float32(weight * (K1 + 1)) * tfs / (tfs + norm)
+
+    @staticmethod
+    def _best(rows, row_scores, limit: int):
+        """
+        The best `limit` of the given (ascending) rows, best first; among
+        equal scores, the most recent row.
+        """
+        if limit < len(rows):
+            # Everything above the k-th best score, then the most recent of
+            # the rows tied with it
+            kth = -np.partition(-row_scores, limit - 1)[limit - 1]
+            above = np.flatnonzero(row_scores > kth)
+            tied = np.flatnonzero(row_scores == kth)
+            keep = np.concatenate([above, tied[len(tied) - (limit - len(above)):]])
+            rows, row_scores = rows[keep], row_scores[keep]
+        order = np.lexsort((-rows, -row_scores))
+        return rows[order], row_scores[order]
+
+    def search(self, query: str, limit: int = 5, prefix: bool = False) -> list:
+        """
+        [(doc_id, score)] for the best `limit` documents, best first.
+
+        Words found in more than COMMON_SHARE of the documents are scored
+        only for the documents the rarer words match, as long as that
+        provably cannot change the result (MaxScore): a document with
+        none of the rarer words scores at most the sum of the common
+        words' upper bounds. Otherwise every document is scored.
+        """
+        n = len(self)
+        if not n or limit <= 0:
+            return []
+
+        terms = {}
+        for token in tokenize(query):
+            for term, weight in (self._expand(token) if prefix else [(token, 1.0)]):
+                terms[term] = max(terms.get(term, 0.0), weight)
+
+        # (live doc IDs, term frequencies, weight * idf) per matching term
+        lists = []
+        for term, weight in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            start = self._live(postings)
+            ids = np.frombuffer(postings.ids, dtype=np.int64)[start:]
+            if not len(ids):
+                continue
+            tfs = np.frombuffer(postings.tfs, dtype=np.uint16)[start:].astype(np.float32)
+            idf = math.log(1.0 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+            lists.append((ids, tfs, weight * idf))
+        if not lists:
+            return []
+
+        avgdl = max(self._total_length / n, 1e-9)
+        common = [t for t in lists if len(t[0]) > COMMON_SHARE * n]
+        rare = [t for t in lists if len(t[0]) <= COMMON_SHARE * n]
+        scores = np.zeros(n, dtype=np.float32)
+        for ids, tfs, w in rare:
+            # A posting list names each document once, so += cannot collide
+            scores[ids - self.first_id] += self._term_scores(ids, tfs, w, avgdl)
+
+        if rare:
+            if len(rare) == 1:
+                rows = rare[0][0] - self.first_id
+            else:
+                rows = np.sort(np.concatenate([ids for ids, _, _ in rare])) - self.first_id
+                rows = rows[np.concatenate(([True], rows[1:] != rows[:-1]))]
+            row_scores = scores[rows]
+
+            # Common words: look the candidates up in their posting lists
+            for ids, tfs, w in common:
+                pos = np.minimum(np.searchsorted(ids, rows + self.first_id), len(ids) - 1)
+                found = ids[pos] == rows + self.first_id
+                pos = pos[found]
+                row_scores[found] += self._term_scores(ids[pos], tfs[pos], w, avgdl)
+
+            # tf / (tf + norm) < 1, so a term adds less than weight * idf * (K1 + 1)
+            bound = sum(w * (K1 + 1) for _, _, w in common)
+            if not common or (
+                len(rows) >= limit
+                and -np.partition(-row_scores, limit - 1)[limit - 1] > bound
+            ):
+                rows, row_scores = self._best(rows, row_scores, limit)
+                return [(int(r) + self.first_id, float(v)) for r, v in zip(rows, row_scores)]
+
+        # Only common words, or too few strong matches: score everything and
+        # cut at the k-th best score instead of listing every match
+        for ids, tfs, w in common:
+            scores[ids - self.first_id] += self._term_scores(ids, tfs, w, avgdl)
+        kth = np.partition(scores, n - limit)[n - limit] if limit < n else 0.0
+        rows = np.flatnonzero(scores >= kth) if kth > 0 else np.flatnonzero(scores > 0)
+        rows, row_scores = self._best(rows, scores[rows], limit)
+        return [(int(r) + self.first_id, float(v)) for r, v in zip(rows, row_scores)]
+
+    def stats(self) -> dict:
+        return {
+            "documents": len(self),
+            "terms": len(self._vocab),
+            "avg_length": round(self._total_length / len(self), 2) if len(self) else 0.0
+        }
@@ -1,49 +1,114 @@
+import asyncio
 import threading
 import time
 import traceback
 
 
+class _Worker:
+    __slots__ = ("handle",)
+
+    def __init__(self):
+        self.handle = None      # Thread, or concurrent Future of a core-loop task
+
+    def is_alive(self) -> bool:
+        handle = self.handle
+        if handle is None:
+            return True         # still being spawned
+        if isinstance(handle, threading.Thread):
+            return handle.is_alive()
+        return not handle.done()
+
+
 class BrainManager:
-    _brain_thread = None
+    """
+    Supervises a pool of brain workers. Each worker runs
+    brain_loop(worker_id) and drains its own command bus; the
+    SessionRouter decides which worker a session's commands go to.
+
+    A coroutine brain_loop runs as tasks on the core event loop; a plain
+    function gets one thread per worker.
+    """
+    workers = 1          # pool size used when start() is not told
+    _size = None         # pool size of the last start(), reused by restart()
+    _workers = {}
     _lock = threading.Lock()
     _running = False
     _stop_event = threading.Event()
 
     @classmethod
-    def _run_wrapper(cls, brain_loop):
+    def _exited(cls, worker_id, worker):
+        with cls._lock:
+            if cls._workers.get(worker_id) is worker:
+                del cls._workers[worker_id]
+            if not cls._workers:
+                cls._running = False
+                cls._stop_event.clear()
+        print(f"⚠️ Brain worker {worker_id} exited")
+
+    @classmethod
+    def _run_wrapper(cls, brain_loop, worker_id, worker):
         """
         Wraps brain_loop to detect crashes and reset state cleanly.
         """
         try:
-            brain_loop()
+            brain_loop(worker_id)
         except Exception:
-            print("❌ Brain crashed:")
+            print(f"❌ Brain worker {worker_id} crashed:")
             traceback.print_exc()
         finally:
-            # Brain exited unexpectedly or normally
-            with cls._lock:
-                cls._running = False
-                cls._stop_event.clear()
-                cls._brain_thread = None
-            print("⚠️ Brain thread exited")
+            # Worker exited unexpectedly or normally
+            cls._exited(worker_id, worker)
+
+    @classmethod
+    async def _run_async(cls, brain_loop, worker_id, worker):
+        try:
+            await brain_loop(worker_id)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            print(f"❌ Brain worker {worker_id} crashed:")
+            traceback.print_exc()
+        finally:
+            cls._exited(worker_id, worker)
 
     @classmethod
-    def start(cls, brain_loop):
+    def start(cls, brain_loop, workers: int = None):
+        """
+        Starts the pool, or respawns any worker that has died.
+        """
+        workers = workers or cls.workers
+        cls._size = workers
+        on_loop = asyncio.iscoroutinefunction(brain_loop)
+        if on_loop:
+            import core_loop
+
         with cls._lock:
-            # If thread exists and is alive, do nothing
-            if cls._brain_thread and cls._brain_thread.is_alive():
-                return
+            if cls._stop_event.is_set():
+                return      # old pool still draining; restart() retries
+            spawned = 0
+            for worker_id in range(workers):
+                worker = cls._workers.get(worker_id)
+                if worker and worker.is_alive():
+                    continue
 
-            cls._stop_event.clear()
-            cls._running = True
+                worker = _Worker()
+                cls._workers[worker_id] = worker
+                if on_loop:
+                    worker.handle = core_loop.spawn(cls._run_async(brain_loop, worker_id, worker))
+                else:
+                    thread = threading.Thread(
+                        target=cls._run_wrapper,
+                        args=(brain_loop, worker_id, worker),
+                        daemon=True,
+                        name=f"Brain-{worker_id}"
+                    )
+                    worker.handle = thread
+                    thread.start()
+                spawned += 1
 
-            cls._brain_thread = threading.Thread(
-                target=cls._run_wrapper,
-                args=(brain_loop,),
-                daemon=True
-            )
-            cls._brain_thread.start()
-            print("🧠 Brain started")
+            cls._running = True
+            if spawned:
+                print(f"🧠 Brain started ({spawned}/{workers} workers)")
 
     @classmethod
     def restart(cls, brain_loop):
@@ -51,18 +116,33 @@ class BrainManager:
             print("♻️ Restarting brain")
             cls._stop_event.set()
             cls._running = False
+            workers = list(cls._workers.values())
 
-        # Give old thread time to exit
-        time.sleep(0.5)
-        cls.start(brain_loop)
+        # Tasks are cancelled outright; threads get time to notice the stop
+        for worker in workers:
+            if isinstance(worker.handle, threading.Thread):
+                worker.handle.join(timeout=0.5)
+            elif worker.handle is not None:
+                worker.handle.cancel()
+
+        deadline = time.monotonic() + 0.5
+        while any(w.is_alive() for w in workers) and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        with cls._lock:
+            cls._stop_event.clear()
+            cls._workers = {i: w for i, w in cls._workers.items() if w.is_alive()}
+        cls.start(brain_loop, cls._size)
 
     @classmethod
     def is_running(cls):
-        return (
-            cls._brain_thread is not None
-            and cls._brain_thread.is_alive()
-            and cls._running
-        )
+        with cls._lock:
+            return cls._running and any(w.is_alive() for w in cls._workers.values())
+
+    @classmethod
+    def alive_workers(cls) -> int:
+        with cls._lock:
+            return sum(1 for w in cls._workers.values() if w.is_alive())
 
     @classmethod
     def should_stop(cls):
@@ -0,0 +1,216 @@
+# brain_session.py
+"""
+Brain Sessions and Routing for JARVIS
+-------------------------------------
+• A Session owns one conversation: history, rolling summary, pending
+  tool confirmation and the trace of its running turn
+• The SessionRouter keeps one command bus per brain worker
+• Every session sticks to one worker, so its turns stay ordered while
+  independent sessions run in parallel
+• New sessions go to the least-loaded worker
+• Dropping a session stops its summarizer thread
+• Aggregate depth metrics for the healing arbiter
+• Thread-safe
+"""
+
+import time
+import threading
+
+import command_bus
+
+# ===================== CONFIG =====================
+
+DEFAULT_SESSION = "local"
+
+
+class Session:
+    """
+    Per-conversation state. `lock` guards `history`; `confirm_lock`
+    guards `pending_confirmation`.
+
+    summarizer is an IncrementalSummarizer (or None) that owns the
+    rolling summary of turns evicted from `history`.
+    """
+
+    def __init__(self, session_id: str, summarizer=None):
+        self.id = session_id
+        self.history = []
+        self.lock = threading.Lock()
+        self.summarizer = summarizer
+
+        self.pending_confirmation = {
+            "active": False,
+            "tool_name": None,
+            "tool_payload": None,
+            "timestamp": 0
+        }
+        self.confirm_lock = threading.Lock()
+
+        self.trace = None
+        self.turns = 0
+        self.last_active = time.time()
+
+    @property
+    def summary(self) -> str:
+        return self.summarizer.summary if self.summarizer else ""
+
+    def snapshot(self) -> tuple:
+        """
+        (summary, evicted turns not folded into it yet). Prompts carry
+        both, so a turn stays visible while its fold is pending.
+        """
+        if self.summarizer is None:
+            return "", []
+        return self.summarizer.snapshot()
+
+    @property
+    def confirmation_pending(self) -> bool:
+        return self.pending_confirmation["active"]
+
+    def evict(self, max_turns: int) -> int:
+        """
+        Hands turns beyond the newest `max_turns` to the summarizer.
+        Call with `lock` held. Returns how many were evicted.
+        """
+        evicted = len(self.history) - max_turns
+        if evicted <= 0:
+            return 0
+        if self.summarizer:
+            self.summarizer.add(self.history[:evicted])
+        del self.history[:evicted]
+        return evicted
+
+    def close(self):
+        """
+        Stops the session's background summarizer. Commands already
+        queued for it still run, without summarizing.
+        """
+        if self.summarizer and hasattr(self.summarizer, "close"):
+            self.summarizer.close(timeout=0)
+
+    def __repr__(self):
+        return f"Session({self.id!r}, turns={self.turns})"
+
+
+class SessionRouter:
+    """
+    Routes commands to brain workers by session ID.
+
+        router = SessionRouter(make_bus, make_session, workers=2)
+        router.put("ui", "what is a pulsar", session_id="tab-1")
+        command = router.get(worker, timeout=0.2)   # command.session
+        command = await router.aget(worker)         # from a task
+        router.depths()                             # summed over workers
+        router.drop("tab-1")                        # conversation over
+
+    make_bus() -> CommandBus for one worker. Its classify_fn receives
+    (text, session).
+    make_session(session_id) -> Session, called once per new ID.
+    """
+
+    def __init__(self, make_bus, make_session, workers: int = 1):
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        self.buses = tuple(make_bus() for _ in range(workers))
+        self._make_session = make_session
+        self._sessions = {}
+        self._assignment = {}
+        self._lock = threading.Lock()
+
+    @property
+    def workers(self) -> int:
+        return len(self.buses)
+
+    # ===================== SESSIONS =====================
+
+    def session(self, session_id: str = DEFAULT_SESSION) -> Session:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._make_session(session_id)
+                self._sessions[session_id] = session
+            return session
+
+    def drop(self, session_id: str) -> bool:
+        """
+        Forgets a session (a closed UI page) and frees its worker slot.
+        Returns False for an unknown ID.
+        """
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            self._assignment.pop(session_id, None)
+        if session is None:
+            return False
+        session.close()
+        return True
+
+    def sessions(self) -> list:
+        with self._lock:
+            return list(self._sessions.values())
+
+    def worker_for(self, session_id: str) -> int:
+        """
+        Worker a session is pinned to. New sessions go to the worker with
+        the fewest sessions, then the shallowest queue.
+        """
+        with self._lock:
+            worker = self._assignment.get(session_id)
+            if worker is None:
+                load = [0] * len(self.buses)
+                for w in self._assignment.values():
+                    load[w] += 1
+                worker = min(
+                    range(len(self.buses)),
+                    key=lambda w: (load[w], self.buses[w].qsize())
+                )
+                self._assignment[session_id] = worker
+            return worker
+
+    # ===================== PRODUCERS =====================
+
+    def put(self, source, text: str = None, session_id: str = None) -> bool:
+        """
+        Same contract as CommandBus.put. The queue.Queue-style
+        put((source, text)) and put((source, text, session_id)) are
+        accepted too.
+        """
+        if text is None and isinstance(source, tuple):
+            source, text, session_id = (source + (None,))[:3]
+        session_id = session_id or DEFAULT_SESSION
+        session = self.session(session_id)
+        return self.buses[self.worker_for(session_id)].put(source, text, session=session)
+
+    # ===================== CONSUMERS =====================
+
+    def get(self, worker: int = 0, timeout: float = None) -> command_bus.Command:
+        return self.buses[worker].get(timeout)
+
+    async def aget(self, worker: int = 0) -> command_bus.Command:
+        return await self.buses[worker].aget()
+
+    def clear(self, priority: int = command_bus.QUERY) -> int:
+        return sum(bus.clear(priority) for bus in self.buses)
+
+    # ===================== METRICS =====================
+
+    def qsize(self) -> int:
+        return sum(bus.qsize() for bus in self.buses)
+
+    def depths(self) -> dict:
+        depths = {}
+        for bus in self.buses:
+            for name, n in bus.depths().items():
+                depths[name] = depths.get(name, 0) + n
+        return depths
+
+    def stats(self) -> dict:
+        with self._lock:
+            assignment = dict(self._assignment)
+        return {
+            "workers": [
+                dict(bus.stats(), depth=bus.qsize(),
+                     sessions=sum(1 for w in assignment.values() if w == i))
+                for i, bus in enumerate(self.buses)
+            ],
+            "sessions": len(assignment)
+        }
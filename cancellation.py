@@ -0,0 +1,171 @@
+# cancellation.py
+"""
+Per-Turn Cancellation for JARVIS
+--------------------------------
+• One CancelToken per brain turn
+• Stages register callbacks that tear down their work (HTTP stream,
+  queued speech, audio playback) the moment the token is cancelled
+• Any thread can cancel every active turn, or one session's (barge-in)
+• Cancellation latency measured from cancel() to the turn being freed
+• Thread-safe; "current turn" is per thread and per asyncio task
+"""
+
+import time
+import threading
+import contextvars
+from collections import deque
+
+# ===================== CONFIG =====================
+
+LATENCY_HISTORY = 200       # cancellation latencies kept for stats()
+
+
+class TurnCancelled(Exception):
+    """Raised by stages that notice their turn was cancelled."""
+
+
+class CancelToken:
+    """
+        token = cancellation.begin()
+        remove = token.add_callback(stream.close)
+        ...
+        token.raise_if_cancelled()
+        cancellation.end(token)      # records latency if it was cancelled
+    """
+
+    def __init__(self, session=None):
+        self.session = session
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self.reason = None
+        self.cancelled_at = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> bool:
+        """
+        Returns False if already cancelled. Callbacks run on the
+        calling thread, so they must be quick.
+        """
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self.cancelled_at = time.perf_counter()
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+
+        for fn in callbacks:
+            try:
+                fn()
+            except Exception as e:
+                print("Cancel callback error:", repr(e))
+        return True
+
+    def add_callback(self, fn):
+        """
+        Registers fn() to run on cancel (immediately if already
+        cancelled). Returns a function that unregisters it.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(fn)
+                return lambda: self._remove(fn)
+        fn()
+        return lambda: None
+
+    def _remove(self, fn):
+        with self._lock:
+            try:
+                self._callbacks.remove(fn)
+            except ValueError:
+                pass
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise TurnCancelled(self.reason)
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._event.wait(timeout)
+
+    def latency(self):
+        """
+        Seconds since cancel(), or None if not cancelled.
+        """
+        if self.cancelled_at is None:
+            return None
+        return time.perf_counter() - self.cancelled_at
+
+
+# ===================== ACTIVE TURNS =====================
+
+_current = contextvars.ContextVar("cancel_token", default=None)
+_active = set()
+_lock = threading.Lock()
+_latencies = deque(maxlen=LATENCY_HISTORY)
+
+
+def begin(session=None) -> CancelToken:
+    """
+    Starts a turn on this thread (or task) and returns its token. `session` tags
+    the token for cancel_active(reason, session).
+    """
+    token = CancelToken(session)
+    _current.set(token)
+    with _lock:
+        _active.add(token)
+    return token
+
+
+def current():
+    """
+    Token of the turn running on this thread or task, if any.
+    """
+    return _current.get()
+
+
+def end(token: CancelToken):
+    """
+    Ends a turn. Returns the cancellation latency (seconds) if the turn
+    was cancelled, else None.
+    """
+    with _lock:
+        _active.discard(token)
+    if current() is token:
+        _current.set(None)
+
+    latency = token.latency()
+    if latency is not None:
+        with _lock:
+            _latencies.append(latency)
+    return latency
+
+
+def cancel_active(reason: str, session=None) -> int:
+    """
+    Cancels every running turn, or only those of `session`. Returns how
+    many were cancelled.
+    """
+    with _lock:
+        tokens = [t for t in _active if session is None or t.session == session]
+    return sum(1 for t in tokens if t.cancel(reason))
+
+
+def stats() -> dict:
+    with _lock:
+        values = sorted(_latencies)
+    if not values:
+        return {"cancellations": 0}
+
+    def pct(p):
+        return round(values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))] * 1000, 2)
+
+    return {
+        "cancellations": len(values),
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "max_ms": round(values[-1] * 1000, 2)
+    }
@@ -0,0 +1,235 @@
+# command_bus.py
+"""
+Priority Command Bus for JARVIS
+-------------------------------
+• Control words and tool confirmations jump ahead of queued questions
+• Junk input is filtered on arrival, not after waiting in line
+• Duplicate queued questions are coalesced; stale ones are dropped
+• A full bus sheds its oldest question instead of blocking the producer
+• Stop-style commands flush the questions queued behind them
+• Control / confirmation arrivals notify a barge-in hook immediately
+• Per-priority depth metrics for the healing arbiter
+• Event-driven for threads (Condition) and asyncio tasks (aget), thread-safe
+"""
+
+import time
+import queue
+import asyncio
+import threading
+from collections import deque
+
+# ===================== CONFIG =====================
+
+CONTROL, CONFIRM, QUERY = 0, 1, 2
+PRIORITY_NAMES = ("control", "confirm", "query")
+
+MAX_QUERIES = 30          # queued questions before the oldest is shed
+QUERY_MAX_AGE = 20.0      # seconds a question may wait before it is stale
+
+
+class Command:
+    __slots__ = ("source", "text", "priority", "enqueued_at", "session")
+
+    def __init__(self, source: str, text: str, priority: int, enqueued_at: float, session=None):
+        self.source = source
+        self.text = text
+        self.priority = priority
+        self.enqueued_at = enqueued_at
+        self.session = session
+
+    @property
+    def age(self) -> float:
+        return time.perf_counter() - self.enqueued_at
+
+    def __repr__(self):
+        return f"Command({PRIORITY_NAMES[self.priority]}, {self.source!r}, {self.text!r})"
+
+
+class CommandBus:
+    """
+    Replacement for a FIFO command queue.
+
+        bus = CommandBus(classify_fn, accept_fn, flush_words={"stop"})
+        bus.put("ui", "what is a pulsar")     # -> accepted?
+        command = bus.get(timeout=0.2)        # raises queue.Empty
+        command = await bus.aget()            # from a task, no polling
+        bus.depths()                          # {"control": 0, ..., "total": n}
+
+    classify_fn(text) -> CONTROL | CONFIRM | QUERY; called as
+    classify_fn(text, session) for commands put with a session.
+    accept_fn(text) -> bool, applied to questions only; control and
+    confirmation commands are never filtered.
+    on_priority(command) runs on the producer's thread as soon as a
+    control or confirmation command is accepted, so the consumer can be
+    interrupted before it gets around to reading the bus.
+
+    Coalescing and stop-word flushes only touch commands of the same
+    session, so several sessions can share one bus.
+    """
+
+    def __init__(
+        self,
+        classify_fn,
+        accept_fn=None,
+        flush_words=(),
+        on_priority=None,
+        max_queries: int = MAX_QUERIES,
+        max_age: float = QUERY_MAX_AGE
+    ):
+        self._classify = classify_fn
+        self._accept = accept_fn
+        self._flush_words = {w.lower() for w in flush_words}
+        self._on_priority = on_priority
+        self.max_queries = max_queries
+        self.max_age = max_age
+
+        self._queues = tuple(deque() for _ in PRIORITY_NAMES)
+        self._cond = threading.Condition()
+        self._waiters = []        # (loop, future) of tasks blocked in aget()
+
+        self.counts = {
+            "accepted": 0,
+            "filtered": 0,
+            "coalesced": 0,
+            "stale": 0,
+            "shed": 0,
+            "flushed": 0
+        }
+
+    # ===================== PRODUCERS =====================
+
+    def put(self, source, text: str = None, session=None) -> bool:
+        """
+        Never blocks. Returns False when the command was filtered or
+        coalesced into one already waiting. The queue.Queue-style
+        put((source, text)) is accepted too.
+        """
+        if text is None and isinstance(source, tuple):
+            source, text = source[:2]
+        if not isinstance(text, str) or not text.strip():
+            return False
+        text = text.strip()
+        priority = self._classify(text) if session is None else self._classify(text, session)
+        normalized = text.lower()
+
+        if priority == QUERY and self._accept and not self._accept(text):
+            with self._cond:
+                self.counts["filtered"] += 1
+            return False
+
+        with self._cond:
+            now = time.perf_counter()
+            queries = self._queues[QUERY]
+            self._drop_stale(now)
+
+            if priority == QUERY:
+                if any(c.session is session and c.text.lower() == normalized for c in queries):
+                    self.counts["coalesced"] += 1
+                    return False
+                while len(queries) >= self.max_queries:
+                    queries.popleft()
+                    self.counts["shed"] += 1
+
+            elif normalized in self._flush_words and queries:
+                # "stop" means the questions queued behind it as well
+                kept = [c for c in queries if c.session is not session]
+                self.counts["flushed"] += len(queries) - len(kept)
+                queries.clear()
+                queries.extend(kept)
+
+            command = Command(source, text, priority, now, session)
+            self._queues[priority].append(command)
+            self.counts["accepted"] += 1
+            self._cond.notify()
+            self._wake_waiters()
+
+        if priority != QUERY and self._on_priority:
+            try:
+                self._on_priority(command)
+            except Exception as e:
+                print("Barge-in hook error:", repr(e))
+        return True
+
+    # ===================== CONSUMER =====================
+
+    def get(self, timeout: float = None) -> Command:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                command = self._pop()
+                if command:
+                    return command
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise queue.Empty
+                self._cond.wait(remaining)
+
+    async def aget(self) -> Command:
+        """
+        get() for asyncio tasks: suspends until a command arrives,
+        without a polling tick. Cancel the task to stop waiting.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                command = self._pop()
+                if command:
+                    return command
+                waiter = (loop, loop.create_future())
+                self._waiters.append(waiter)
+            try:
+                await waiter[1]
+            finally:
+                with self._cond:
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+
+    def clear(self, priority: int = QUERY) -> int:
+        with self._cond:
+            dropped = len(self._queues[priority])
+            self._queues[priority].clear()
+            return dropped
+
+    # ===================== METRICS =====================
+
+    def qsize(self) -> int:
+        with self._cond:
+            return sum(len(q) for q in self._queues)
+
+    def depths(self) -> dict:
+        with self._cond:
+            depths = {name: len(q) for name, q in zip(PRIORITY_NAMES, self._queues)}
+        depths["total"] = sum(depths.values())
+        return depths
+
+    def stats(self) -> dict:
+        with self._cond:
+            oldest = self._queues[QUERY][0].age if self._queues[QUERY] else 0.0
+            return dict(self.counts, oldest_query_age=round(oldest, 2))
+
+    # ===================== INTERNAL =====================
+
+    def _pop(self):
+        self._drop_stale(time.perf_counter())
+        for q in self._queues:
+            if q:
+                return q.popleft()
+        return None
+
+    def _wake_waiters(self):
+        # Every waiter re-checks, so a cancelled one cannot strand a command
+        for loop, future in self._waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+        self._waiters.clear()
+
+    def _drop_stale(self, now: float):
+        queries = self._queues[QUERY]
+        while queries and now - queries[0].enqueued_at > self.max_age:
+            queries.popleft()
+            self.counts["stale"] += 1
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
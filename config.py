@@ -12,10 +12,26 @@ class Config:
 
     # ===================== API KEYS =====================
     GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+    GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
 
     # ===================== PATHS =====================
     BASE_DIR = Path(__file__).resolve().parent
     MEMORY_FILE = BASE_DIR / "jarvis_memory.json"
+    RESPONSE_CACHE_FILE = BASE_DIR / "jarvis_response_cache.db"
+    LATENCY_LOG_FILE = BASE_DIR / "jarvis_latency.jsonl"
+
+    # ===================== CACHING =====================
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("JARVIS_SEMANTIC_THRESHOLD", 0.92))
+
+    # ===================== HEDGING =====================
+    HEDGE_FAST_PATH = os.getenv("JARVIS_HEDGE", "0") == "1"
+    HEDGE_PERCENTILE = float(os.getenv("JARVIS_HEDGE_PERCENTILE", 95))
+
+    # ===================== CONTEXT =====================
+    CONTEXT_DEADLINE = float(os.getenv("JARVIS_CONTEXT_DEADLINE", 0.35))
+
+    # ===================== BRAIN =====================
+    BRAIN_WORKERS = int(os.getenv("JARVIS_BRAIN_WORKERS", 2))
 
     # ===================== AUDIO =====================
     SAMPLE_RATE = 16000
@@ -0,0 +1,78 @@
+# context_gather.py
+"""
+Deadline-Bound Context Gathering for JARVIS
+-------------------------------------------
+• Prompt inputs (memory retrieval, entity anchoring, routing) are
+  gathered concurrently instead of one after another
+• One deadline for the whole stage: whatever is late falls back to its
+  default, so the prompt goes out without it rather than waiting
+• A failing stage also falls back, and never fails the turn
+• Per-stage completion times for the latency trace
+"""
+
+import time
+import asyncio
+
+# ===================== CONFIG =====================
+
+DEFAULT_DEADLINE = 0.35     # seconds
+
+
+async def gather(stages: dict, deadline: float = DEFAULT_DEADLINE, defaults: dict = None):
+    """
+    Runs the named awaitables concurrently.
+
+        results, timings, missed = await gather(
+            {"memories": search(), "level": route()},
+            deadline=0.3,
+            defaults={"memories": []}
+        )
+
+    results[name] is the stage's value, or defaults.get(name) if it was
+    late or raised. timings[name] is seconds from the start of the
+    gather to the stage finishing (late stages have none). missed lists
+    the stages cut off by the deadline; they are cancelled.
+    """
+    defaults = defaults or {}
+    started = time.perf_counter()
+    timings = {}
+
+    async def timed(name, awaitable):
+        value = await awaitable
+        timings[name] = round(time.perf_counter() - started, 4)
+        return value
+
+    tasks = {name: asyncio.ensure_future(timed(name, aw)) for name, aw in stages.items()}
+    if tasks:
+        await asyncio.wait(tasks.values(), timeout=deadline)
+
+    results = {}
+    missed = []
+    for name, task in tasks.items():
+        if not task.done():
+            task.cancel()
+            missed.append(name)
+            results[name] = defaults.get(name)
+        elif task.cancelled() or task.exception() is not None:
+            if not task.cancelled():
+                print(f"Context stage {name} failed:", repr(task.exception()))
+            results[name] = defaults.get(name)
+        else:
+            results[name] = task.result()
+
+    timings["total"] = round(time.perf_counter() - started, 4)
+    return results, timings, missed
+
+
+def format_timings(timings: dict, missed=()) -> str:
+    """
+    One-line report, e.g.
+    🧩 Context 0.118s — memories 0.117, entity 0.000 (late: memories)
+    """
+    stages = ", ".join(
+        f"{name} {seconds:.3f}" for name, seconds in timings.items() if name != "total"
+    )
+    line = f"🧩 Context {timings.get('total', 0.0):.3f}s — {stages or 'no stages'}"
+    if missed:
+        line += f" (late: {', '.join(missed)})"
+    return line
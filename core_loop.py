@@ -0,0 +1,122 @@
+# core_loop.py
+"""
+Asyncio Core for JARVIS
+-----------------------
+• One event loop runs the brain workers, LLM streaming, speech and
+  periodic jobs as tasks; it is the transport's loop, so HTTP streams
+  never hop threads on their way to the brain
+• Blocking work goes to small named executors (OCR, embeddings, tools,
+  audio) instead of ad-hoc threads
+• The caller's context (current turn's cancel token and trace) follows
+  work into executors
+• Thread-safe entry points for code that is not on the loop
+"""
+
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import groq_transport
+
+# ===================== CONFIG =====================
+
+EXECUTOR_SIZES = {
+    "ocr": 1,       # screen capture + tesseract
+    "embed": 2,     # sentence-transformer encodes, memory search and writes;
+                    # two, so a search cut off by the context deadline does
+                    # not hold up the semantic-cache lookup behind it
+    "tools": 2,     # tool_manager actions
+    "audio": 1      # mp3 decode and playback waits, one voice at a time
+}
+
+_executors = {}
+_lock = threading.Lock()
+
+
+# ===================== LOOP =====================
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    return groq_transport.get_loop()
+
+
+def on_loop() -> bool:
+    """
+    True when called from a task or callback on the core loop.
+    """
+    try:
+        return asyncio.get_running_loop() is get_loop()
+    except RuntimeError:
+        return False
+
+
+def spawn(coro):
+    """
+    Schedules a coroutine on the core loop from any thread. Returns a
+    concurrent.futures.Future; cancelling it cancels the task.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+
+def call_soon(fn, *args):
+    """
+    Runs fn(*args) on the core loop. Safe from any thread.
+    """
+    get_loop().call_soon_threadsafe(fn, *args)
+
+
+def every(interval: float, fn, stop_event: threading.Event = None):
+    """
+    Calls fn() on the core loop every `interval` seconds until
+    stop_event is set. fn must not block. Returns the task's future.
+    """
+    async def tick():
+        while not (stop_event and stop_event.is_set()):
+            try:
+                fn()
+            except Exception as e:
+                print(f"Periodic {getattr(fn, '__name__', fn)} error:", repr(e))
+            await asyncio.sleep(interval)
+
+    return spawn(tick())
+
+
+# ===================== EXECUTORS =====================
+
+def executor(kind: str) -> ThreadPoolExecutor:
+    with _lock:
+        pool = _executors.get(kind)
+        if pool is None:
+            pool = ThreadPoolExecutor(
+                max_workers=EXECUTOR_SIZES.get(kind, 1),
+                thread_name_prefix=f"jarvis-{kind}"
+            )
+            _executors[kind] = pool
+        return pool
+
+
+async def run_blocking(kind: str, fn, *args):
+    """
+    Awaits fn(*args) on the `kind` executor. Use functools.partial for
+    keyword arguments. Cancelling the awaiting task stops the wait; the
+    call itself runs to completion and its result is dropped.
+    """
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        executor(kind), context.run, fn, *args
+    )
+
+
+def submit(kind: str, fn, *args):
+    """
+    Fire-and-forget (or thread-side) variant of run_blocking(). Returns
+    a concurrent.futures.Future.
+    """
+    context = contextvars.copy_context()
+    return executor(kind).submit(context.run, fn, *args)
+
+
+def stats() -> dict:
+    with _lock:
+        pools = dict(_executors)
+    return {kind: pool._work_queue.qsize() for kind, pool in pools.items()}
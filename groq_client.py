@@ -0,0 +1,469 @@
+# groq_client.py
+"""
+Groq Chat Completions for JARVIS
+--------------------------------
+• One completion API for streaming (SSE) and non-streaming (JSON) bodies
+• Consumes SSE incrementally; tokens are delivered as they arrive
+• Plain content deltas skip json.loads via a fast path
+• Returns a ChatResult with text, usage, finish reason and timings
+• Runs on the shared GroqTransport loop; sync wrappers for threads
+• Listeners see headers (rate limits) and results (latency, errors)
+• Optional hedging: a backup request races a slow primary
+"""
+
+import json
+import time
+import queue
+import asyncio
+from dataclasses import dataclass, field
+
+import groq_transport
+from groq_transport import CHAT_PATH, get_loop, get_transport
+
+
+class CompletionError(Exception):
+    """Non-2xx reply from the completions endpoint."""
+
+    def __init__(self, status_code: int, headers: dict, body: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        super().__init__(f"Groq HTTP {status_code}: {body[:300]!r}")
+
+    @property
+    def retry_after(self) -> float:
+        try:
+            return float(self.headers.get("retry-after", 2))
+        except ValueError:
+            return 2.0
+
+
+@dataclass
+class ChatResult:
+    text: str = ""
+    model: str = None
+    finish_reason: str = None
+    usage: dict = field(default_factory=dict)
+    timings: dict = field(default_factory=dict)
+    headers: dict = field(default_factory=dict)
+    streamed: bool = False
+    hedge: str = None          # None | "primary" | "backup" when hedged
+
+
+# ===================== LISTENERS =====================
+
+_listeners = []
+_result_listeners = []
+
+
+def add_listener(fn):
+    """
+    Registers fn(model, status_code, headers), called as soon as the
+    headers of every completion response arrive. Runs on the loop
+    thread; must be quick and must not raise.
+    """
+    _listeners.append(fn)
+
+
+def add_result_listener(fn):
+    """
+    Registers fn(model, result, error), called once per completion with
+    either the ChatResult or the CompletionError. Same rules as
+    add_listener().
+    """
+    _result_listeners.append(fn)
+
+
+def _notify(model, status_code, headers):
+    for fn in _listeners:
+        try:
+            fn(model, status_code, headers)
+        except Exception:
+            pass
+
+
+def _notify_result(model, result, error):
+    for fn in _result_listeners:
+        try:
+            fn(model, result, error)
+        except Exception:
+            pass
+
+
+# ===================== SSE =====================
+
+class SSEDecoder:
+    """
+    Incremental text/event-stream decoder.
+    feed() takes raw body bytes and returns the complete `data` payloads.
+
+    Lines are scanned in place in one growing buffer (no per-line
+    slicing); each payload is copied out once through a memoryview and
+    the consumed prefix is dropped once per feed().
+    """
+
+    __slots__ = ("_buffer", "_data")
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._data = []             # pending lines of a multi-line event
+
+    def feed(self, chunk) -> list:
+        buf = self._buffer
+        buf += chunk
+        events = []
+        pending = self._data
+        find = buf.find
+        startswith = buf.startswith
+        pos = 0
+
+        with memoryview(buf) as view:
+            while True:
+                nl = find(b"\n", pos)
+                if nl < 0:
+                    break
+
+                if startswith(b"data: ", pos):
+                    end = nl - 1 if buf[nl - 1] == 13 else nl      # strip \r
+                    pending.append(view[pos + 6:end].tobytes())
+                elif nl == pos or (nl == pos + 1 and buf[pos] == 13):
+                    # Blank line: dispatch the pending event
+                    if pending:
+                        events.append(pending[0] if len(pending) == 1 else b"\n".join(pending))
+                        pending.clear()
+                elif startswith(b"data:", pos):
+                    end = nl - 1 if buf[nl - 1] == 13 else nl
+                    pending.append(view[pos + 5:end].tobytes())
+
+                # Comments (":...") and other fields (event, id, retry) are skipped
+
+                pos = nl + 1
+
+        if pos:
+            del buf[:pos]
+        return events
+
+
+_scanstring = json.decoder.scanstring
+
+
+def fast_content(event: bytes):
+    """
+    Pulls choices[0].delta.content out of a plain streaming chunk
+    without building the JSON tree. Returns None when the chunk carries
+    anything else worth parsing (finish reason, usage, tool calls,
+    null content), in which case the caller falls back to json.loads.
+
+    Plain substring checks are safe on arbitrary content: inside a JSON
+    string every quote is escaped, so these patterns only match keys.
+    """
+    try:
+        text = event.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+
+    if (
+        ('"finish_reason":null' not in text and '"finish_reason": null' not in text)
+        or '"usage"' in text
+        or '"tool_calls"' in text
+    ):
+        return None
+
+    start = text.find('"content":"')
+    if start >= 0:
+        start += 11
+    else:
+        start = text.find('"content": "')
+        if start < 0:
+            return None
+        start += 12
+
+    if text.find('"content"', start) >= 0:
+        return None             # more than one choice
+
+    try:
+        value, _ = _scanstring(text, start)
+    except ValueError:
+        return None
+    return value
+
+
+def _apply_chunk(result: ChatResult, chunk: dict, on_token, parts: list):
+    result.model = chunk.get("model", result.model)
+
+    choice = (chunk.get("choices") or [{}])[0]
+    delta = choice.get("delta", {}).get("content")
+    if delta:
+        parts.append(delta)
+        if on_token:
+            on_token(delta)
+
+    if choice.get("finish_reason"):
+        result.finish_reason = choice["finish_reason"]
+
+    usage = chunk.get("usage") or (chunk.get("x_groq") or {}).get("usage")
+    if usage:
+        result.usage = usage
+
+
+# ===================== ASYNC API =====================
+
+async def acomplete(payload: dict, timeout: float = None, on_token=None, transport=None) -> ChatResult:
+    """
+    Sends one chat completion and returns a ChatResult.
+
+    Works for `"stream": True` (SSE, tokens passed to on_token as they
+    arrive) and `"stream": False` (single JSON body, on_token gets the
+    whole text once). Raises CompletionError on non-2xx.
+    """
+    transport = transport or get_transport()
+    start = time.perf_counter()
+
+    response = await transport.aopen(CHAT_PATH, payload, timeout)
+    _notify(payload.get("model"), response.status_code, response.headers)
+    result = ChatResult(headers=response.headers, model=payload.get("model"))
+    first_token = None
+
+    def token_sink(token):
+        nonlocal first_token
+        if first_token is None:
+            first_token = time.perf_counter() - start
+        if on_token:
+            on_token(token)
+
+    try:
+        if response.status_code != 200:
+            body = await response.aread(timeout)
+            error = CompletionError(response.status_code, response.headers, body)
+            _notify_result(payload.get("model"), None, error)
+            raise error
+
+        parts = []
+
+        if "text/event-stream" in response.headers.get("content-type", ""):
+            result.streamed = True
+            decoder = SSEDecoder()
+            done = False
+
+            async for data in response.aiter_bytes(timeout):
+                for event in decoder.feed(data):
+                    if event == b"[DONE]":
+                        done = True
+                        break
+                    content = fast_content(event)
+                    if content is not None:
+                        if content:
+                            parts.append(content)
+                            token_sink(content)
+                        continue
+                    try:
+                        chunk = json.loads(event)
+                    except ValueError:
+                        continue
+                    _apply_chunk(result, chunk, token_sink, parts)
+                if done:
+                    break
+
+        else:
+            data = json.loads(await response.aread(timeout))
+            choice = (data.get("choices") or [{}])[0]
+            content = choice.get("message", {}).get("content") or ""
+            if content:
+                parts.append(content)
+                token_sink(content)
+            result.model = data.get("model", result.model)
+            result.finish_reason = choice.get("finish_reason")
+            result.usage = data.get("usage") or {}
+
+        result.text = "".join(parts)
+
+    finally:
+        await response.aclose()
+
+    result.timings = {
+        "connect": response.timings.get("connect"),
+        "ttfb": response.timings.get("ttfb"),
+        "first_token": first_token,
+        "total": time.perf_counter() - start,
+        "reused": response.timings.get("reused")
+    }
+    _notify_result(payload.get("model"), result, None)
+    return result
+
+
+# ===================== HEDGING =====================
+
+_hedge_counts = {"calls": 0, "fired": 0, "denied": 0, "backup_won": 0, "primary_won": 0}
+
+
+async def ahedged(
+    payload: dict,
+    timeout: float = None,
+    on_token=None,
+    hedge_after: float = None,
+    backup_payload: dict = None,
+    transport=None,
+    admit_backup=None
+) -> ChatResult:
+    """
+    acomplete() with a hedge. If the primary has produced no token after
+    `hedge_after` seconds, a backup request (backup_payload, default the
+    same payload) is started. Whichever emits a token first wins: only
+    its tokens reach on_token and the loser is cancelled.
+
+    admit_backup, if given, is asked right before the backup would go
+    out (e.g. to reserve rate-limit budget); when it returns False the
+    hedge is skipped and the primary runs alone.
+    """
+    winner = asyncio.get_running_loop().create_future()
+
+    def sink(index):
+        def push(token):
+            if not winner.done():
+                winner.set_result(index)
+            if winner.result() == index and on_token:
+                on_token(token)
+        return push
+
+    _hedge_counts["calls"] += 1
+    tasks = [asyncio.ensure_future(acomplete(payload, timeout, sink(0), transport))]
+
+    try:
+        if hedge_after is not None:
+            done, _ = await asyncio.wait(
+                [tasks[0], winner],
+                timeout=hedge_after,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done and admit_backup is not None and not admit_backup():
+                _hedge_counts["denied"] += 1
+            elif not done:
+                _hedge_counts["fired"] += 1
+                tasks.append(asyncio.ensure_future(
+                    acomplete(backup_payload or payload, timeout, sink(1), transport)
+                ))
+
+        while not winner.done():
+            pending = [t for t in tasks if not t.done()]
+            if not pending:
+                break
+            await asyncio.wait(pending + [winner], return_when=asyncio.FIRST_COMPLETED)
+
+        if winner.done():
+            index = winner.result()
+            for i, task in enumerate(tasks):
+                if i != index:
+                    task.cancel()
+            result = await tasks[index]
+            if len(tasks) > 1:
+                _hedge_counts["backup_won" if index else "primary_won"] += 1
+                result.hedge = "backup" if index else "primary"
+            return result
+
+        # No attempt produced a token: first clean result, else primary's error
+        for task in tasks:
+            if not task.exception():
+                return task.result()
+        raise tasks[0].exception()
+
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()  # loser's error is expected; mark it retrieved
+        if not winner.done():
+            winner.cancel()
+
+
+def hedge_stats() -> dict:
+    """
+    How often hedges fire and win, to weigh their extra cost.
+    """
+    counts = dict(_hedge_counts)
+    fired = counts["fired"]
+    counts["fire_rate"] = round(fired / counts["calls"], 3) if counts["calls"] else 0.0
+    counts["backup_win_rate"] = round(counts["backup_won"] / fired, 3) if fired else 0.0
+    return counts
+
+
+# ===================== SYNC API =====================
+
+def submit(payload: dict, timeout: float = None, on_token=None, transport=None):
+    """
+    Starts acomplete() on the transport loop and returns a
+    concurrent.futures.Future resolving to the ChatResult.
+    on_token runs on the loop thread and must not block.
+    """
+    return asyncio.run_coroutine_threadsafe(
+        acomplete(payload, timeout, on_token, transport),
+        get_loop()
+    )
+
+
+def submit_hedged(
+    payload: dict,
+    timeout: float = None,
+    on_token=None,
+    hedge_after: float = None,
+    backup_payload: dict = None,
+    transport=None,
+    admit_backup=None
+):
+    """
+    submit() for ahedged(): returns a concurrent.futures.Future.
+    """
+    return asyncio.run_coroutine_threadsafe(
+        ahedged(payload, timeout, on_token, hedge_after, backup_payload, transport, admit_backup),
+        get_loop()
+    )
+
+
+def complete(payload: dict, timeout: float = None, transport=None) -> ChatResult:
+    """
+    Blocking completion for thread-based callers.
+    """
+    return groq_transport.run_sync(acomplete(payload, timeout, transport=transport))
+
+
+_END = object()
+
+
+class CompletionStream:
+    """
+    Blocking token iterator over acomplete().
+
+        with groq_client.stream(payload) as s:
+            for token in s: ...
+        s.result  # ChatResult once exhausted
+
+    Closing early cancels the request and drops its socket.
+    """
+
+    def __init__(self, payload: dict, timeout: float = None, transport=None):
+        self.result = None
+        self._tokens = queue.Queue()
+        self._future = submit(payload, timeout, self._tokens.put, transport)
+        self._future.add_done_callback(lambda _: self._tokens.put(_END))
+
+    def __iter__(self):
+        while True:
+            token = self._tokens.get()
+            if token is _END:
+                break
+            yield token
+        # Re-raises CompletionError / TimeoutError from the request
+        self.result = self._future.result()
+
+    def close(self):
+        self._future.cancel()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def stream(payload: dict, timeout: float = None, transport=None) -> CompletionStream:
+    return CompletionStream(payload, timeout, transport)
@@ -0,0 +1,501 @@
+# groq_standin.py
+"""
+Local Groq Stand-In for JARVIS
+------------------------------
+• OpenAI-compatible /openai/v1/chat/completions server (stdlib asyncio)
+• SSE streaming with configurable TTFT, inter-token delay and jitter
+• 429 and 5xx injection at configurable rates
+• Cassettes: record real SSE streams with timings, replay them offline
+• Point JARVIS at it with GROQ_BASE_URL or set_transport()
+
+    python groq_standin.py serve --ttft 0.3 --inter-token 0.02
+    python groq_standin.py record --out bench.jsonl --prompt "hello"
+    python groq_standin.py serve --cassette bench.jsonl
+"""
+
+import sys
+import json
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+
+import groq_transport
+from groq_client import SSEDecoder
+from groq_transport import CHAT_PATH
+
+# ===================== CONFIG =====================
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8088
+PATH_PREFIX = "/openai/v1"
+
+DEFAULT_REPLY = (
+    "Certainly. This reply comes from the local stand-in server, "
+    "so every token arrives on a schedule you control."
+)
+
+# Response headers worth keeping in a cassette
+_RECORDED_HEADERS = ("content-type", "retry-after")
+
+
+# ===================== CASSETTES =====================
+
+def cassette_key(payload: dict) -> str:
+    """
+    Identifies a request by model and messages only, so a replay
+    matches regardless of temperature or max_tokens.
+    """
+    raw = json.dumps(
+        {"model": payload.get("model"), "messages": payload.get("messages")},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def load_cassette(path) -> list:
+    """
+    Cassette = JSON Lines, one interaction per line:
+      {"key", "model", "status", "headers", "ttfb",
+       "events": [[offset_seconds, data], ...]}   # SSE replies
+       or "body": "..."                           # everything else
+    """
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                entries.append(json.loads(line))
+    return entries
+
+
+class CassetteRecorder:
+    """
+    Sends real requests and appends each reply, with per-event
+    timings, to a cassette file.
+    """
+
+    def __init__(self, path, transport=None):
+        self.path = Path(path)
+        self.transport = transport or groq_transport.get_transport()
+
+    async def arecord(self, payload: dict, timeout: float = 30) -> dict:
+        start = time.perf_counter()
+        response = await self.transport.aopen(CHAT_PATH, payload, timeout)
+        entry = {
+            "key": cassette_key(payload),
+            "model": payload.get("model"),
+            "status": response.status_code,
+            "headers": {
+                k: v for k, v in response.headers.items()
+                if k in _RECORDED_HEADERS or k.startswith("x-ratelimit-")
+            },
+            "ttfb": round(time.perf_counter() - start, 4)
+        }
+
+        try:
+            if "text/event-stream" in response.headers.get("content-type", ""):
+                decoder = SSEDecoder()
+                events = []
+                async for data in response.aiter_bytes(timeout):
+                    offset = round(time.perf_counter() - start, 4)
+                    for event in decoder.feed(data):
+                        events.append([offset, event.decode("utf-8")])
+                entry["events"] = events
+            else:
+                entry["body"] = (await response.aread(timeout)).decode("utf-8", errors="replace")
+        finally:
+            await response.aclose()
+
+        return entry
+
+    def record(self, payload: dict, timeout: float = 30) -> dict:
+        entry = groq_transport.run_sync(self.arecord(payload, timeout))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return entry
+
+
+# ===================== SERVER =====================
+
+class StandinServer:
+    """
+    Stand-in for the Groq chat completions endpoint.
+
+        server = StandinServer(ttft=0.3, inter_token=0.02).start()
+        transport = GroqTransport("test", base_url=server.base_url)
+        ...
+        server.stop()
+
+    With a cassette, requests whose model + messages were recorded get
+    that reply at its recorded pace (scaled by `speed`); anything else
+    is served the next recorded entry in turn. Without one, replies are
+    synthetic: `reply` split into word tokens.
+    """
+
+    def __init__(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = 0,
+        ttft: float = 0.2,
+        inter_token: float = 0.02,
+        jitter: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        error_rate: float = 0.0,
+        retry_after: float = 1.0,
+        reply: str = DEFAULT_REPLY,
+        cassette=None,
+        speed: float = 1.0,
+        seed: int = None
+    ):
+        self.host = host
+        self.port = port
+        self.ttft = ttft
+        self.inter_token = inter_token
+        self.jitter = jitter
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.reply = reply
+        self.speed = speed
+        self._random = random.Random(seed)
+
+        entries = load_cassette(cassette) if cassette else []
+        self._replay_order = entries
+        self._replay_by_key = {e["key"]: e for e in entries}
+        self._replay_index = 0
+
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._handlers = set()
+
+        self.counts = {"requests": 0, "ok": 0, "rate_limited": 0, "errors": 0, "disconnects": 0}
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}{PATH_PREFIX}"
+
+    # ----- lifecycle -----
+
+    def start(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever,
+            daemon=True,
+            name="GroqStandin"
+        )
+        self._thread.start()
+        self._server = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self._handle, self.host, self.port), self._loop
+        ).result()
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    def stop(self):
+        if self._server is None:
+            return
+
+        async def shutdown():
+            self._server.close()
+            # Idle keep-alive connections would otherwise hold the server open
+            for task in list(self._handlers):
+                task.cancel()
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+            await self._server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+        self._loop.close()
+        self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self) -> dict:
+        return dict(self.counts)
+
+    # ----- HTTP -----
+
+    async def _handle(self, reader, writer):
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                body = await reader.readexactly(length) if length else b""
+
+                method, path = request_line.decode("latin-1").split()[:2]
+                await self._dispatch(writer, method, path, body)
+
+                if headers.get("connection", "").lower() == "close":
+                    break
+
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.counts["disconnects"] += 1
+        finally:
+            self._handlers.discard(task)
+            writer.close()
+
+    async def _dispatch(self, writer, method, path, body):
+        if method != "POST" or path != PATH_PREFIX + CHAT_PATH:
+            await self._send(writer, 404, {"error": {"message": f"Unknown route {path}"}})
+            return
+
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            await self._send(writer, 400, {"error": {"message": "Invalid JSON body"}})
+            return
+
+        self.counts["requests"] += 1
+        roll = self._random.random()
+
+        if roll < self.rate_limit_rate:
+            self.counts["rate_limited"] += 1
+            await self._send(
+                writer,
+                429,
+                {"error": {"message": "Rate limit reached (injected)", "type": "tokens"}},
+                {
+                    "retry-after": f"{self.retry_after:g}",
+                    "x-ratelimit-remaining-requests": "0"
+                }
+            )
+            return
+
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.counts["errors"] += 1
+            await self._send(writer, 500, {"error": {"message": "Internal error (injected)"}})
+            return
+
+        entry = self._cassette_entry(payload)
+        if entry is not None:
+            await self._replay(writer, entry)
+        elif payload.get("stream"):
+            await self._stream_synthetic(writer, payload)
+        else:
+            await self._reply_synthetic(writer, payload)
+        self.counts["ok"] += 1
+
+    async def _send(self, writer, status: int, data, extra_headers: dict = None):
+        body = data if isinstance(data, bytes) else json.dumps(data).encode("utf-8")
+        head = {"content-type": "application/json", "content-length": str(len(body))}
+        head.update(extra_headers or {})
+        writer.write(self._head(status, head) + body)
+        await writer.drain()
+
+    @staticmethod
+    def _head(status: int, headers: dict) -> bytes:
+        lines = [f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}"]
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _send_events(self, writer, status, headers, events):
+        """
+        Writes SSE events as chunked frames. `events` yields
+        (delay_before, data) pairs.
+        """
+        head = {k: v for k, v in headers.items() if k not in ("content-length", "transfer-encoding")}
+        head["content-type"] = "text/event-stream"
+        head["transfer-encoding"] = "chunked"
+        writer.write(self._head(status, head))
+        await writer.drain()
+
+        for delay, data in events:
+            if delay > 0:
+                await asyncio.sleep(delay)
+            frame = b"data: " + data.encode("utf-8") + b"\n\n"
+            writer.write(b"%x\r\n%s\r\n" % (len(frame), frame))
+            await writer.drain()
+
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    # ----- synthetic replies -----
+
+    def _delay(self, base: float) -> float:
+        if self.jitter:
+            base *= 1 + self._random.uniform(-self.jitter, self.jitter)
+        return max(0.0, base)
+
+    def _tokens(self, payload) -> list:
+        words = self.reply.split(" ")
+        tokens = [words[0]] + [" " + w for w in words[1:]]
+        limit = payload.get("max_tokens")
+        return tokens[:limit] if limit else tokens
+
+    async def _stream_synthetic(self, writer, payload):
+        model = payload.get("model", "standin")
+        created = int(time.time())
+        tokens = self._tokens(payload)
+
+        def chunk(delta, finish=None, usage=None):
+            data = {
+                "id": "chatcmpl-standin",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]
+            }
+            if usage:
+                data["x_groq"] = {"usage": usage}
+            return json.dumps(data, separators=(",", ":"))
+
+        def events():
+            yield 0.0, chunk({"role": "assistant", "content": ""})
+            for i, token in enumerate(tokens):
+                yield self._delay(self.ttft if i == 0 else self.inter_token), chunk({"content": token})
+            yield 0.0, chunk({}, "stop", {
+                "prompt_tokens": 0,
+                "completion_tokens": len(tokens),
+                "total_tokens": len(tokens)
+            })
+            yield 0.0, "[DONE]"
+
+        await self._send_events(writer, 200, {}, events())
+
+    async def _reply_synthetic(self, writer, payload):
+        tokens = self._tokens(payload)
+        await asyncio.sleep(self._delay(self.ttft + self.inter_token * len(tokens)))
+        await self._send(writer, 200, {
+            "id": "chatcmpl-standin",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "standin"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens)},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)}
+        })
+
+    # ----- replay -----
+
+    def _cassette_entry(self, payload):
+        if not self._replay_order:
+            return None
+        entry = self._replay_by_key.get(cassette_key(payload))
+        if entry is None:
+            entry = self._replay_order[self._replay_index % len(self._replay_order)]
+            self._replay_index += 1
+        return entry
+
+    async def _replay(self, writer, entry):
+        scale = 1.0 / self.speed if self.speed > 0 else 0.0
+        await asyncio.sleep(entry.get("ttfb", 0.0) * scale)
+
+        if "events" not in entry:
+            await self._send(
+                writer, entry["status"], entry.get("body", "").encode("utf-8"), entry.get("headers")
+            )
+            return
+
+        def events():
+            previous = entry.get("ttfb", 0.0)
+            for offset, data in entry["events"]:
+                yield max(0.0, offset - previous) * scale, data
+                previous = max(previous, offset)
+
+        await self._send_events(writer, entry["status"], entry.get("headers", {}), events())
+
+
+# ===================== CLI =====================
+
+def _serve(args):
+    server = StandinServer(
+        host=args.host,
+        port=args.port,
+        ttft=args.ttft,
+        inter_token=args.inter_token,
+        jitter=args.jitter,
+        rate_limit_rate=args.rate_limit_rate,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after,
+        reply=args.reply,
+        cassette=args.cassette,
+        speed=args.speed,
+        seed=args.seed
+    ).start()
+
+    print(f"🧪 Groq stand-in listening on {server.base_url}")
+    print(f"👉 GROQ_BASE_URL={server.base_url} python jarvis_supervisor.py")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(f"\n📊 {server.stats()}")
+    finally:
+        server.stop()
+
+
+def _record(args):
+    from config import Config
+
+    recorder = CassetteRecorder(args.out)
+    for prompt in args.prompt:
+        entry = recorder.record({
+            "model": args.model or Config.MODELS["fast"],
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.2,
+            "max_tokens": args.max_tokens,
+            "stream": True
+        })
+        events = len(entry.get("events", []))
+        print(f"🎞️ Recorded {entry['status']} ({events} events, ttfb {entry['ttfb']}s): {prompt[:40]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local Groq stand-in server and cassette recorder")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="run the stand-in server")
+    serve.add_argument("--host", default=DEFAULT_HOST)
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--ttft", type=float, default=0.2, help="seconds to first token")
+    serve.add_argument("--inter-token", type=float, default=0.02, help="seconds between tokens")
+    serve.add_argument("--jitter", type=float, default=0.0, help="± fraction applied to each delay")
+    serve.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered 429")
+    serve.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 500")
+    serve.add_argument("--retry-after", type=float, default=1.0)
+    serve.add_argument("--reply", default=DEFAULT_REPLY)
+    serve.add_argument("--cassette", help="replay this cassette instead of synthetic replies")
+    serve.add_argument("--speed", type=float, default=1.0, help="replay speed multiplier")
+    serve.add_argument("--seed", type=int)
+    serve.set_defaults(func=_serve)
+
+    record = sub.add_parser("record", help="record live Groq replies into a cassette")
+    record.add_argument("--out", required=True)
+    record.add_argument("--prompt", action="append", required=True)
+    record.add_argument("--model")
+    record.add_argument("--max-tokens", type=int, default=200)
+    record.set_defaults(func=_record)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
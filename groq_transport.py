@@ -0,0 +1,567 @@
+# groq_transport.py
+"""
+Groq Transport for JARVIS
+-------------------------
+• One keep-alive connection pool shared by every Groq caller
+• asyncio-native HTTP/1.1 client (stdlib only)
+• Sync wrapper backed by a dedicated event loop thread
+• Per-call connect / time-to-first-byte / total timings
+• Stale pooled sockets are retried once on a fresh connection
+"""
+
+import ssl
+import json
+import time
+import asyncio
+import threading
+import concurrent.futures
+from collections import deque
+from urllib.parse import urlsplit
+
+import certifi
+
+# ===================== CONFIG =====================
+
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+CHAT_PATH = "/chat/completions"
+
+POOL_MAX_CONNECTIONS = 8      # hard cap on sockets to the API host
+POOL_KEEPALIVE_EXPIRY = 60    # seconds an idle socket stays pooled
+CONNECT_TIMEOUT = 5           # seconds for TCP + TLS handshake
+TIMINGS_HISTORY = 200         # per-call timing records kept for stats()
+
+_READ_CHUNK = 65536
+
+
+class HTTPError(Exception):
+    """Raised by raise_for_status() for non-2xx responses."""
+
+    def __init__(self, status_code: int, headers: dict, body: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        super().__init__(f"HTTP {status_code}: {body[:200]!r}")
+
+
+# ===================== EVENT LOOP =====================
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    Returns the transport's event loop, starting its thread on first use.
+    Sync callers submit coroutines here with run_coroutine_threadsafe.
+    """
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever,
+                    daemon=True,
+                    name="GroqTransportLoop"
+                ).start()
+                _loop = loop
+    return _loop
+
+
+def run_sync(coro, timeout=None):
+    """
+    Runs a coroutine on the transport loop from any other thread. With
+    a timeout the caller waits at most that long, even while the loop
+    itself is stalled; the coroutine is then cancelled and TimeoutError
+    raised.
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, get_loop())
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        # A distinct class before Python 3.11
+        future.cancel()
+        raise TimeoutError(f"no result from the transport loop within {timeout}s") from None
+    except BaseException:
+        future.cancel()
+        raise
+
+
+# ===================== CONNECTION POOL =====================
+
+class _Connection:
+    __slots__ = ("reader", "writer", "last_used")
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.last_used = time.monotonic()
+
+    def is_usable(self, expiry: float) -> bool:
+        return (
+            not self.writer.is_closing()
+            and not self.reader.at_eof()
+            and time.monotonic() - self.last_used < expiry
+        )
+
+    def close(self):
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """
+    Bounded pool of keep-alive sockets to a single origin.
+    At most `max_connections` sockets are open or checked out at once.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        max_connections: int = POOL_MAX_CONNECTIONS,
+        keepalive_expiry: float = POOL_KEEPALIVE_EXPIRY,
+        connect_timeout: float = CONNECT_TIMEOUT
+    ):
+        url = urlsplit(base_url)
+        self.scheme = url.scheme or "https"
+        self.host = url.hostname
+        self.port = url.port or (443 if self.scheme == "https" else 80)
+        self.path_prefix = url.path.rstrip("/")
+        self.host_header = (
+            self.host if url.port is None else f"{self.host}:{self.port}"
+        )
+
+        self.keepalive_expiry = keepalive_expiry
+        self.connect_timeout = connect_timeout
+
+        self._ssl = (
+            ssl.create_default_context(cafile=certifi.where())
+            if self.scheme == "https" else None
+        )
+        self._idle = deque()
+        self._slots = asyncio.Semaphore(max_connections)
+
+        self.opened = 0
+        self.reused = 0
+
+    async def acquire(self):
+        """
+        Returns (connection, connect_seconds, reused).
+        connect_seconds is 0.0 for a reused socket.
+        """
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                conn = self._idle.pop()
+                if conn.is_usable(self.keepalive_expiry):
+                    self.reused += 1
+                    return conn, 0.0, True
+                conn.close()
+
+            start = time.perf_counter()
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(
+                    self.host,
+                    self.port,
+                    ssl=self._ssl,
+                    server_hostname=self.host if self._ssl else None
+                ),
+                self.connect_timeout
+            )
+            self.opened += 1
+            return _Connection(reader, writer), time.perf_counter() - start, False
+
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def warm(self) -> float:
+        """
+        Opens a keep-alive socket ahead of a request unless a usable one
+        is already idle or every slot is busy. Returns connect seconds
+        (0.0 when nothing had to be opened).
+        """
+        if self._slots.locked() or any(c.is_usable(self.keepalive_expiry) for c in self._idle):
+            return 0.0
+        conn, connect_time, _ = await self.acquire()
+        self.release(conn, reusable=True)
+        return connect_time
+
+    def release(self, conn: _Connection, reusable: bool):
+        if reusable and not conn.writer.is_closing():
+            conn.last_used = time.monotonic()
+            self._idle.append(conn)
+        else:
+            conn.close()
+        self._slots.release()
+
+    def idle_count(self) -> int:
+        return len(self._idle)
+
+    def close_idle(self):
+        while self._idle:
+            self._idle.pop().close()
+
+
+# ===================== RESPONSE =====================
+
+class Response:
+    """
+    A response whose body is read lazily from its pooled socket.
+    The socket goes back to the pool once the body is fully consumed;
+    closing early discards it.
+    """
+
+    def __init__(self, transport, conn, status_code, headers, timings, start):
+        self._transport = transport
+        self._conn = conn
+        self._start = start
+        self.status_code = status_code
+        self.headers = headers
+        self.timings = timings
+        self.content = None
+
+    async def aiter_bytes(self, read_timeout: float = None):
+        conn = self._conn
+        if conn is None:
+            if self.content:
+                yield self.content
+            return
+
+        reader = conn.reader
+        headers = self.headers
+        reusable = headers.get("connection", "").lower() != "close"
+
+        async def read(coro):
+            return await asyncio.wait_for(coro, read_timeout)
+
+        try:
+            if "chunked" in headers.get("transfer-encoding", "").lower():
+                while True:
+                    line = await read(reader.readline())
+                    if not line:
+                        raise ConnectionError("Connection closed mid-body")
+                    size = int(line.split(b";", 1)[0].strip() or b"0", 16)
+                    if size == 0:
+                        while (await read(reader.readline())) not in (b"\r\n", b"\n", b""):
+                            pass
+                        break
+                    data = await read(reader.readexactly(size + 2))
+                    yield data[:-2]
+
+            elif "content-length" in headers:
+                remaining = int(headers["content-length"])
+                while remaining > 0:
+                    data = await read(reader.read(min(remaining, _READ_CHUNK)))
+                    if not data:
+                        raise ConnectionError("Connection closed mid-body")
+                    remaining -= len(data)
+                    yield data
+
+            else:
+                reusable = False
+                while True:
+                    data = await read(reader.read(_READ_CHUNK))
+                    if not data:
+                        break
+                    yield data
+
+        except BaseException:
+            self._finish(reusable=False)
+            raise
+
+        self._finish(reusable=reusable)
+
+    async def aread(self, read_timeout: float = None) -> bytes:
+        if self.content is None:
+            parts = []
+            async for data in self.aiter_bytes(read_timeout):
+                parts.append(data)
+            self.content = b"".join(parts)
+        return self.content
+
+    async def aclose(self):
+        if self._conn is not None:
+            self._finish(reusable=False)
+
+    def _finish(self, reusable: bool):
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        self._transport.pool.release(conn, reusable)
+        self.timings["total"] = time.perf_counter() - self._start
+        self._transport._record(self.timings)
+
+    # ----- requests-style helpers -----
+
+    @property
+    def text(self) -> str:
+        return (self.content or b"").decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content or b"null")
+
+    def raise_for_status(self):
+        if not 200 <= self.status_code < 300:
+            raise HTTPError(self.status_code, self.headers, self.content or b"")
+
+
+class SyncStream:
+    """
+    Blocking view of a streaming Response for thread-based callers.
+    Each chunk is pulled from the transport loop on demand, so a slow
+    consumer applies natural backpressure to the socket.
+    """
+
+    def __init__(self, transport, path, payload, timeout):
+        self._transport = transport
+        self._path = path
+        self._payload = payload
+        self._timeout = timeout
+        self._response = None
+
+    def __enter__(self):
+        self._response = run_sync(
+            self._transport.aopen(self._path, self._payload, self._timeout),
+            self._timeout
+        )
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def status_code(self):
+        return self._response.status_code
+
+    @property
+    def headers(self):
+        return self._response.headers
+
+    @property
+    def timings(self):
+        return self._response.timings
+
+    def raise_for_status(self):
+        if not 200 <= self._response.status_code < 300:
+            run_sync(self._response.aread(self._timeout), self._timeout)
+            self._response.raise_for_status()
+
+    def iter_bytes(self):
+        agen = self._response.aiter_bytes(self._timeout)
+        try:
+            while True:
+                try:
+                    yield run_sync(agen.__anext__(), self._timeout)
+                except StopAsyncIteration:
+                    return
+        finally:
+            run_sync(agen.aclose())
+
+    def iter_lines(self):
+        pending = b""
+        for data in self.iter_bytes():
+            pending += data
+            lines = pending.split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                yield line.rstrip(b"\r")
+        if pending:
+            yield pending.rstrip(b"\r")
+
+    def close(self):
+        if self._response is not None:
+            run_sync(self._response.aclose())
+
+
+# ===================== TRANSPORT =====================
+
+class GroqTransport:
+    """
+    Shared Groq HTTP client.
+
+    Async API (call on get_loop()):
+        response = await transport.aopen(path, payload, timeout)
+        response = await transport.apost(path, payload, timeout)
+        await transport.awarm()       # pre-open a socket for the next call
+
+    Sync API (any thread):
+        response = transport.post(path, payload, timeout)
+        with transport.stream(path, payload, timeout) as response: ...
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = GROQ_BASE_URL,
+        max_connections: int = POOL_MAX_CONNECTIONS,
+        keepalive_expiry: float = POOL_KEEPALIVE_EXPIRY,
+        connect_timeout: float = CONNECT_TIMEOUT
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.pool = ConnectionPool(
+            base_url,
+            max_connections=max_connections,
+            keepalive_expiry=keepalive_expiry,
+            connect_timeout=connect_timeout
+        )
+        self._timings = deque(maxlen=TIMINGS_HISTORY)
+        self._timings_lock = threading.Lock()
+        self.calls = 0
+
+    # ----- async API -----
+
+    async def aopen(self, path: str, payload: dict, timeout: float = None) -> Response:
+        """
+        Sends the request and returns once the status line and headers
+        have arrived. The body is left on the socket for the caller.
+        """
+        body = json.dumps(payload).encode("utf-8")
+        accept = "text/event-stream" if payload.get("stream") else "application/json"
+        head = (
+            f"POST {self.pool.path_prefix}{path} HTTP/1.1\r\n"
+            f"Host: {self.pool.host_header}\r\n"
+            f"Authorization: Bearer {self.api_key}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Accept: {accept}\r\n"
+            "User-Agent: jarvis-groq-transport\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: keep-alive\r\n"
+            "\r\n"
+        ).encode("latin-1")
+
+        for attempt in range(2):
+            start = time.perf_counter()
+            conn, connect_time, reused = await self.pool.acquire()
+            try:
+                conn.writer.write(head + body)
+                await conn.writer.drain()
+
+                status_line = await asyncio.wait_for(conn.reader.readline(), timeout)
+                if not status_line:
+                    raise ConnectionError("Connection closed before response")
+                ttfb = time.perf_counter() - start
+
+                headers = {}
+                while True:
+                    line = await asyncio.wait_for(conn.reader.readline(), timeout)
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self.pool.release(conn, reusable=False)
+                # A pooled socket the server already dropped: retry fresh once
+                if reused and attempt == 0:
+                    continue
+                raise
+
+            except BaseException:
+                self.pool.release(conn, reusable=False)
+                raise
+
+            self.calls += 1
+            status_code = int(status_line.split(None, 2)[1])
+            timings = {
+                "connect": connect_time,
+                "ttfb": ttfb,
+                "total": None,
+                "reused": reused
+            }
+            return Response(self, conn, status_code, headers, timings, start)
+
+    async def awarm(self) -> float:
+        """
+        Pre-opens a pooled connection (TCP + TLS) so the next request
+        skips the handshake. See ConnectionPool.warm().
+        """
+        return await self.pool.warm()
+
+    async def apost(self, path: str, payload: dict, timeout: float = None) -> Response:
+        """
+        Sends the request and reads the whole body.
+        """
+        response = await self.aopen(path, payload, timeout)
+        await response.aread(timeout)
+        return response
+
+    # ----- sync API -----
+
+    def post(self, path: str, payload: dict, timeout: float = None) -> Response:
+        """
+        Blocking apost(). `timeout` also bounds the caller's whole wait,
+        so a stalled transport loop cannot hold the thread.
+        """
+        return run_sync(self.apost(path, payload, timeout), timeout)
+
+    def stream(self, path: str, payload: dict, timeout: float = None) -> SyncStream:
+        return SyncStream(self, path, payload, timeout)
+
+    # ----- timings -----
+
+    def _record(self, timings: dict):
+        with self._timings_lock:
+            self._timings.append(dict(timings))
+
+    def recent_timings(self) -> list:
+        with self._timings_lock:
+            return list(self._timings)
+
+    def stats(self) -> dict:
+        """
+        Aggregate connect / TTFB / total timings over recent calls.
+        """
+        records = self.recent_timings()
+
+        def avg(key):
+            values = [r[key] for r in records if r.get(key) is not None]
+            return round(sum(values) / len(values), 4) if values else None
+
+        return {
+            "calls": self.calls,
+            "connections_opened": self.pool.opened,
+            "connections_reused": self.pool.reused,
+            "idle_connections": self.pool.idle_count(),
+            "avg_connect": avg("connect"),
+            "avg_ttfb": avg("ttfb"),
+            "avg_total": avg("total")
+        }
+
+
+# ===================== SHARED INSTANCE =====================
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_transport() -> GroqTransport:
+    """
+    Process-wide transport used by main, vision and the healing arbiter.
+    """
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                from config import Config
+                _default = GroqTransport(
+                    Config.GROQ_API_KEY,
+                    base_url=Config.GROQ_BASE_URL
+                )
+    return _default
+
+
+def set_transport(transport):
+    """
+    Replaces the process-wide transport, e.g. with one pointed at the
+    local stand-in server. None restores the Config-based default.
+
+        main.session = set_transport(GroqTransport(key, base_url=url))
+    """
+    global _default
+    with _default_lock:
+        _default = transport
+    return transport
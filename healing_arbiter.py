@@ -1,12 +1,12 @@
 import time
 import json
 import psutil
-import requests
 import threading
 from pathlib import Path
 
 from config import Config
 from brain_manager import BrainManager
+import groq_transport
 
 # ===================== STATE =====================
 
@@ -19,6 +19,8 @@ HEAL_COOLDOWN = 10  # seconds
 _memory = []
 _stop_event = threading.Event()
 
+QUEUE_OVERFLOW = 25  # queued questions before healing kicks in
+
 # ===================== HEARTBEAT =====================
 
 def heartbeat():
@@ -53,12 +55,23 @@ def past_success_rate(action: str) -> float:
 
 # ===================== SNAPSHOT =====================
 
-def snapshot(symptom: str, queue_size: int) -> dict:
+def queue_depths(queue_size_fn) -> dict:
+    """
+    queue_size_fn may return a plain size or per-priority depths
+    ({"control": n, "confirm": n, "query": n, "total": n}).
+    """
+    depths = queue_size_fn()
+    if isinstance(depths, dict):
+        return depths
+    return {"total": depths}
+
+def snapshot(symptom: str, depths: dict) -> dict:
     return {
         "symptom": symptom,
         "cpu": psutil.cpu_percent(interval=0.1),
         "ram": psutil.virtual_memory().percent,
-        "queue_size": queue_size,
+        "queue_size": depths.get("total", 0),
+        "queue_depths": depths,
         "heartbeat_age": round(time.time() - _last_heartbeat, 2),
         "recent_actions": _memory[-3:]
     }
@@ -85,10 +98,9 @@ Respond ONLY JSON:
 """
 
     try:
-        r = requests.post(
-            "https://api.groq.com/openai/v1/chat/completions",
-            headers={"Authorization": f"Bearer {Config.GROQ_API_KEY}"},
-            json={
+        r = groq_transport.get_transport().post(
+            groq_transport.CHAT_PATH,
+            {
                 "model": "llama-3.3-70b-versatile",
                 "messages": [{"role": "user", "content": prompt}],
                 "temperature": 0.2,
@@ -131,7 +143,7 @@ def execute(action: str, brain_loop) -> bool:
 
 # ===================== HEAL =====================
 
-def heal(symptom: str, queue_size: int, brain_loop):
+def heal(symptom: str, depths: dict, brain_loop):
     now = time.time()
 
     if symptom in _last_heal_time:
@@ -140,7 +152,7 @@ def heal(symptom: str, queue_size: int, brain_loop):
 
     _last_heal_time[symptom] = now
 
-    snap = snapshot(symptom, queue_size)
+    snap = snapshot(symptom, depths)
     decision = think(snap)
     success = execute(decision["action"], brain_loop)
     print(f"🩺 Heal[{symptom}] → {decision['action']} ({decision['confidence']})")
@@ -159,14 +171,16 @@ def monitor(queue_size_fn, brain_loop):
     while not _stop_event.is_set():
         time.sleep(3)
 
+        depths = queue_depths(queue_size_fn)
+
         if time.time() - _last_heartbeat > 6:
-            heal("heartbeat_delay", queue_size_fn(), brain_loop)
+            heal("heartbeat_delay", depths, brain_loop)
 
         if psutil.virtual_memory().percent > 85:
-            heal("memory_pressure", queue_size_fn(), brain_loop)
+            heal("memory_pressure", depths, brain_loop)
 
-        if queue_size_fn() > 25:
-            heal("queue_overflow", queue_size_fn(), brain_loop)
+        if depths.get("query", depths["total"]) > QUEUE_OVERFLOW:
+            heal("queue_overflow", depths, brain_loop)
 
 # ===================== CONTROL =====================
 
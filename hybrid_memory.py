@@ -2,107 +2,46 @@
 """
 Hybrid Memory System for JARVIS
 --------------------------------
-• Keyword search (fast recall)
-• Semantic vector reranking (deep relevance)
-• Lazy-loaded embedding model
+• Keyword search (fast recall: BM25, prefix-matched)
+• Semantic recall through memory_manager's ANN index
+• Semantic reranking with the embeddings already in the store
+  (nothing is re-encoded per query)
 • Thread-safe
 • Restart-safe
 • Memory-bounded
 • Silent-failure (NEVER crashes brain)
 """
 
+import memory_manager
 from memory_manager import search as keyword_search
-from memory_manager import get_embedding_model
-import threading
 
 # ===================== GLOBALS =====================
 
-_model = None
-_model_lock = threading.Lock()
-
-_embedding_cache = {}          # text -> embedding tensor
-_embedding_cache_lock = threading.Lock()
-
 MAX_VECTOR_CANDIDATES = 30     # hard safety cap per query
-MAX_EMBED_CACHE_SIZE = 500     # prevents unbounded RAM growth
-
-
-# ===================== MODEL LOADER =====================
-
-def get_model():
-    """
-    Lazy-loads the sentence transformer.
-    Safe for:
-    - multiple threads
-    - restarts
-    - healing arbiter resets
-    """
-    global _model
-    if _model is None:
-        with _model_lock:
-            if _model is None:
-                _model = SentenceTransformer("all-MiniLM-L6-v2")
-    return _model
 
 
 # ===================== VECTOR SEARCH =====================
 
-def vector_search(query: str, memories: list, limit: int = 5) -> list:
+def vector_search(query: str, memories: list = None, limit: int = 5, query_vec=None) -> list:
     """
-    Semantic reranking of keyword hits.
+    Semantic ranking. With `memories`, reranks those (keyword hits);
+    without, returns the nearest memories from the whole store.
     NEVER raises exceptions.
     """
-    if not memories:
-        return []
-
     try:
-        model = get_embedding_model()
-
         # Normalize query
         query = query.strip().lower()
         if not query:
             return []
 
-        # Hard cap to avoid overload
-        memories = memories[:MAX_VECTOR_CANDIDATES]
+        if query_vec is None:
+            query_vec = memory_manager.embed(query)
 
-        # Encode query
-        query_emb = model.encode(query, convert_to_tensor=True)
+        if memories is None:
+            return memory_manager.nearest(query_vec, limit)
 
-        mem_embs = []
-        valid_memories = []
-
-        with _embedding_cache_lock:
-            for m in memories:
-                text = m.get("text")
-                if not text:
-                    continue
-
-                # Cache embeddings
-                if text not in _embedding_cache:
-                    _embedding_cache[text] = model.encode(
-                        text, convert_to_tensor=True
-                    )
-
-                    # Cache size guard
-                    if len(_embedding_cache) > MAX_EMBED_CACHE_SIZE:
-                        _embedding_cache.pop(next(iter(_embedding_cache)))
-
-                mem_embs.append(_embedding_cache[text])
-                valid_memories.append(m)
-
-        if not mem_embs:
-            return []
-
-        scores = util.cos_sim(query_emb, mem_embs)[0]
-
-        ranked = sorted(
-            zip(valid_memories, scores),
-            key=lambda x: float(x[1]),
-            reverse=True
-        )
-
-        return [m for m, _ in ranked[:limit]]
+        # Hard cap to avoid overload
+        return memory_manager.rerank(query_vec, memories[:MAX_VECTOR_CANDIDATES], limit)
 
     except Exception:
         # 🔥 Absolute rule: hybrid memory must NEVER crash JARVIS
@@ -114,8 +53,8 @@ def vector_search(query: str, memories: list, limit: int = 5) -> list:
 def hybrid_memory_search(query: str, limit: int = 5) -> list:
     """
     Full hybrid retrieval pipeline:
-    1. Keyword recall
-    2. Semantic rerank
+    1. Keyword + semantic (ANN) recall
+    2. Semantic rerank of the keyword hits
     3. Deduplication
     4. Safe bounded output
 
@@ -126,20 +65,22 @@ def hybrid_memory_search(query: str, limit: int = 5) -> list:
         if not query:
             return []
 
-        # Step 1: keyword recall
-        keyword_hits = keyword_search(query, limit=limit * 2)
+        # Step 1: keyword + semantic recall
+        keyword_hits = keyword_search(query, limit=limit * 2, prefix=True)
+        query_vec = memory_manager.embed(query)
+        semantic_hits = vector_search(query, None, limit, query_vec=query_vec)
 
-        if not keyword_hits:
+        if not keyword_hits and not semantic_hits:
             return []
 
-        # Step 2: semantic rerank
-        vector_hits = vector_search(query, keyword_hits, limit)
+        # Step 2: semantic rerank of the keyword hits
+        vector_hits = vector_search(query, keyword_hits, limit, query_vec=query_vec)
 
-        # Step 3: deduplicate
+        # Step 3: deduplicate (reranked first, then whatever recall found)
         seen = set()
         final = []
 
-        for m in keyword_hits + vector_hits:
+        for m in vector_hits + keyword_hits + semantic_hits:
             text = m.get("text")
             if not text or text in seen:
                 continue
@@ -0,0 +1,205 @@
+# intent_dispatcher.py
+"""
+Compiled Intent Dispatcher for JARVIS
+-------------------------------------
+• Fast commands are registered as intents with one or more phrases
+• All phrases compile into a single Aho-Corasick automaton over word
+  tokens, so matching is one pass over the query however many intents
+  exist
+• Word-boundary matching by construction: "screen" never fires on
+  "screenplay"
+• A phrase ending in "$" only matches at the end of the query
+  ("what time is it$" does not fire on "what time is it in Tokyo")
+• Handler priorities decide between overlapping matches
+• Per-intent hit counters
+• Thread-safe (registration recompiles lazily; lookups never block
+  each other)
+"""
+
+import re
+import threading
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+_END = "$"                  # end-of-query token; tokenize() never yields it
+
+
+def tokenize(text: str) -> list:
+    """
+    Lowercased word tokens. Apostrophes stay inside words, so "what's"
+    is one token.
+    """
+    return _TOKEN_RE.findall(text.lower())
+
+
+class Intent:
+    __slots__ = ("name", "patterns", "handler", "priority", "hits")
+
+    def __init__(self, name: str, patterns: tuple, handler, priority: int):
+        self.name = name
+        self.patterns = patterns
+        self.handler = handler
+        self.priority = priority
+        self.hits = 0
+
+    def __repr__(self):
+        return f"Intent({self.name!r}, priority={self.priority})"
+
+
+class _Node:
+    __slots__ = ("next", "fail", "out")
+
+    def __init__(self):
+        self.next = {}
+        self.fail = None
+        self.out = ()      # (intent, pattern_length) ending here, fail chain included
+
+
+class IntentDispatcher:
+    """
+        intents = IntentDispatcher()
+
+        @intents.register("time", ["what time", "current time"])
+        def tell_time(query):
+            return "It is noon."
+
+        intents.dispatch("what time is it")   # -> (intent, "It is noon.")
+        intents.dispatch("the screenplay")    # -> None
+
+        intents.register("date", ["what's the date$"], ...)   # whole-query ending only
+
+    Among overlapping matches the highest priority wins, then the longest
+    phrase, then the earliest one in the query.
+    """
+
+    def __init__(self):
+        self._intents = {}
+        self._lock = threading.Lock()
+        self._root = None
+        self.lookups = 0
+        self.misses = 0
+
+    # ===================== REGISTRY =====================
+
+    def register(self, name: str, patterns, handler=None, priority: int = 0):
+        """
+        Adds (or replaces) an intent. Without a handler, returns a
+        decorator.
+        """
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        compiled = tuple(self._pattern(p) for p in patterns)
+        if not compiled or not all(p and p[0] != _END for p in compiled):
+            raise ValueError(f"Intent {name!r} needs non-empty patterns")
+
+        def add(fn):
+            with self._lock:
+                self._intents[name] = Intent(name, compiled, fn, priority)
+                self._root = None
+            return fn
+
+        if handler is None:
+            return add
+        add(handler)
+        return handler
+
+    @staticmethod
+    def _pattern(phrase: str) -> tuple:
+        tokens = tuple(tokenize(phrase))
+        return tokens + (_END,) if phrase.rstrip().endswith(_END) else tokens
+
+    def unregister(self, name: str) -> bool:
+        with self._lock:
+            if self._intents.pop(name, None) is None:
+                return False
+            self._root = None
+            return True
+
+    def names(self) -> list:
+        with self._lock:
+            return list(self._intents)
+
+    # ===================== LOOKUP =====================
+
+    def match(self, text: str):
+        """
+        Best intent for `text`, or None. Counts a hit on the winner.
+        """
+        root = self._root or self._compile()
+        node = root
+        best = None
+        best_key = None
+
+        # The end token lets "...$" phrases complete on the last word only
+        for position, token in enumerate(tokenize(text) + [_END]):
+            while node is not root and token not in node.next:
+                node = node.fail
+            node = node.next.get(token, root)
+
+            for intent, length in node.out:
+                key = (intent.priority, length, -(position - length))
+                if best_key is None or key > best_key:
+                    best, best_key = intent, key
+
+        with self._lock:
+            self.lookups += 1
+            if best is None:
+                self.misses += 1
+            else:
+                best.hits += 1
+        return best
+
+    def dispatch(self, text: str, *args, **kwargs):
+        """
+        Matches `text` and runs the winning handler as
+        handler(text, *args, **kwargs). Returns (intent, result), or None
+        when nothing matched.
+        """
+        intent = self.match(text)
+        if intent is None:
+            return None
+        return intent, intent.handler(text, *args, **kwargs)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "lookups": self.lookups,
+                "misses": self.misses,
+                "hits": {name: i.hits for name, i in self._intents.items()}
+            }
+
+    # ===================== COMPILER =====================
+
+    def _compile(self) -> _Node:
+        with self._lock:
+            if self._root is not None:
+                return self._root
+
+            root = _Node()
+            for intent in self._intents.values():
+                for pattern in intent.patterns:
+                    node = root
+                    for token in pattern:
+                        node = node.next.setdefault(token, _Node())
+                    node.out += ((intent, len(pattern)),)
+
+            # Breadth-first failure links; outputs inherit along them
+            root.fail = root
+            frontier = list(root.next.values())
+            for child in frontier:
+                child.fail = root
+            while frontier:
+                level = []
+                for node in frontier:
+                    for token, child in node.next.items():
+                        fail = node.fail
+                        while fail is not root and token not in fail.next:
+                            fail = fail.fail
+                        child.fail = fail.next.get(token, root)
+                        if child.fail is child:
+                            child.fail = root
+                        child.out += child.fail.out
+                        level.append(child)
+                frontier = level
+
+            self._root = root
+            return root
@@ -0,0 +1,279 @@
+# latency_trace.py
+"""
+Per-Turn Latency Tracing for JARVIS
+-----------------------------------
+• Every command gets a request ID and a timing record
+• Marks are seconds since the command was queued (first / last wins)
+• Spans time individual stages (memory retrieval, prompt build)
+• A record is committed once the turn is done AND its speech has played
+• Ring buffer for live stats + rolling JSONL log on disk
+• p50 / p95 / p99 aggregates on demand (also: python latency_trace.py)
+• Thread-safe
+"""
+
+import sys
+import json
+import time
+import uuid
+import threading
+import contextvars
+from pathlib import Path
+from collections import deque
+from contextlib import contextmanager
+
+# ===================== CONFIG =====================
+
+RING_SIZE = 500                   # records kept in memory
+LOG_MAX_BYTES = 5 * 1024 * 1024   # JSONL rolls over to .1 past this size
+PERCENTILES = (50, 95, 99)
+
+# Stage order used for reports
+FIELDS = (
+    "queue_wait",
+    "context_gather",
+    "memory_retrieval",
+    "prompt_build",
+    "llm_connect",
+    "first_token",
+    "last_token",
+    "tokens_per_sec",
+    "first_speak",
+    "first_audio",
+    "playback_end",
+    "cancel_latency"
+)
+
+# Trace of the turn running on this thread or asyncio task
+_current = contextvars.ContextVar("turn_trace", default=None)
+
+
+def _percentile(values, pct: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+# ===================== TRACE =====================
+
+class TurnTrace:
+    """
+    Timing record for one command.
+
+        trace = tracer.begin("ui", query, enqueued_at)
+        with trace.span("memory_retrieval"): ...
+        trace.mark("first_token")                 # first call wins
+        trace.mark("last_token", overwrite=True)  # last call wins
+        trace.close()
+    """
+
+    def __init__(self, tracer, source: str, query: str, enqueued_at: float = None):
+        self._tracer = tracer
+        self._lock = threading.Lock()
+        self._pending_speech = 0
+        self._closed = False
+        self._committed = False
+
+        now = time.perf_counter()
+        self.start = enqueued_at if enqueued_at is not None else now
+        self.request_id = uuid.uuid4().hex[:12]
+        self.record = {
+            "request_id": self.request_id,
+            "time": time.time(),
+            "source": source,
+            "query": query[:120],
+            "queue_wait": round(now - self.start, 4)
+        }
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def mark(self, name: str, overwrite: bool = False):
+        value = round(self.elapsed(), 4)
+        with self._lock:
+            if overwrite or name not in self.record:
+                self.record[name] = value
+
+    def set(self, name: str, value):
+        with self._lock:
+            self.record[name] = value
+
+    @contextmanager
+    def span(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.set(name, round(time.perf_counter() - started, 4))
+
+    # ----- LLM -----
+
+    def llm_started(self):
+        self.mark("llm_start")
+
+    def llm_finished(self, result):
+        """
+        Folds a groq_client.ChatResult into the record. Connect time is
+        placed on the turn timeline relative to when the call started.
+        """
+        if result is None:
+            return
+        timings = result.timings or {}
+        with self._lock:
+            start = self.record.get("llm_start")
+            if start is not None and timings.get("connect") is not None:
+                self.record.setdefault("llm_connect", round(start + timings["connect"], 4))
+            self.record.setdefault("model", result.model)
+            if result.hedge:
+                self.record["hedge"] = result.hedge
+
+    def tokens(self, count: int):
+        with self._lock:
+            self.record["tokens"] = count
+            first = self.record.get("first_token")
+            last = self.record.get("last_token")
+            if count > 1 and first is not None and last is not None and last > first:
+                self.record["tokens_per_sec"] = round((count - 1) / (last - first), 1)
+
+    # ----- speech -----
+
+    def speech_queued(self):
+        self.mark("first_speak")
+        with self._lock:
+            self._pending_speech += 1
+
+    def audio_started(self):
+        self.mark("first_audio")
+
+    def speech_done(self):
+        self.mark("playback_end", overwrite=True)
+        with self._lock:
+            self._pending_speech -= 1
+            ready = self._closed and self._pending_speech <= 0
+        if ready:
+            self._commit()
+
+    # ----- lifecycle -----
+
+    def close(self, outcome: str = "ok"):
+        """
+        Ends the brain side of the turn. The record is committed now, or
+        once the last queued utterance finishes playing.
+        """
+        with self._lock:
+            self.record.setdefault("outcome", outcome)
+            self.record["turn_end"] = round(self.elapsed(), 4)
+            self._closed = True
+            ready = self._pending_speech <= 0
+        if _current.get() is self:
+            _current.set(None)
+        if ready:
+            self._commit()
+
+    def _commit(self):
+        with self._lock:
+            if self._committed:
+                return
+            self._committed = True
+            record = dict(self.record)
+        self._tracer._commit(record)
+
+
+# ===================== TRACER =====================
+
+class LatencyTracer:
+    """
+    Collects committed TurnTrace records.
+
+        tracer = LatencyTracer(path)
+        trace = tracer.begin(source, query, enqueued_at)
+        ...
+        tracer.summary()   # {field: {"count", "p50", "p95", "p99"}}
+    """
+
+    def __init__(self, path=None, ring_size: int = RING_SIZE, max_bytes: int = LOG_MAX_BYTES):
+        self.path = Path(path) if path else None
+        self.max_bytes = max_bytes
+        self._records = deque(maxlen=ring_size)
+        self._lock = threading.Lock()
+
+    def begin(self, source: str, query: str, enqueued_at: float = None) -> TurnTrace:
+        trace = TurnTrace(self, source, query, enqueued_at)
+        _current.set(trace)
+        return trace
+
+    def current(self):
+        """
+        The trace begun on this thread or task, if any.
+        """
+        trace = _current.get()
+        return trace if trace is not None and trace._tracer is self else None
+
+    def recent(self, limit: int = 20) -> list:
+        with self._lock:
+            return list(self._records)[-limit:]
+
+    def summary(self, fields=FIELDS) -> dict:
+        with self._lock:
+            records = list(self._records)
+        return summarize(records, fields)
+
+    def _commit(self, record: dict):
+        with self._lock:
+            self._records.append(record)
+            if self.path:
+                try:
+                    self._append(record)
+                except OSError as e:
+                    print("⚠️ Latency log write failed:", e)
+
+    def _append(self, record: dict):
+        try:
+            if self.path.stat().st_size > self.max_bytes:
+                self.path.replace(self.path.with_name(self.path.name + ".1"))
+        except FileNotFoundError:
+            pass
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+# ===================== AGGREGATES =====================
+
+def summarize(records, fields=FIELDS) -> dict:
+    stats = {}
+    for name in fields:
+        values = [r[name] for r in records if isinstance(r.get(name), (int, float))]
+        if values:
+            stats[name] = {"count": len(values)}
+            for pct in PERCENTILES:
+                stats[name][f"p{pct}"] = _percentile(values, pct)
+    return stats
+
+
+def format_summary(stats: dict) -> str:
+    lines = [f"{'stage':<18}{'n':>6}" + "".join(f"{'p' + str(p):>10}" for p in PERCENTILES)]
+    for name, s in stats.items():
+        lines.append(
+            f"{name:<18}{s['count']:>6}"
+            + "".join(f"{s['p' + str(p)]:>10.3f}" for p in PERCENTILES)
+        )
+    return "\n".join(lines)
+
+
+def load_records(path) -> list:
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+if __name__ == "__main__":
+    from config import Config
+
+    path = sys.argv[1] if len(sys.argv) > 1 else Config.LATENCY_LOG_FILE
+    print(format_summary(summarize(load_records(path))))
@@ -5,9 +5,12 @@ import queue
 import threading
 import asyncio
 import datetime
-import requests
 import signal
 import sys
+import uuid
+import inspect
+import functools
+import contextvars
 
 from config import Config
 from pydub import AudioSegment
@@ -16,29 +19,37 @@ import edge_tts
 
 import vision_module
 from brain_manager import BrainManager
+import brain_session
 import healing_arbiter
 import memory_manager
 from hybrid_memory import hybrid_memory_search
 import tool_manager
+import groq_transport
+import groq_client
+import response_cache
+import semantic_cache
+from single_flight import SingleFlight
+import prompt_builder
+import rate_limiter
+import model_router
+import latency_trace
+import summarizer
+import command_bus
+import cancellation
+import intent_dispatcher
+import core_loop
+import context_gather
+import ui_stream
 import certifi
 
-from concurrent.futures import ThreadPoolExecutor
-tts_executor = ThreadPoolExecutor(max_workers=1)
 
 os.environ["SSL_CERT_FILE"] = certifi.where()
 Config.validate()
 # ===================== GLOBAL STATE =====================
 print("GROQ KEY LOADED:", bool(Config.GROQ_API_KEY))
 STATE_FILE = "jarvis_state.json"
-pending_tool_confirmation = {
-    "active": False,
-    "tool_name": None,
-    "tool_payload": None,
-    "timestamp": 0
-}
 
 # ===================== TOOL CONFIRMATION =====================
-tool_confirm_lock = threading.Lock()
 TOOL_CONFIRM_TIMEOUT = 10  # seconds
 
 if os.name == "nt":
@@ -52,18 +63,23 @@ ENABLE_UI = os.environ.get("JARVIS_UI") == "1"
 
 shutdown_event = threading.Event()
 
-conversation_history = []
-conversation_summary = ""
+# Summary restored from STATE_FILE; the first session created continues it
+saved_summary = ""
 
 MAX_CONTEXT_TURNS = 4
-SUMMARY_TRIGGER_TURNS = 8
+BRAIN_WORKERS = Config.BRAIN_WORKERS
 
-command_queue = queue.Queue(maxsize=30)   # (source, text)
+# Per-turn timing records: ring buffer + rolling JSONL
+_tracer = latency_trace.LatencyTracer(Config.LATENCY_LOG_FILE)
 
-stream_queue = queue.Queue(maxsize=200)
+stream_queue = queue.Queue()   # unbounded: producers on the core loop must never block
+
+# UI output per session (the default session writes to stream_queue);
+# a turn's replies go to the queue of the session it belongs to
+_ui_queues = {}
+_ui_queues_lock = threading.Lock()
+_ui_output = contextvars.ContextVar("ui_output", default=None)
 
-speech_finished = threading.Event()
-speech_finished.set() # Start in a ready state
 conversation_trace = []
 brain_lock = threading.Lock()
 if len(conversation_trace) > 5000:
@@ -85,11 +101,17 @@ CONTROL_WORDS = {
     "stop", "pause", "cancel",
     "exit", "shutdown", "restart"
 }
+
+# Corrections that mark the previous cached answer as a false hit
+FALSE_HIT_PHRASES = (
+    "that's wrong", "that is wrong", "that's not right",
+    "not what i asked", "wrong answer", "try again"
+)
 if os.path.exists(STATE_FILE):
     try:
         with open(STATE_FILE, "r") as f:
             data = json.load(f)
-            conversation_summary = data.get("summary", "")
+            saved_summary = data.get("summary", "")
             conversation_trace = data.get("trace", [])
     except Exception:
         conversation_trace = []
@@ -133,6 +155,91 @@ def is_meaningful_input(text: str) -> bool:
 
     return True
 
+# ===================== COMMAND BUS =====================
+
+INTERRUPT_COMMANDS = {"stop", "jarvis stop"}
+CONFIRM_WORDS = {"yes", "yeah", "yep", "confirm", "no", "cancel", "stop"}
+
+def command_priority(text: str, session=None) -> int:
+    text = text.lower().strip()
+    if text in CONTROL_WORDS or text in INTERRUPT_COMMANDS:
+        return command_bus.CONTROL
+    if session and session.confirmation_pending and text in CONFIRM_WORDS:
+        return command_bus.CONFIRM
+    return command_bus.QUERY
+
+def _barge_in(command):
+    """
+    A control word or confirmation cancels its session's running turn
+    right away: the HTTP stream is closed, queued speech dropped and
+    the worker freed.
+    """
+    session_id = command.session.id if command.session else None
+    if cancellation.cancel_active(f"{command.source}: {command.text}", session_id):
+        print(f"✋ Barge-in: {command.text!r}")
+
+def _new_bus():
+    # Control words and confirmations jump the line (and barge in); junk,
+    # duplicate and stale questions are dropped on arrival.
+    return command_bus.CommandBus(
+        command_priority,
+        accept_fn=is_meaningful_input,
+        flush_words=INTERRUPT_COMMANDS | {"cancel"},
+        on_priority=_barge_in
+    )
+
+def _new_session(session_id):
+    # Summaries are folded in the background; a turn only hands over
+    # evicted turns and reads the latest completed summary plus the
+    # turns still waiting to be folded.
+    global saved_summary
+    initial, saved_summary = saved_summary, ""
+    return brain_session.Session(
+        session_id,
+        summarizer.IncrementalSummarizer(summarize_conversation, initial=initial)
+    )
+
+# One bus per brain worker; each session is pinned to a worker so its
+# turns stay ordered while other sessions run in parallel.
+command_queue = brain_session.SessionRouter(_new_bus, _new_session, workers=BRAIN_WORKERS)
+BrainManager.workers = BRAIN_WORKERS
+
+def submit_command(source: str, text: str, session_id: str = None) -> bool:
+    return command_queue.put(source, text, session_id)
+
+def default_session():
+    return command_queue.session(brain_session.DEFAULT_SESSION)
+
+def ui_queue(session_id: str = None) -> queue.Queue:
+    """
+    Output queue a UI page reads for its session.
+    """
+    if not session_id or session_id == brain_session.DEFAULT_SESSION:
+        return stream_queue
+    with _ui_queues_lock:
+        return _ui_queues.setdefault(session_id, queue.Queue())
+
+def end_session(session_id: str) -> bool:
+    """
+    A UI page closed: drops its session (stopping its summarizer) and
+    its output queue.
+    """
+    with _ui_queues_lock:
+        _ui_queues.pop(session_id, None)
+    return command_queue.drop(session_id)
+
+def _ui_out() -> queue.Queue:
+    return _ui_output.get() or stream_queue
+
+def latest_summary() -> str:
+    """
+    Summary of the most recently active conversation, for STATE_FILE.
+    """
+    sessions = command_queue.sessions()
+    if not sessions:
+        return saved_summary
+    return max(sessions, key=lambda s: s.last_active).summary
+
 
 def extract_entity_anchor(reply: str) -> str | None:
     """
@@ -145,21 +252,23 @@ def extract_entity_anchor(reply: str) -> str | None:
             return reply.split(k)[0].strip()
     return None
 
-# ===================== TTS LOOP =====================
-
-tts_loop = asyncio.new_event_loop()
-
-def start_tts_loop():
-    asyncio.set_event_loop(tts_loop)
-    tts_loop.run_forever()
-
-threading.Thread(target=start_tts_loop, daemon=True).start()
+# ===================== SPEECH =====================
+# Utterances play in order from one task on the core loop. Synthesis is
+# awaited there; decoding and playback waits run on the audio executor.
 
 speech_lock = threading.Lock()
 audio_playback = None
 
-import uuid
-async def _speak_async(text: str):
+_speech_queue = asyncio.Queue()
+_speech_idle = asyncio.Event()      # set when nothing is queued or playing
+_speech_idle.set()
+_speech_worker = None
+
+def _decode_speech(mp3, wav):
+    AudioSegment.from_mp3(mp3).export(wav, format="wav")
+    return sa.WaveObject.from_wave_file(wav)
+
+async def _speak_async(text: str, trace=None, cancel=None):
     global audio_playback
     mp3 = wav = None
 
@@ -173,21 +282,24 @@ async def _speak_async(text: str):
             voice="en-GB-RyanNeural"
         ).save(mp3)
 
-        sound = AudioSegment.from_mp3(mp3)
-        sound.export(wav, format="wav")
-
-        wave = sa.WaveObject.from_wave_file(wav)
+        wave = await core_loop.run_blocking("audio", _decode_speech, mp3, wav)
 
         with speech_lock:
-            audio_playback = wave.play()
+            if cancel and cancel.cancelled:
+                return
+            playback = audio_playback = wave.play()
+        if trace:
+            trace.audio_started()
+
+        await core_loop.run_blocking("audio", playback.wait_done)
 
-        audio_playback.wait_done()
+    except asyncio.CancelledError:
+        raise
 
     except Exception as e:
         print("TTS error:", repr(e))
 
     finally:
-        speech_finished.set()
         for f in (mp3, wav):
             try:
                 if f and os.path.exists(f):
@@ -195,31 +307,71 @@ async def _speak_async(text: str):
             except Exception:
                 pass
 
+async def _speech_loop():
+    while True:
+        text, trace, cancel = await _speech_queue.get()
+        try:
+            # Speech for a cancelled turn is dropped, queued or not
+            if shutdown_event.is_set() or (cancel and cancel.cancelled):
+                continue
+
+            task = asyncio.ensure_future(_speak_async(text, trace, cancel))
+            # Barge-in cancels synthesis; stop_speech() handles playback
+            remove = cancel.add_callback(lambda: core_loop.call_soon(task.cancel)) if cancel else None
+            await asyncio.wait([task])
+            if remove:
+                remove()
+        finally:
+            if trace:
+                trace.speech_done()
+            if _speech_queue.empty():
+                _speech_idle.set()
+
+def _queue_speech(item):
+    global _speech_worker
+    if _speech_worker is None or _speech_worker.done():
+        _speech_worker = asyncio.ensure_future(_speech_loop())
+    _speech_idle.clear()
+    _speech_queue.put_nowait(item)
+
 def speak(text: str):
+    """
+    Queues an utterance. Never blocks; safe from any thread or task.
+    """
     if shutdown_event.is_set():
         return
 
-    def run():
-        global audio_playback
-        speech_finished.clear()
+    cancel = cancellation.current()
+    if cancel and cancel.cancelled:
+        return
 
-        with speech_lock:
-            if audio_playback and audio_playback.is_playing():
-                audio_playback.stop()
-                audio_playback = None
+    trace = _tracer.current()
+    if trace:
+        trace.speech_queued()
+    core_loop.call_soon(_queue_speech, (text, trace, cancel))
 
-        asyncio.run_coroutine_threadsafe(_speak_async(text), tts_loop)
+def stop_speech():
+    """
+    Stops the current utterance. Safe from any thread.
+    """
+    global audio_playback
+    with speech_lock:
+        if audio_playback and audio_playback.is_playing():
+            audio_playback.stop()
+        audio_playback = None
 
-    tts_executor.submit(run)
+async def wait_speech_done(timeout: float):
+    try:
+        await asyncio.wait_for(_speech_idle.wait(), timeout)
+    except asyncio.TimeoutError:
+        print("⚠️ TTS timeout — force reset")
+        stop_speech()
 
 # ===================== GROQ =====================
 
-session = requests.Session()
-session.headers.update({
-    "Authorization": f"Bearer {Config.GROQ_API_KEY}"
-})
+# One pooled keep-alive transport shared with vision and the healing arbiter
+session = groq_transport.get_transport()
 
-session.verify = True
 FAST_MODEL = "llama-3.1-8b-instant"
 MID_MODEL = "llama-3.1-70b-instant"   # if available, else reuse 8b
 DEEP_MODEL = "llama-3.3-70b-versatile"
@@ -228,10 +380,125 @@ DEEP_MODEL = "llama-3.3-70b-versatile"
 if not MID_MODEL:
     MID_MODEL = FAST_MODEL
 
-# Optional in-memory cache (safe, simple, effective)
-_GROQ_CACHE = {}
-_GROQ_CACHE_MAX = 256
+# Persistent LRU + TTL reply cache (survives watchdog restarts)
+_groq_cache = response_cache.ResponseCache(Config.RESPONSE_CACHE_FILE)
+
+# Identical requests already in flight share one upstream call
+_in_flight = SingleFlight()
+
+# Proactive per-model limiter, kept in sync from x-ratelimit-* headers
+_rate_limiter = rate_limiter.RateLimiter()
+groq_client.add_listener(_rate_limiter.observe)
+
+RATE_LIMIT_MAX_WAIT = 1.5     # seconds a request may queue before downgrading
+RATE_LIMIT_MAX_QUEUE = 30     # hard cap when no cheaper model is left
+
+# Level -> model under current latency / rate-limit / availability
+_router = model_router.ModelRouter(
+    {"fast": FAST_MODEL, "mid": MID_MODEL, "deep": DEEP_MODEL},
+    limiter=_rate_limiter
+)
+groq_client.add_result_listener(_router.observe_result)
+
 
+def _estimate_tokens(payload) -> int:
+    return (
+        sum(prompt_builder.message_tokens(m) for m in payload["messages"])
+        + payload.get("max_tokens", 0)
+    )
+
+
+async def _admit(payload):
+    """
+    Runs the payload through the rate limiter before it is sent.
+    Queues briefly when its model is near its limits, otherwise
+    downgrades deep -> mid -> fast instead of waiting for a 429.
+    Returns the payload to send (model possibly replaced). The queue
+    wait is an asyncio sleep on the core loop, not a blocked thread.
+    """
+    est_tokens = _estimate_tokens(payload)
+    model = payload["model"]
+
+    while True:
+        wait = _rate_limiter.reserve(model, est_tokens, max_wait=RATE_LIMIT_MAX_WAIT)
+        if wait is not None:
+            break
+
+        lower = _router.fallback(model)
+        if not lower:
+            # Nothing cheaper left: queue on this model
+            wait = _rate_limiter.reserve(model, est_tokens)
+            break
+
+        _rate_limiter.record_downgrade()
+        print(f"⚠️ {model} near its rate limit, downgrading to {lower}")
+        model = lower
+
+    if wait:
+        await asyncio.sleep(min(wait, RATE_LIMIT_MAX_QUEUE))
+
+    if model != payload["model"]:
+        payload = dict(payload, model=model)
+    return payload
+
+
+async def _send(payload, timeout, on_token=None, hedge=False):
+    """
+    Admits and sends one completion. Hedged sends race a backup request
+    if no token arrives within the model's recent HEDGE_PERCENTILE TTFT.
+    """
+    payload = await _admit(payload)
+    if not hedge:
+        return await groq_client.acomplete(payload, timeout, on_token)
+
+    delay, backup = _router.hedge_plan(payload["model"], Config.HEDGE_PERCENTILE)
+    est_tokens = _estimate_tokens(payload)
+
+    def admit_backup():
+        # The backup is an extra request: it must fit the limiter right
+        # now, never queue, and its tokens are accounted like any other
+        return _rate_limiter.reserve(backup, est_tokens, max_wait=0) is not None
+
+    return await groq_client.ahedged(
+        payload,
+        timeout,
+        on_token,
+        hedge_after=delay,
+        backup_payload=dict(payload, model=backup),
+        admit_backup=admit_backup
+    )
+
+
+def _starter(payload, timeout, hedge=False):
+    """
+    SingleFlight start_fn: runs _send() on the core loop and returns
+    its concurrent.futures.Future.
+    """
+    return lambda on_token: core_loop.spawn(_send(payload, timeout, on_token, hedge))
+
+
+def _payload_key(payload):
+    """
+    Content hash of a completion payload (model, messages, params).
+    """
+    params = {k: v for k, v in payload.items() if k not in ("model", "messages")}
+    return response_cache.make_key(payload["model"], payload["messages"], **params)
+
+
+def _level_params(level, slo=None):
+    """
+    Returns (model, max_tokens, timeout) for a thinking level.
+    The model comes from the router and may be a cheaper fallback.
+    """
+    model = _router.route(level, slo)
+    if level == "deep":
+        return model, 500, 35
+    if level == "mid":
+        return model, 350, 20
+    return model, 200, 10
+
+
+GROQ_FALLBACK_REPLY = "I'm having trouble thinking right now."
 
 def groq(
     messages,
@@ -242,9 +509,11 @@ def groq(
     """
     Optimized Groq API caller with:
     - Dynamic model selection
-    - Smart rate-limit backoff
-    - Optional response caching
+    - Proactive rate limiting (queue or downgrade before sending)
+    - Optional persistent response caching
+    - Coalescing of identical in-flight requests
     - Backward compatibility
+    Blocking: for threads (summarizer, tests), never the core loop.
     """
 
     # -------------------------------
@@ -257,84 +526,40 @@ def groq(
         else:
             level = "fast"
 
-    if level == "deep":
-        model = DEEP_MODEL
-        max_tokens = 500
-        timeout = 35
-    elif level == "mid":
-        model = MID_MODEL
-        max_tokens = 350
-        timeout = 20
-    else:  # fast
-        model = FAST_MODEL 
-        max_tokens = 200
-        timeout = 10
+    model, max_tokens, timeout = _level_params(level)
 
     payload = {
         "model": model,
         "messages": messages,
         "max_tokens": max_tokens,
         "temperature": 0.7,
-        "stream": True
+        "stream": False
     }
 
     # -------------------------------
     # 🔹 CACHE KEY (SAFE & STABLE)
     # -------------------------------
-    cache_key = None
-    if use_cache:
-        try:
-            cache_key = json.dumps(
-                {
-                    "model": model,
-                    "messages": messages,
-                    "max_tokens": max_tokens
-                },
-                sort_keys=True
-            )
-            if cache_key in _GROQ_CACHE:
-                return _GROQ_CACHE[cache_key]
-        except Exception:
-            cache_key = None  # fallback safely
+    try:
+        request_key = _payload_key(payload)
+    except Exception:
+        request_key = None  # unhashable messages: no cache, no coalescing
+
+    cache_key = request_key if use_cache else None
+    if cache_key:
+        cached = _groq_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
     # -------------------------------
     # 🔹 REQUEST WITH SMART RETRIES
     # -------------------------------
     for attempt in range(3):
         try:
-            response = session.post(
-                "https://api.groq.com/openai/v1/chat/completions",
-                json=payload,
-                timeout=timeout
-            )
-
-            # ---------------------------
-            # RATE LIMIT HANDLING
-            # ---------------------------
-            if response.status_code == 429:
-                retry_after = int(
-                    response.headers.get("Retry-After", 2)
-                )
-                wait_time = retry_after + attempt
-                print(f"⚠️ Groq rate limited. Backing off {wait_time}s...")
-                time.sleep(wait_time)
-                continue
-
-            if response.status_code != 200:
-                print(
-                    f"❌ Groq API error (attempt {attempt + 1}):",
-                    response.status_code,
-                    response.text
-                )
-                time.sleep(1 + attempt)
-                continue
-
-            data = response.json()
-            content = (
-                data.get("choices", [{}])[0]
-                .get("message", {})
-                .get("content")
-            )
+            if request_key:
+                result = _in_flight.call(request_key, _starter(payload, timeout))
+            else:
+                result = _starter(payload, timeout)(None).result()
+            content = result.text
 
             if not content or not isinstance(content, str):
                 raise ValueError("Empty or invalid Groq response")
@@ -345,13 +570,34 @@ def groq(
             # CACHE STORE
             # ---------------------------
             if cache_key:
-                if len(_GROQ_CACHE) >= _GROQ_CACHE_MAX:
-                    _GROQ_CACHE.pop(next(iter(_GROQ_CACHE)))
-                _GROQ_CACHE[cache_key] = content
+                _groq_cache.put(cache_key, content)
 
             return content
 
-        except requests.exceptions.Timeout:
+        # ---------------------------
+        # RATE LIMIT HANDLING
+        # ---------------------------
+        except groq_client.CompletionError as e:
+            if not _router.is_available(payload["model"]):
+                # Model retired by the router (e.g. not found): re-route
+                payload = dict(payload, model=_router.route(level))
+                continue
+
+            if e.status_code == 429:
+                # The limiter already blocked this model for Retry-After;
+                # the next attempt queues or downgrades in _admit().
+                print(f"⚠️ Groq rate limited ({payload['model']}).")
+                continue
+
+            print(
+                f"❌ Groq API error (attempt {attempt + 1}):",
+                e.status_code,
+                e.body[:300]
+            )
+            time.sleep(1 + attempt)
+
+        except (TimeoutError, asyncio.TimeoutError):
+            # Distinct classes before Python 3.11
             print(f"⏳ Groq timeout (attempt {attempt + 1})")
             time.sleep(1 + attempt)
 
@@ -359,127 +605,181 @@ def groq(
             print(f"❌ Groq exception (attempt {attempt + 1}):", repr(e))
             time.sleep(1 + attempt)
 
-    return "I'm having trouble thinking right now."
+    return GROQ_FALLBACK_REPLY
 
-def groq_stream(
+async def groq_stream(
     messages,
-    level="fast"
+    level="fast",
+    slo=None,            # TTFT budget in seconds (default per level)
+    cancel=None          # CancelToken (default: this task's turn)
 ):
-    if level == "deep":
-        model = DEEP_MODEL
-        max_tokens = 500
-        timeout = 35
-    elif level == "mid":
-        model = MID_MODEL
-        max_tokens = 350
-        timeout = 20
-    else:
-        model = FAST_MODEL
-        max_tokens = 200
-        timeout = 10
-
-    payload = {
-        "model": model,
-        "messages": messages,
-        "max_tokens": max_tokens,
-        "temperature": 0.7,
-        "stream": True
-    }
-
-    with session.post(
-        "https://api.groq.com/openai/v1/chat/completions",
-        json=payload,
-        stream=True,
-        timeout=timeout
-    ) as response:
-
-        response.raise_for_status()
-
-        for line in response.iter_lines():
-            if not line:
-                continue
-
-            if line.startswith(b"data: "):
-                data = line[len(b"data: "):]
-
-                if data == b"[DONE]":
-                    break
-
+    """
+    Async generator of reply tokens as they arrive over SSE.
+    Identical concurrent calls attach to one upstream stream.
+    Fast replies are hedged against a slow first token.
+    Stops quietly, dropping the HTTP stream, when the turn is cancelled.
+    Raises groq_client.CompletionError on non-2xx replies.
+    """
+    hedge = level == "fast" and Config.HEDGE_FAST_PATH
+    trace = _tracer.current()
+    cancel = cancel or cancellation.current()
+
+    for attempt in range(2):
+        model, max_tokens, timeout = _level_params(level, slo)
+
+        payload = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": 0.7,
+            "stream": True
+        }
+
+        started = False
+        try:
+            start = _starter(payload, timeout, hedge)
+
+            if cancel and cancel.cancelled:
+                return
+            if trace:
+                trace.llm_started()
+            with _in_flight.stream(_payload_key(payload), start) as tokens:
+                # Barge-in closes the stream from the cancelling thread:
+                # iteration ends at once and the upstream request is
+                # dropped unless another caller still shares it.
+                remove = cancel.add_callback(tokens.close) if cancel else None
                 try:
-                    chunk = json.loads(data)
-                    delta = (
-                        chunk.get("choices", [{}])[0]
-                        .get("delta", {})
-                        .get("content")
-                    )
-
-                    if delta:
-                        yield delta
-
-                except Exception:
-                    continue
+                    async for token in tokens:
+                        started = True
+                        yield token
+                finally:
+                    if remove:
+                        remove()
+            if cancel and cancel.cancelled:
+                return
+            if trace:
+                trace.llm_finished(tokens.result)
+            return
+
+        except groq_client.CompletionError:
+            # A model the router just retired gets one silent re-route
+            if started or attempt or _router.is_available(model):
+                raise
+
+# ===================== SEMANTIC CACHE =====================
+
+# Rephrased questions ("who's india's president") are answered from prior
+# replies within the same conversation scope, before any LLM call.
+_semantic_cache = semantic_cache.SemanticCache(
+    memory_manager.embed,
+    threshold=Config.SEMANTIC_CACHE_THRESHOLD
+)
 
 ui_stream_queue = queue.Queue()
-def stream_and_speak(messages, level):
+async def stream_and_speak(messages, level, cache_query=None, cache_scope=0, cache_session=None):
     """
     Streams Groq response:
+    - Serves near-duplicate questions from the semantic cache
     - Sends tokens to UI immediately
     - Speaks sentence-by-sentence
-    - Returns full final text (for memory, tools, logs)
+    - Returns full final text (for memory, tools, logs),
+      or "" if the turn was cancelled mid-stream
     """
+    trace = _tracer.current()
+    cancel = cancellation.current()
+
+    if cache_query:
+        hit = await core_loop.run_blocking("embed", _semantic_cache.lookup, cache_query, cache_scope, cache_session)
+        if hit:
+            answer, _ = hit
+            if trace:
+                trace.set("cache", "semantic")
+                trace.mark("first_token")
+                trace.mark("last_token")
+            if ENABLE_UI:
+                out = _ui_out()
+                out.put(answer)
+                out.put(ui_stream.END)
+            speak(answer)
+            return answer
+
+    started = time.perf_counter()
     full_text = ""
     speech_buffer = ""
+    token_count = 0
 
-    for token in groq_stream(messages, level=level):
-
-        # Hard interrupt support
-        if shutdown_event.is_set():
-            break
-
-        full_text += token
-
-        # UI streaming
+    try:
+        async for token in groq_stream(messages, level=level, cancel=cancel):
+
+            # Hard interrupt support
+            if shutdown_event.is_set():
+                break
+
+            full_text += token
+            token_count += 1
+            if trace:
+                trace.mark("first_token")
+                trace.mark("last_token", overwrite=True)
+
+            # UI streaming
+            if ENABLE_UI:
+                _ui_out().put(token)
+
+            # Voice buffering
+            speech_buffer += token
+
+            # Speak only meaningful sentences
+            if (
+                any(p in speech_buffer for p in ".?!")
+                and len(speech_buffer.strip()) > 20
+            ):
+                speak(speech_buffer.strip())
+                speech_buffer = ""
+    finally:
+        # Signal UI end (a cancelled turn's task is unwound through here)
         if ENABLE_UI:
-            stream_queue.put(token)
+            _ui_out().put(ui_stream.END)
 
-        # Voice buffering
-        speech_buffer += token
+        if trace:
+            trace.tokens(token_count)
 
-        # Speak only meaningful sentences
-        if (
-            any(p in speech_buffer for p in ".?!")
-            and len(speech_buffer.strip()) > 20
-        ):
-            speak(speech_buffer.strip())
-            speech_buffer = ""
+    if cancel and cancel.cancelled:
+        return ""
 
     # Speak leftover text
     if speech_buffer.strip():
         speak(speech_buffer.strip())
 
-    # Signal UI end
-    if ENABLE_UI:
-        stream_queue.put("__END__")
+    reply = full_text.strip()
+    if cache_query and reply and not reply.startswith("{"):
+        # Embedding the answer happens off the turn's critical path
+        core_loop.submit("embed", functools.partial(
+            _semantic_cache.store,
+            cache_query,
+            reply,
+            cache_scope,
+            latency=time.perf_counter() - started
+        ))
 
-    return full_text.strip()
+    return reply
 
 # ===================== CONVERSATION SUMMARY =====================
 
-def summarize_conversation(history):
+def summarize_conversation(previous, turns):
+    """
+    Folds turns that left the context window into the previous summary.
+    Runs on the summarizer thread; returns "" on failure so the turns
+    are retried.
+    """
     try:
-        messages = [{
-            "role": "system",
-            "content": (
-                "Summarize the following conversation briefly. "
-                "Preserve facts, names, roles, and unresolved questions. "
-                "Write in third person."
-            )
-        }]
-        messages.extend(history)
-        
-        time.sleep(0.3)
-        summary = groq(messages, task="summary")
-        return summary.strip() if isinstance(summary, str) else ""
+        summary = groq(
+            summarizer.fold_messages(previous, turns),
+            task="summary",
+            use_cache=False
+        )
+        if not isinstance(summary, str) or summary == GROQ_FALLBACK_REPLY:
+            return ""
+        return summary.strip()
 
     except Exception:
         return ""
@@ -502,309 +802,382 @@ def should_store_fact(query: str, reply: str) -> bool:
 
 def stream_reply(text):
     """
-    Splits the final text into tokens to simulate a stream 
-    if the actual API stream wasn't used.
+    Hands a complete (non-LLM) reply to the UI in one step; the UI types
+    it out at its own pace, so the caller never waits on it.
+    """
+    ui_stream.hand_off(_ui_out(), text)
+
+def say(text):
+    """
+    Reply path for non-streamed text: hands it to the UI and to speech
+    and returns at once.
     """
-    for token in text.split(" "):
-        stream_queue.put(token + " ")
-        time.sleep(0.02)  # Simulates typing speed
-    stream_queue.put("__END__")
+    if ENABLE_UI:
+        stream_reply(text)
+    speak(text)
 
 def thinking_level(query: str) -> str:
-    q = query.lower()
+    """
+    Desired thinking level for a query. The concrete model is picked
+    later by the router from live latency and rate-limit conditions.
+    """
+    return _router.classify(query)
 
-    deep_keywords = {
-        "architecture", "design", "optimize", "debug deeply",
-        "step by step", "root cause", "full analysis"
-    }
+# ===================== TOOLS =====================
 
-    mid_keywords = {
-        "explain", "why", "how", "compare", "difference"
-    }
+async def run_tool(tool_name, tool_payload):
+    """
+    Runs a tool on the tools executor. If the turn is cancelled its task
+    stops waiting at once and the tool's result is discarded.
+    """
+    return await core_loop.run_blocking(
+        "tools",
+        functools.partial(tool_manager.ToolsManager.execute, tool_name, **tool_payload)
+    )
+
+# ===================== CONTEXT =====================
+
+async def gather_context(query, last_assistant):
+    """
+    Returns ({"memories", "entity", "level"}, timings, late) within
+    Config.CONTEXT_DEADLINE.
+    """
+    async def anchor():
+        if not last_assistant:
+            return None
+        return extract_entity_anchor(last_assistant["content"])
+
+    async def route():
+        return thinking_level(query)
+
+    return await context_gather.gather(
+        {
+            "memories": core_loop.run_blocking(
+                "embed", functools.partial(hybrid_memory_search, query, limit=5)
+            ),
+            "entity": anchor(),
+            "level": route()
+        },
+        deadline=Config.CONTEXT_DEADLINE,
+        defaults={"memories": [], "entity": None, "level": "fast"}
+    )
+
+def _warm_connection(trace=None):
+    """
+    Starts opening the LLM connection without waiting for it.
+    """
+    def done(task):
+        if task.cancelled() or task.exception() is not None:
+            return
+        if trace and task.result():
+            trace.set("llm_warm", round(task.result(), 4))
+
+    asyncio.ensure_future(groq_transport.get_transport().awarm()).add_done_callback(done)
+
+# ===================== FAST COMMANDS =====================
+# Handlers get the query and return the reply to speak (or None if they
+# reply on their own); coroutine handlers are awaited. Phrases match
+# whole words only.
+
+fast_commands = intent_dispatcher.IntentDispatcher()
+
+# Anchored ("$"): the query must end with the phrase, so "what is the
+# time complexity of quicksort" or "best time to visit japan" go to the LLM
+@fast_commands.register(
+    "time",
+    [
+        "what time is it$", "what's the time$", "what is the time$",
+        "tell me the time$", "current time$", "time please$"
+    ]
+)
+def _tell_time(query):
+    return datetime.datetime.now().strftime("The time is %I:%M %p")
+
+@fast_commands.register("memory_count", ["how many memories"])
+async def _memory_count(query):
+    # size() waits on the memory lock, which a batch write may be holding
+    count = await core_loop.run_blocking("tools", memory_manager.size)
+    return f"I remember {count} things."
+
+@fast_commands.register("latency_report", ["latency report"])
+def _latency_report(query):
+    stats = _tracer.summary()
+    print(latency_trace.format_summary(stats))
+    first_audio = stats.get("first_audio")
+    if not first_audio:
+        return "I have no latency data yet."
+    return (
+        f"Time to first audio is {first_audio['p50']:.1f} seconds typically, "
+        f"{first_audio['p95']:.1f} at the 95th percentile."
+    )
 
-    if any(k in q for k in deep_keywords) or len(q.split()) > 20:
-        return "deep"
+@fast_commands.register("clear_memory", ["clear your memory"], priority=5)
+async def _clear_memory(query):
+    # WAL append + fsync + compaction: off the core loop
+    await core_loop.run_blocking("tools", memory_manager.clear)
+    return "My memory has been cleared."
+
+@fast_commands.register("vision", ["screen", "screenshot"])
+def _analyze_screen(query):
+    def vision_task(q):
+        global _last_vision_time, last_heartbeat
+        with vision_lock:
+            now = time.time()
+            if now - _last_vision_time < VISION_COOLDOWN:
+                speak("Please wait before another screen analysis, sir.")
+                return
+            _last_vision_time = now
+
+        last_heartbeat = time.time()
+        reply = vision_module.get_vision_analysis(q, session)
+        if reply:
+            say(reply)
+
+    # Screenshot + OCR block for seconds: they get their own executor
+    core_loop.submit("ocr", vision_task, query)
+
+@fast_commands.register("wake", ["wake up", "wake jarvis"])
+def _wake(query):
+    return "Waking up, sir."
+
+async def _exit_with(reply, code, delay):
+    say(reply)
+    shutdown_event.set()
+    await asyncio.sleep(delay)
+    os._exit(code)
 
-    if any(k in q for k in mid_keywords):
-        return "mid"
+@fast_commands.register("shutdown", ["shut down", "shutdown jarvis"], priority=10)
+def _shutdown(query):
+    return _exit_with("Shutting down all systems. Goodbye, sir.", 0, 0.5)
 
-    return "fast"
+@fast_commands.register("restart", ["restart yourself"], priority=10)
+def _restart(query):
+    return _exit_with("Restarting systems now, sir.", 42, 0.3)   # Special restart exit code
 
 # ===================== HEARTBEAT =====================
 
-def heartbeat_loop():
+def heartbeat():
+    # Runs on the core loop, so a late beat means the loop itself stalled
     global last_heartbeat
-    while not shutdown_event.is_set():
-        last_heartbeat = time.time()
-        healing_arbiter.heartbeat()
-        time.sleep(1)
+    last_heartbeat = time.time()
+    healing_arbiter.heartbeat()
 
-threading.Thread(target=heartbeat_loop, daemon=True).start()
+core_loop.every(1, heartbeat, shutdown_event)
 
 # ===================== BRAIN =====================
 
-def brain_loop():
-    global conversation_summary
-    global last_heartbeat
-
-    print("\n=== JARVIS ONLINE ===\n")
+async def brain_loop(worker_id: int = 0):
+    """
+    One brain worker, run as a task on the core loop. Sleeps until this
+    worker's command bus has a command; the sessions routed here run one
+    turn at a time, in arrival order.
+    """
+    print(f"\n=== JARVIS ONLINE (worker {worker_id}) ===\n")
 
     while not shutdown_event.is_set() and not BrainManager.should_stop():
-        try:    
-            # Allow thinking while speaking
-            pass
+        command = await command_queue.aget(worker_id)
+        # Each turn is its own task so barge-in can cancel it without
+        # touching the worker
+        await asyncio.ensure_future(run_turn(command, worker_id))
 
-            try:
-                source, query = command_queue.get(timeout=0.2)
-                query = query.strip()
-                if not is_meaningful_input(query):
-                    continue
-            except queue.Empty:
-                continue
+async def run_turn(command, worker_id: int = 0):
+    global last_heartbeat
 
-            # ===================== STOP / INTERRUPT =====================
-            if query.strip() in {"stop", "jarvis stop"}:
-                with speech_lock:
-                    if audio_playback and audio_playback.is_playing():
-                        audio_playback.stop()
-                speech_finished.set()
-                continue
+    query = command.text
+    session = command.session or default_session()
+    session.turns += 1
+    session.last_active = time.time()
+
+    trace = _tracer.begin(command.source, query, command.enqueued_at)
+    trace.set("priority", command_bus.PRIORITY_NAMES[command.priority])
+    trace.set("session", session.id)
+    trace.set("worker", worker_id)
+    session.trace = trace
+    # This turn's task has its own context: replies reach this session's page
+    _ui_output.set(ui_queue(session.id))
+    cancel = cancellation.begin(session.id)
+    cancel.add_callback(stop_speech)
+    # Cancelling the token cancels this task wherever it is awaiting
+    task = asyncio.current_task()
+    cancel.add_callback(lambda: core_loop.call_soon(task.cancel))
 
-            # ===================== TOOL CONFIRMATION HANDLER =====================
-            with tool_confirm_lock:
-                if pending_tool_confirmation["active"]:
-                    elapsed = time.time() - pending_tool_confirmation["timestamp"]
-
-                    if elapsed > TOOL_CONFIRM_TIMEOUT:
-                        pending_tool_confirmation["active"] = False
-                        reply = "Confirmation timed out. Action cancelled."
-                        if ENABLE_UI:
-                            stream_reply(reply)
-                        speak(reply)
-                        continue
-
-                    if query in {"yes", "yeah", "yep", "confirm"}:
-                        tool_name = pending_tool_confirmation["tool_name"]
-                        tool_payload = pending_tool_confirmation["tool_payload"]
-                        pending_tool_confirmation["active"] = False
-
-                        result = tool_manager.ToolsManager.execute(tool_name, **tool_payload)
-                        reply = f"Done. {result}"
-
-                        if ENABLE_UI:
-                            stream_reply(reply)
-                        speak(reply)
-                        continue
-
-                    if query in {"no", "cancel", "stop"}:
-                        pending_tool_confirmation["active"] = False
-                        reply = "Alright, cancelled."
-                        if ENABLE_UI:
-                            stream_reply(reply)
-                        speak(reply)
-                        continue
-
-            # ===================== FAST COMMANDS =====================
-            if "time" in query:
-                reply = datetime.datetime.now().strftime("The time is %I:%M %p")
-                
-                if ENABLE_UI:
-                    stream_reply(reply)
-                speak(reply)
-                continue
+    try:
+        # ===================== STOP / INTERRUPT =====================
+        if query.lower() in INTERRUPT_COMMANDS:
+            stop_speech()
+            return
+
+        # ===================== TOOL CONFIRMATION HANDLER =====================
+        pending = session.pending_confirmation
+        answer = query.lower()
+        with session.confirm_lock:
+            confirmation = dict(pending) if pending["active"] else None
+            if confirmation:
+                expired = time.time() - pending["timestamp"] > TOOL_CONFIRM_TIMEOUT
+                if expired or answer in CONFIRM_WORDS:
+                    pending["active"] = False
+
+        if confirmation:
+            if expired:
+                say("Confirmation timed out. Action cancelled.")
+                return
+
+            if answer in {"yes", "yeah", "yep", "confirm"}:
+                result = await run_tool(confirmation["tool_name"], confirmation["tool_payload"])
+                say(f"Done. {result}")
+                return
+
+            if answer in {"no", "cancel", "stop"}:
+                say("Alright, cancelled.")
+                return
+
+        # ===================== FAST COMMANDS =====================
+        matched = fast_commands.dispatch(query)
+        if matched:
+            intent, reply = matched
+            trace.set("intent", intent.name)
+            if inspect.isawaitable(reply):
+                reply = await reply
+            if reply:
+                say(reply)
+            return
+
+        # ===================== SEMANTIC CACHE OVERRIDE =====================
+        if any(p in query for p in FALSE_HIT_PHRASES):
+            _semantic_cache.report_false_hit(session.id)
+
+        # ===================== CONVERSATION STATE (LOCKED) =====================
+        history = session.history
+        with session.lock:
+            if (
+                history
+                and history[-1]["role"] == "user"
+                and history[-1]["content"] == query
+            ):
+                return
+
+            history.append({"role": "user", "content": query})
+            log_turn("user", query)
+
+            # ===================== CONVERSATION SUMMARY =====================
+            # Turns leaving the context window are folded into the
+            # summary in the background; this turn never waits on it.
+            # Until a fold lands, its turns ride along as plain history.
+            session.evict(MAX_CONTEXT_TURNS)
+
+            last_assistant = next(
+                (m for m in reversed(history) if m["role"] == "assistant"),
+                None
+            )
+            summary, unfolded = session.snapshot()
+            prior_turns = unfolded + history[:-1]
+
+        # ===================== CONTEXT GATHERING =====================
+        # Memory retrieval, anchoring and routing run side by side while
+        # the LLM connection is opened; late memories are left out.
+        _warm_connection(trace)
+        context, timings, late = await gather_context(query, last_assistant)
+        memories, entity, level = context["memories"], context["entity"], context["level"]
+        trace.set("level", level)
+        trace.set("context_gather", timings["total"])
+        if "memories" in timings:
+            trace.set("memory_retrieval", timings["memories"])
+        if late:
+            trace.set("context_late", late)
+        print(context_gather.format_timings(timings, late))
+
+        # ===================== MESSAGE BUILD =====================
+        with trace.span("prompt_build"):
+            messages, prompt_report = prompt_builder.build_prompt(
+                query,
+                level,
+                summary=summary,
+                entity=entity,
+                memories=memories,
+                history=prior_turns
+            )
+        print(prompt_builder.format_report(prompt_report))
 
-            if "how many memories" in query:
-                reply = f"I remember {memory_manager.size()} things."
-                
-                if ENABLE_UI:
-                    stream_reply(reply)
-                speak(reply)
-                continue
+        # Not the entity anchor: it follows the previous reply, so a
+        # rephrase asked right after an answer would never share its scope.
+        # A follow-up is only answered from cache in the same live turns
+        recent = semantic_cache.turns_key(prior_turns) if semantic_cache.is_follow_up(query) else ""
+        cache_scope = semantic_cache.scope_fingerprint(summary, session.id, recent)
 
-            if "clear your memory" in query:
-                memory_manager.clear()
-                reply = "My memory has been cleared."
-                
-                if ENABLE_UI:
-                    stream_reply(reply)
-                speak(reply)
-                continue
+        # ===================== THINK =====================
+        last_heartbeat = time.time()
+        reply = await stream_and_speak(
+            messages,
+            level,
+            cache_query=query,
+            cache_scope=cache_scope,
+            cache_session=session.id
+        )
 
-            if "screen" in query:
-                def vision_task(q):
-                    global _last_vision_time, last_heartbeat
-                    with vision_lock:
-                        now = time.time()
-                        if now - _last_vision_time < VISION_COOLDOWN:
-                            speak("Please wait before another screen analysis, sir.")
-                            return
-                        _last_vision_time = now
-                    
-                    last_heartbeat = time.time()
-                    reply = vision_module.get_vision_analysis(q, session, Config.GROQ_API_KEY)
-                    if reply:
-                        if ENABLE_UI:
-                            stream_reply(reply)
-                        speak(reply)
-
-                threading.Thread(target=vision_task,args=(query,),daemon=True).start()
-                continue
-            
-            if "wake up" in query or "wake jarvis" in query:
-                    reply = "Waking up, sir."
-                    if ENABLE_UI:
-                        stream_reply(reply)
-                    speak(reply)
-                    continue
-            if "shut down" in query or "shutdown jarvis" in query:
-                reply = "Shutting down all systems. Goodbye, sir."
-                if ENABLE_UI:
-                    stream_reply(reply)
-                speak(reply)
-                shutdown_event.set()
-                time.sleep(0.5)
-                os._exit(0) 
-            if "restart yourself" in query:
-                reply = "Restarting systems now, sir."
-                if ENABLE_UI:
-                    stream_reply(reply)
-                speak(reply)
-                shutdown_event.set()
-                time.sleep(0.3)
-                os._exit(42) #Special Restart Exit Code
-
-            # ===================== CONVERSATION STATE (LOCKED) =====================
-            with brain_lock:
-                if (
-                    conversation_history
-                    and conversation_history[-1]["role"] == "user"
-                    and conversation_history[-1]["content"] == query
-                ):
-                    continue
-
-                conversation_history.append({"role": "user", "content": query})
-                log_turn("user", query)
-
-                # ===================== CONVERSATION SUMMARY =====================
-                user_turns = [m for m in conversation_history if m["role"] == "user"]
-                if len(user_turns) >= SUMMARY_TRIGGER_TURNS:
-                    summary = summarize_conversation(conversation_history)
-                    if summary:
-                        conversation_summary = summary
-                    
-                    last_user = conversation_history[-1]
-                    last_assistant = next(
-                        (m for m in reversed(conversation_history) if m["role"] == "assistant"),
-                        None
-                    )
-
-                    conversation_history.clear()
-                    if last_assistant:
-                        conversation_history.append(last_assistant)
-                    conversation_history.append(last_user)
-
-                conversation_history[:] = conversation_history[-MAX_CONTEXT_TURNS:]
-
-                # ===================== MESSAGE BUILD =====================
-                messages = []
-
-                if conversation_summary:
-                    messages.append({
-                        "role": "system",
-                        "content": f"Conversation summary so far:\n{conversation_summary}"
-                    })
+        tool_name, tool_payload = None, None
 
-                last_assistant = next(
-                    (m for m in reversed(conversation_history) if m["role"] == "assistant"),
-                    None
-                )
-                if last_assistant:
-                    entity = extract_entity_anchor(last_assistant["content"])
-                    if entity:
-                        messages.append({
-                            "role": "system",
-                            "content": f"The user is referring to: {entity}."
-                        })
-
-                messages.append({
-                    "role": "system",
-                    "content": (
-                        "Style rules:\n"
-                        "- Do NOT repeat full names once introduced.\n"
-                        "- Use pronouns for follow-ups.\n"
-                        "- Maintain conversational continuity."
-                    )
-                })
-
-                memories = hybrid_memory_search(query, limit=5)
-                if memories:
-                    messages.append({
-                        "role": "system",
-                        "content": "Relevant long-term memories:\n" +
-                                   "\n".join(f"- {m['text']}" for m in memories)
+        if isinstance(reply, str) and reply.strip().startswith("{"):
+            try:
+                tool_name, tool_payload = tool_manager.parse_tool_call(reply)
+            except Exception:
+                tool_name, tool_payload = None, None
+
+        if tool_name:
+            # 🔒 Require confirmation for dangerous tools
+            if tool_manager.requires_confirmation(tool_name):
+                with session.confirm_lock:
+                    pending.update({
+                        "active": True,
+                        "tool_name": tool_name,
+                        "tool_payload": tool_payload,
+                        "timestamp": time.time()
                     })
 
-                messages.append({"role": "user", "content": query})
+                say(f"Do you want me to {tool_name.replace('_', ' ')}? Yes or no.")
+                return
 
-            # ===================== THINK (NO LOCK) =====================
-            last_heartbeat = time.time()
-            level = thinking_level(query)
-            reply = stream_and_speak(messages, level)
+            # ✅ Safe tools execute immediately
+            tool_results = await run_tool(tool_name, tool_payload)
+            messages.append({"role": "assistant", "content": reply})
+            messages.append({"role": "tool", "content": str(tool_results)})
+            reply = await stream_and_speak(messages, level)
 
-            tool_name, tool_payload = None, None
+        if not reply:
+            return
 
-            if isinstance(reply, str) and reply.strip().startswith("{"):
-                try:
-                    tool_name, tool_payload = tool_manager.parse_tool_call(reply)
-                except Exception:
-                    tool_name, tool_payload = None, None
-
-            if tool_name:
-                # 🔒 Require confirmation for dangerous tools
-                if tool_manager.requires_confirmation(tool_name):
-                    with tool_confirm_lock:
-
-                        pending_tool_confirmation.update({
-                            "active": True,
-                            "tool_name": tool_name,
-                            "tool_payload": tool_payload,
-                            "timestamp": time.time()
-                        })
-
-                    confirm_msg = f"Do you want me to {tool_name.replace('_', ' ')}? Yes or no."
-                    if ENABLE_UI:
-                        stream_reply(confirm_msg)
-                    speak(confirm_msg)
-                    continue
-
-                # ✅ Safe tools execute immediately
-                tool_results = tool_manager.ToolsManager.execute(tool_name, **tool_payload)
-                messages.append({"role": "assistant", "content": reply})
-                messages.append({"role": "tool", "content": str(tool_results)})
-                reply = stream_and_speak(messages, level)
-
-            if not reply:
-                continue
+        # ===================== POST-THINK STATE =====================
+        with session.lock:
+            history.append({"role": "assistant", "content": reply})
+            log_turn("assistant", reply)
+
+        normalized = reply.lower().strip()
+        if should_store_fact(query, reply) and not await core_loop.run_blocking(
+            "embed", fact_already_known, normalized
+        ):
+            core_loop.submit("embed", functools.partial(memory_manager.add_memory, text=reply, tags=["fact"]))
 
-            # ===================== POST-THINK STATE =====================
-            with brain_lock:
-                conversation_history.append({"role": "assistant", "content": reply})
-                log_turn("assistant", reply)
+        await wait_speech_done(15)
 
-            normalized = reply.lower().strip()
-            if should_store_fact(query, reply) and not fact_already_known(normalized):
-                memory_manager.add_memory(text=reply, tags=["fact"])
+    except asyncio.CancelledError:
+        if not cancel.cancelled:
+            raise       # the worker itself is being stopped
 
-            
-            pass
-            
-            if not speech_finished.wait(timeout=15):
-                print("⚠️ TTS timeout — force reset")
-                speech_finished.set()
+    except cancellation.TurnCancelled:
+        pass
 
-        except Exception as e:
-            print("Brain error:", repr(e))
-            time.sleep(1)
+    except Exception as e:
+        print("Brain error:", repr(e))
+        trace.set("outcome", "error")
+        await asyncio.sleep(1)
+
+    finally:
+        latency = cancellation.end(cancel)
+        if latency is not None:
+            print(f"✋ Turn cancelled ({cancel.reason}) — brain free in {latency * 1000:.1f} ms")
+            trace.set("outcome", "cancelled")
+            trace.set("cancel_latency", round(latency, 4))
+        trace.close()
+        session.trace = None
 
 
 # ===================== TEST HOOK =====================
@@ -814,33 +1187,17 @@ def process_text_for_test(text: str):
     Deterministic, synchronous processing path for tests.
     Does NOT touch audio, threads, or queues.
     """
-    global conversation_summary
     with brain_lock:
         log_turn("user", text)
 
-    messages = []
-
-    # 1️⃣ Conversation summary
-    if conversation_summary:
-        messages.append({
-            "role": "system",
-            "content": f"Conversation summary so far:\n{conversation_summary}"
-        })
-
-    # 2️⃣ Hybrid memory
+    # Summary + hybrid memory + current query, packed to the fast budget
     memories = hybrid_memory_search(text, limit=5)
-    if memories:
-        messages.append({
-            "role": "system",
-            "content": "Relevant long-term memories:\n" +
-                       "\n".join(f"- {m['text']}" for m in memories)
-        })
-
-    # 4️⃣ Current user query
-    messages.append({
-        "role": "user",
-        "content": text
-    })
+    messages, _ = prompt_builder.build_prompt(
+        text,
+        "fast",
+        summary=default_session().summary,
+        memories=memories
+    )
 
     time.sleep(0.3)
     reply = groq(messages, use_cache=True)
@@ -872,7 +1229,7 @@ def shutdown_handler(sig=None, frame=None):
     tmp = STATE_FILE + ".tmp"
     with open(tmp, "w") as f:
         json.dump({
-            "summary": conversation_summary,
+            "summary": latest_summary(),
             "trace": conversation_trace[-200:]
         }, f)
     os.replace(tmp, STATE_FILE)
@@ -891,9 +1248,12 @@ if __name__ == "__main__":
         # Start watchdog in a daemon thread
         threading.Thread(target=watchdog_loop, daemon=True).start()
         
+        # Start the brain worker pool
+        BrainManager.start(brain_loop)
+
         # Start healing arbiter
         healing_arbiter.start(
-            queue_size_fn=lambda: command_queue.qsize(),
+            queue_size_fn=command_queue.depths,
             brain_loop=brain_loop
         )
         
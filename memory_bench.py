@@ -0,0 +1,262 @@
+# memory_bench.py
+"""
+Long-Term Memory Micro-Benchmark for JARVIS
+-------------------------------------------
+• Synthetic clustered embeddings (sentence embeddings cluster by topic;
+  uniform noise would be the ANN worst case)
+• Semantic search: exact matrix scan vs the IVF index at several corpus
+  sizes, with recall@k against exact and per-query latency
+• Index build time (k-means + assignment) per size
+• Persistence: legacy JSON (indent=2, decimal floats) vs the binary
+  snapshot (mapped float32 matrix + SQLite), save / load time and size,
+  and the cost of logging a batch of new memories to the WAL instead
+• Keyword search: the old newest-first substring scan vs BM25 over the
+  inverted index, on Zipf-distributed synthetic texts
+
+    python memory_bench.py                          # 10k, 100k
+    python memory_bench.py --sizes 10000 100000 1000000 --nprobe 8 16
+    python memory_bench.py --persist --sizes 500 5000 20000
+    python memory_bench.py --keyword --sizes 10000 100000
+"""
+
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+import ann_index
+import memory_snapshot
+import memory_wal
+from memory_store import MemoryStore
+
+DIM = 384                   # all-MiniLM-L6-v2
+WAL_BATCH = 64              # records per group commit in the persistence run
+TOPICS_PER_SQRT = 2         # clusters ~ 2 * sqrt(n)
+SPREAD = 1.5                # within-topic noise relative to the spread of topic centres
+VOCAB = 20_000              # distinct words in the keyword run
+WORDS_PER_MEMORY = 12
+
+
+# ===================== DATA =====================
+
+def clustered(n: int, dim: int = DIM, seed: int = 0, spread: float = SPREAD) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    topics = max(8, int(TOPICS_PER_SQRT * np.sqrt(n)))
+    centers = rng.standard_normal((topics, dim), dtype=np.float32)
+    vectors = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, 65536):
+        m = min(65536, n - start)
+        vectors[start:start + m] = centers[rng.integers(0, topics, m)]
+        vectors[start:start + m] += spread * rng.standard_normal((m, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def texts(n: int, seed: int = 0) -> list:
+    # Word frequencies follow Zipf's law, like natural text
+    rng = np.random.default_rng(seed)
+    ranks = np.arange(1, VOCAB + 1)
+    p = 1.0 / ranks
+    words = rng.choice(VOCAB, size=(n, WORDS_PER_MEMORY), p=p / p.sum())
+    return [" ".join(f"w{w}" for w in row) for row in words]
+
+
+def filled_store(vectors: np.ndarray) -> MemoryStore:
+    store = MemoryStore()
+    for i, vec in enumerate(vectors):
+        store.append(f"memory {i}", None, "bench", vec)
+    return store
+
+
+# ===================== RUN =====================
+
+def run(size: int, queries: int, k: int, nprobes, spread: float = SPREAD) -> dict:
+    # Queries come from the same topics but are not in the store
+    vectors = clustered(size + queries, spread=spread)
+    probe, vectors = vectors[:queries], vectors[queries:]
+    store = filled_store(vectors)
+
+    start = time.perf_counter()
+    ids, snapshot = store.index_snapshot()
+    index = ann_index.build(ids, snapshot)
+    store.install_index(index)
+    build = time.perf_counter() - start
+
+    def timed(exact):
+        out, best = [], []
+        for q in probe:
+            t = time.perf_counter()
+            out.append([row for row, _ in store.top_k(q, k, exact=exact)])
+            best.append(time.perf_counter() - t)
+        return out, float(np.median(best)) * 1000
+
+    truth, exact_ms = timed(True)
+    rows = {"size": size, "lists": index.nlist, "build_s": build, "exact_ms": exact_ms, "ann": []}
+
+    for nprobe in nprobes:
+        index.nprobe = nprobe
+        approx, ann_ms = timed(False)
+        recall = np.mean([len(set(a) & set(t)) / k for a, t in zip(approx, truth)])
+        rows["ann"].append({"nprobe": nprobe, "ms": ann_ms, "recall": float(recall)})
+    return rows
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - start
+
+
+def run_persist(size: int) -> dict:
+    vectors = clustered(size)
+    store = filled_store(vectors)
+    for row in range(size):
+        store.tags[row] = ["fact"]
+        store.times[row] = "2025-01-01T09:00:00.000000"
+    probe = vectors[0]
+    folder = Path(tempfile.mkdtemp(prefix="jarvis_memory_bench_"))
+
+    try:
+        legacy = folder / "memory.json"
+
+        def json_save():
+            with open(legacy, "w", encoding="utf-8") as f:
+                json.dump(store.records(with_embeddings=True), f, indent=2)
+
+        def json_load():
+            loaded = MemoryStore()
+            loaded.extend(memory_snapshot.read_json(legacy))
+            return loaded
+
+        _, json_save_s = _timed(json_save)
+        loaded, json_load_s = _timed(json_load)
+        _, json_query_s = _timed(lambda: loaded.top_k(probe, 5, exact=True))
+
+        db = folder / "memory.db"
+        _, snap_save_s = _timed(lambda: memory_snapshot.write_store(db, store))
+        loaded, snap_load_s = _timed(lambda: memory_snapshot.read(db))
+        _, snap_query_s = _timed(lambda: loaded.top_k(probe, 5, exact=True))
+
+        wal = memory_wal.MemoryWAL.open(folder / "memory", 0)
+
+        def wal_batch():
+            for row in range(WAL_BATCH):
+                wal.append(memory_wal.encode_add(store.texts[row], store.tags[row], store.times[row], vectors[row]))
+            wal.commit()
+
+        _, wal_s = _timed(wal_batch)
+        wal.close()
+
+        return {
+            "size": size,
+            "wal_batch_s": wal_s,
+            "json": (json_save_s, json_load_s, json_query_s, legacy.stat().st_size),
+            "snapshot": (
+                snap_save_s, snap_load_s, snap_query_s,
+                sum(p.stat().st_size for p in folder.glob("memory.*") if p != legacy)
+            )
+        }
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def run_keyword(size: int, queries: int, k: int) -> dict:
+    corpus = texts(size)
+    start = time.perf_counter()
+    store = MemoryStore()
+    for text in corpus:
+        store.append(text, None, "bench")
+    build = time.perf_counter() - start
+
+    # Two adjacent words from a stored memory: the substring scan can
+    # find these too
+    rng = np.random.default_rng(1)
+    probe = []
+    for row in rng.integers(0, size, queries):
+        words = corpus[row].split()
+        i = int(rng.integers(0, len(words) - 1))
+        probe.append(" ".join(words[i:i + 2]))
+    lowered = [t.lower() for t in corpus]
+
+    def substring(q):
+        hits = []
+        for row in range(len(lowered) - 1, -1, -1):
+            if q in lowered[row]:
+                hits.append(row)
+                if len(hits) >= k:
+                    break
+        return hits
+
+    def timed(fn):
+        best = []
+        for q in probe:
+            t = time.perf_counter()
+            fn(q)
+            best.append(time.perf_counter() - t)
+        return float(np.median(best)) * 1000, float(np.percentile(best, 99)) * 1000
+
+    return {
+        "size": size,
+        "build_s": build,
+        "terms": store.text_index.vocabulary,
+        "substring": timed(substring),
+        "bm25": timed(lambda q: store.keyword_search(q, k)),
+        "prefix": timed(lambda q: store.keyword_search(q[:-1], k, prefix=True))
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Long-term memory search benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, ann_index.DEFAULT_NPROBE, 24])
+    parser.add_argument("-q", "--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--spread", type=float, default=SPREAD, help="topic overlap; higher is harder")
+    parser.add_argument("--persist", action="store_true", help="benchmark save / load instead of search")
+    parser.add_argument("--keyword", action="store_true", help="benchmark keyword search instead")
+    args = parser.parse_args(argv)
+
+    if args.keyword:
+        print(f"🔎 keyword top-{args.k}, median / p99 latency over {args.queries} two-word queries")
+        for size in args.sizes:
+            r = run_keyword(size, args.queries, args.k)
+            print(f"  {size:>9,} memories  {r['terms']:>6} terms  store + index build {r['build_s']:6.2f}s")
+            for name in ("substring", "bm25", "prefix"):
+                median, p99 = r[name]
+                print(f"      {name:<9}  {median:8.3f} ms  p99 {p99:8.3f} ms")
+        return
+
+    if args.persist:
+        print("💾 save / load (+ first query, which pages the matrix in) / size on disk")
+        for size in args.sizes:
+            r = run_persist(size)
+            for name, (save_s, load_s, query_s, size_bytes) in (("json", r["json"]), ("snapshot", r["snapshot"])):
+                print(
+                    f"  {size:>9,} {name:<9} save {save_s * 1000:9.1f} ms  "
+                    f"load {load_s * 1000:9.1f} ms  first query {query_s * 1000:7.2f} ms  "
+                    f"{size_bytes / 1e6:8.2f} MB"
+                )
+            print(f"  {size:>9,} wal       {WAL_BATCH} new memories + 1 fsync {r['wal_batch_s'] * 1000:7.2f} ms")
+        return
+
+    print(
+        f"🧠 dim {DIM}, spread {args.spread}, recall@{args.k} vs exact, "
+        f"median latency over {args.queries} queries"
+    )
+    for size in args.sizes:
+        r = run(size, args.queries, args.k, args.nprobe, args.spread)
+        print(f"  {size:>9,} memories  {r['lists']:>4} lists  build {r['build_s']:6.2f}s  exact {r['exact_ms']:7.3f} ms")
+        for a in r["ann"]:
+            print(
+                f"      nprobe {a['nprobe']:>3}  {a['ms']:7.3f} ms  "
+                f"recall {a['recall']:.3f}  x{r['exact_ms'] / a['ms']:.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
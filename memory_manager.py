@@ -5,11 +5,23 @@ Long-term memory manager for JARVIS
 • Thread-safe
 • Async write queue
 • Embedding-backed
+• Columnar store: one float32 embedding matrix, no per-query rebuilds
+• Keyword search ranked by BM25 over an incrementally maintained
+  inverted index
+• IVF index for large stores, trained in the background and saved
+  next to the memory file
+• Binary snapshots: memory-mapped float32 embeddings + SQLite metadata
+  (legacy JSON migrated once)
+• Every add / clear is appended to a write-ahead log and made durable
+  by one fsync per worker batch; the log is folded into a new snapshot
+  once it grows, and replayed on load
+• The write worker survives errors: a failed add or fsync is logged
+  and retried with backoff
 • Crash-proof
 • 24/7 safe
 """
 
-import json
+import io
 import os
 import time
 import threading
@@ -20,22 +32,34 @@ from datetime import datetime
 import numpy as np
 from sentence_transformers import SentenceTransformer
 
+import ann_index
+import bm25_index
+import memory_snapshot
+import memory_wal
+from memory_store import MemoryStore
+
 # ===================== PATHS =====================
 
 BASE_DIR = Path(__file__).resolve().parent
-MEMORY_FILE = BASE_DIR / "jarvis_memory.json"
+MEMORY_FILE = BASE_DIR / "jarvis_memory.json"      # legacy format, migrated on first load
 
 # ===================== GLOBAL STATE =====================
 
-_memory = []
+_memory = MemoryStore()
 _memory_lock = threading.Lock()
 _memory_queue = queue.Queue(maxsize=100)
+_wal = None
+_compact_lock = threading.Lock()
+_compact_due = False
 
 _embedding_model = None
 _embedding_lock = threading.Lock()
 
-MAX_MEMORY = 500          # hard cap
-SAVE_INTERVAL = 5         # seconds
+MAX_MEMORY = 100_000      # hard cap
+GROUP_COMMIT_MAX = 64     # queued adds made durable by one fsync
+WRITE_ATTEMPTS = 5        # a queued add that keeps failing is dropped after this
+RETRY_BACKOFF_MAX = 30.0  # seconds between worker retries after an error
+WAL_COMPACT_BYTES = 16 * 1024 * 1024    # fold the log into a snapshot past this
 
 # ===================== EMBEDDING =====================
 
@@ -59,45 +83,125 @@ def embed(text: str):
 
 # ===================== LOAD / SAVE =====================
 
-def load():
-    global _memory
-    if not MEMORY_FILE.exists():
-        _memory = []
-        return
+def snapshot_file() -> Path:
+    return Path(MEMORY_FILE).with_suffix(".db")
 
-    try:
-        with open(MEMORY_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        normalized = []
-        for m in data:
-            if not isinstance(m, dict):
-                continue
-            normalized.append({
-                "text": m.get("text", ""),
-                "tags": m.get("tags", []),
-                "time": m.get("time", "unknown"),
-                "embedding": m.get("embedding")
-            })
-
-        _memory = normalized[-MAX_MEMORY:]
 
-    except Exception:
-        _memory = []
+def index_file() -> Path:
+    return Path(MEMORY_FILE).with_suffix(".ivf.npz")
 
 
-def save():
+def wal_stem() -> Path:
+    return Path(MEMORY_FILE).with_suffix("")
+
+
+def _add(store, text, tags, time, embedding):
+    store.append(text, tags, time, embedding)
+    if len(store) > MAX_MEMORY:
+        store.drop_oldest(len(store) - MAX_MEMORY)
+
+
+def load():
+    """
+    Snapshot (or one-shot JSON migration), then the write-ahead log on
+    top of it.
+    """
+    global _memory, _wal
+    store = MemoryStore()
+    generation = 0
+    legacy = Path(MEMORY_FILE)
+
     try:
-        with _memory_lock:
-            data = _memory[-MAX_MEMORY:]
+        if snapshot_file().exists():
+            store = memory_snapshot.read(snapshot_file())
+        elif legacy.exists():
+            store = memory_snapshot.migrate_json(legacy, snapshot_file(), MAX_MEMORY)
+            print(f"🧠 Migrated {len(store)} memories from {legacy.name} to {snapshot_file().name}")
+        generation = memory_snapshot.generation(snapshot_file())
+    except Exception as e:
+        print("Memory load failed:", repr(e))
+        store = MemoryStore()
+
+    # The index matches the snapshot; replayed adds go through it
+    _attach_saved_index(store)
+    if len(store) > MAX_MEMORY:
+        store.drop_oldest(len(store) - MAX_MEMORY)
+
+    replayed = 0
+    try:
+        for record in memory_wal.replay(wal_stem(), generation):
+            if record[0] == "clear":
+                store.clear()
+            else:
+                _add(store, *record[1:])
+            replayed += 1
+    except Exception as e:
+        print("Memory log replay failed:", repr(e))
+    if replayed:
+        print(f"🧠 Replayed {replayed} logged memory writes")
 
-        with open(MEMORY_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+    with _memory_lock:
+        if _wal is not None:
+            _wal.close()
+        _memory = store
+        _wal = memory_wal.MemoryWAL.open(wal_stem(), generation)
+        _wal.drop_before(generation)
 
+
+def _attach_saved_index(store):
+    try:
+        if index_file().exists() and not store.attach_index(ann_index.IVFIndex.load(index_file())):
+            print("🧠 Memory index out of date; rebuilding in background")
     except Exception:
         pass
 
 
+def compact():
+    """
+    Folds the write-ahead log into a new snapshot (plus the index). The
+    log is rotated under the lock, so the snapshot is exactly the state
+    the older segments describe; writing it happens outside the lock.
+    """
+    global _compact_due
+    with _compact_lock:
+        try:
+            index_bytes = None
+            with _memory_lock:
+                wal = _wal
+                columns = _memory.columns()
+                index = _memory.index
+                if index is not None:
+                    buf = io.BytesIO()
+                    index.save(buf, id_offset=-_memory.first_id)
+                    index_bytes = buf.getvalue()
+                base = wal.rotate()
+                _compact_due = False
+
+            memory_snapshot.write(snapshot_file(), *columns, gen=base)
+
+            if index_bytes is not None:
+                tmp = index_file().with_suffix(".tmp")
+                tmp.write_bytes(index_bytes)
+                os.replace(tmp, index_file())
+            elif index_file().exists():
+                index_file().unlink()
+
+            wal.drop_before(base)
+
+        except Exception as e:
+            # The log still holds everything; the next compaction retries
+            print("Memory compaction failed:", repr(e))
+
+
+def save():
+    """
+    Makes every write durable and folds the log into a snapshot.
+    """
+    if _wal is not None:
+        _wal.commit()
+        compact()
+
+
 # ===================== PUBLIC API =====================
 
 def add_memory(text: str, tags=None):
@@ -118,52 +222,61 @@ def add_memory(text: str, tags=None):
         pass
 
 
-def search(query: str, limit=5):
+def search(query: str, limit=5, prefix=False):
     """
-    Fast keyword search (no embeddings).
+    Fast keyword search (no embeddings): BM25 over an inverted index,
+    best first. prefix=True also matches words that start with a query
+    word. A query without words returns the most recent memories.
     """
-    q = query.lower()
-    results = []
-
     with _memory_lock:
-        for m in reversed(_memory):
-            if q in m["text"].lower():
-                results.append(m)
-            if len(results) >= limit:
-                break
-
-    return results
+        if not bm25_index.tokenize(query):
+            return [_memory[row] for row in range(len(_memory) - 1, -1, -1)[:limit]]
+        return [_memory[row] for row, _ in _memory.keyword_search(query, limit, prefix=prefix)]
 
 
 def vector_search(query: str, limit=5):
     """
-    Semantic search using cosine similarity.
+    Semantic search using cosine similarity (through the ANN index once
+    the store is large).
     """
-    with _memory_lock:
-        memories = [m for m in _memory if m.get("embedding")]
+    try:
+        with _memory_lock:
+            if not _memory.embedded():
+                return []
+
+        return nearest(embed(query), limit)
 
-    if not memories:
+    except Exception:
         return []
 
-    try:
-        q_vec = np.array(embed(query))
-        if q_vec is None:
-            return []
 
-        scored = []
-        for m in memories:
-            v = np.array(m["embedding"])
-            score = float(
-                np.dot(q_vec, v) /
-                (np.linalg.norm(q_vec) * np.linalg.norm(v) + 1e-8)
-            )
-            scored.append((m, score))
+def nearest(query_vec, limit=5):
+    """
+    vector_search() for an already embedded query.
+    """
+    if query_vec is None:
+        return []
+    with _memory_lock:
+        return [_memory[row] for row, _ in _memory.top_k(query_vec, limit)]
 
-        scored.sort(key=lambda x: x[1], reverse=True)
-        return [m for m, _ in scored[:limit]]
 
-    except Exception:
+def rerank(query_vec, memories, limit=5):
+    """
+    Orders memories (records returned by this module) by cosine to the
+    query, using their stored embeddings. Memories without one are
+    dropped.
+    """
+    if query_vec is None or not memories:
         return []
+    with _memory_lock:
+        found = [(m, _memory.row_of(m.get("id", -1))) for m in memories]
+        found = [(m, row) for m, row in found if row is not None]
+        if not found:
+            return []
+        scores = _memory.score(query_vec, [row for _, row in found])
+
+    ranked = sorted(zip(scores.tolist(), range(len(found))), key=lambda x: x[0], reverse=True)
+    return [found[i][0] for score, i in ranked[:limit] if score != float("-inf")]
 
 
 def size():
@@ -174,36 +287,114 @@ def size():
 def clear():
     with _memory_lock:
         _memory.clear()
-    save()
+        _wal.append(memory_wal.encode_clear())
+    _wal.commit()
+    compact()
+
+
+def index_stats() -> dict:
+    with _memory_lock:
+        index = _memory.index
+        return index.stats() if index is not None else {}
+
+
+def wal_stats() -> dict:
+    return _wal.stats() if _wal is not None else {}
 
 
 # ===================== BACKGROUND WORKER =====================
 
-def _memory_worker():
-    last_save = time.time()
+def _maybe_rebuild_index():
+    """
+    Trains the ANN index when the store has outgrown it. k-means runs on
+    a snapshot outside the lock, so searches are not held up.
+    """
+    global _compact_due
+    with _memory_lock:
+        store = _memory
+        if not store.index_due():
+            return
+        ids, vectors = store.index_snapshot()
 
-    while True:
+    try:
+        index = ann_index.build(ids, vectors)
+    except Exception as e:
+        print("Memory index build failed:", repr(e))
+        return
+
+    with _memory_lock:
+        if store is _memory:        # load() may have swapped the store meanwhile
+            store.install_index(index)
+            _compact_due = True     # persist it with the next snapshot
+
+
+def _next_batch(limit: int) -> list:
+    try:
+        batch = [_memory_queue.get(timeout=1)]
+    except queue.Empty:
+        return []
+    while len(batch) < limit:
         try:
-            item = _memory_queue.get(timeout=1)
+            batch.append(_memory_queue.get_nowait())
         except queue.Empty:
-            item = None
+            break
+    return batch
 
-        if item:
-            entry = {
-                "text": item["text"],
-                "tags": item["tags"],
-                "time": item["time"],
-                "embedding": embed(item["text"])
-            }
+
+def _write(batch) -> list:
+    """
+    Embeds and logs each queued add, in order. Stops at the first one
+    that fails and returns it with everything after it, to retry.
+    """
+    for i, item in enumerate(batch):
+        try:
+            if "embedding" not in item:
+                item["embedding"] = embed(item["text"])
+            record = memory_wal.encode_add(item["text"], item["tags"], item["time"], item["embedding"])
 
             with _memory_lock:
-                _memory.append(entry)
-                if len(_memory) > MAX_MEMORY:
-                    _memory[:] = _memory[-MAX_MEMORY:]
+                # Logged first: a failed append must not leave an unlogged row
+                _wal.append(record)
+                _add(_memory, item["text"], item["tags"], item["time"], item["embedding"])
+
+        except Exception as e:
+            item["attempts"] = item.get("attempts", 0) + 1
+            if item["attempts"] < WRITE_ATTEMPTS:
+                print("Memory write failed, will retry:", repr(e))
+                return batch[i:]
+            print("Memory write failed, dropping it:", repr(e))
+    return []
+
+
+def _memory_worker():
+    retry = []          # failed adds, oldest first; written before new ones
+    backoff = 0.0
+    while True:
+        if backoff:
+            time.sleep(backoff)
+        batch = retry + _next_batch(max(GROUP_COMMIT_MAX - len(retry), 1))
+        failed = False
+
+        try:
+            retry = _write(batch)
+
+            # Group commit: one fsync for everything written above. Runs
+            # every pass, so a failed fsync (records left pending) retries
+            _wal.commit()
+
+            _maybe_rebuild_index()
+
+            if _compact_due or _wal.size() >= WAL_COMPACT_BYTES:
+                compact()
+
+        except Exception as e:
+            print("Memory worker error:", repr(e))
+            failed = True
 
-        if time.time() - last_save >= SAVE_INTERVAL:
-            save()
-            last_save = time.time()
+        if retry or failed:
+            backoff = min(max(backoff * 2, 0.5), RETRY_BACKOFF_MAX)
+        else:
+            backoff = 0.0
 
 
 # ===================== INIT =====================
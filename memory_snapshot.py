@@ -0,0 +1,198 @@
+# memory_snapshot.py
+"""
+Binary Memory Snapshots for JARVIS
+----------------------------------
+• Embeddings: one float32 .npy matrix, memory-mapped on load instead of
+  parsed (copy-on-write, so the store can still modify it in RAM)
+• Text, tags and time: a small SQLite file, row order = matrix order
+• A snapshot is written to fresh files and switched in by one atomic
+  rename of the SQLite file, which names its matrix file; a crash
+  mid-save leaves the previous snapshot intact
+• One-shot migration from the legacy jarvis_memory.json
+"""
+
+import os
+import json
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+
+from memory_store import MemoryStore
+
+# ===================== CONFIG =====================
+
+FORMAT_VERSION = 1
+TAG_SEP = "\x1f"            # tags are short strings; no JSON per row
+
+
+def _vectors_path(db_path: Path, generation: int) -> Path:
+    return db_path.with_name(f"{db_path.stem}.vectors.{generation}.npy")
+
+
+def _fsync(path: Path):
+    fd = os.open(str(path), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _meta(db) -> dict:
+    return dict(db.execute("SELECT key, value FROM meta").fetchall())
+
+
+def generation(db_path) -> int:
+    db_path = Path(db_path)
+    if not db_path.exists():
+        return 0
+    db = sqlite3.connect(str(db_path))
+    try:
+        return int(_meta(db).get("generation", 0))
+    except sqlite3.Error:
+        return 0
+    finally:
+        db.close()
+
+
+# ===================== WRITE =====================
+
+def write(db_path, texts, tags, times, vectors=None, valid=None, gen: int = None) -> dict:
+    """
+    Writes a snapshot of the given columns. vectors is an (n, dim)
+    float32 matrix of unit rows (or None), valid marks rows that have
+    one. gen defaults to the current generation + 1. Returns
+    {"generation", "records", "bytes"}.
+    """
+    db_path = Path(db_path)
+    gen = gen if gen is not None else generation(db_path) + 1
+    n = len(texts)
+
+    vec_name = ""
+    vec_bytes = 0
+    if vectors is not None and n:
+        vec_path = _vectors_path(db_path, gen)
+        np.save(vec_path, np.ascontiguousarray(vectors[:n], dtype=np.float32))
+        _fsync(vec_path)
+        vec_name = vec_path.name
+        vec_bytes = vec_path.stat().st_size
+    if valid is None:
+        valid = np.zeros(n, dtype=bool)
+
+    tmp = db_path.with_suffix(db_path.suffix + ".tmp")
+    if tmp.exists():
+        tmp.unlink()
+    db = sqlite3.connect(str(tmp))
+    try:
+        db.execute("PRAGMA journal_mode=OFF")
+        db.execute("PRAGMA synchronous=OFF")
+        db.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        db.execute(
+            "CREATE TABLE memories ("
+            " row INTEGER PRIMARY KEY,"
+            " text TEXT NOT NULL,"
+            " tags TEXT NOT NULL,"
+            " time TEXT NOT NULL,"
+            " has_vec INTEGER NOT NULL)"
+        )
+        db.executemany(
+            "INSERT INTO memories VALUES (?, ?, ?, ?, ?)",
+            (
+                (row, texts[row], TAG_SEP.join(map(str, tags[row])), times[row], int(valid[row]))
+                for row in range(n)
+            )
+        )
+        db.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("version", str(FORMAT_VERSION)),
+            ("generation", str(gen)),
+            ("records", str(n)),
+            ("vectors", vec_name)
+        ])
+        db.commit()
+    finally:
+        db.close()
+    _fsync(tmp)
+    os.replace(tmp, db_path)
+
+    # Older matrices are unreferenced now
+    for old in db_path.parent.glob(f"{db_path.stem}.vectors.*.npy"):
+        if old.name != vec_name:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+    return {"generation": gen, "records": n, "bytes": db_path.stat().st_size + vec_bytes}
+
+
+def write_store(db_path, store: MemoryStore) -> dict:
+    texts, tags, times, vectors, valid = store.columns()
+    return write(db_path, texts, tags, times, vectors, valid)
+
+
+# ===================== READ =====================
+
+def read(db_path) -> MemoryStore:
+    """
+    Loads a snapshot. The matrix is mapped, not read; pages come in as
+    searches touch them. Raises on a missing or inconsistent snapshot.
+    """
+    db_path = Path(db_path)
+    db = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        meta = _meta(db)
+        if int(meta.get("version", 0)) != FORMAT_VERSION:
+            raise ValueError("unsupported memory snapshot format")
+        rows = db.execute("SELECT text, tags, time, has_vec FROM memories ORDER BY row").fetchall()
+    finally:
+        db.close()
+
+    n = len(rows)
+    if n != int(meta.get("records", -1)):
+        raise ValueError("memory snapshot record count mismatch")
+
+    texts = [r[0] for r in rows]
+    tags = [r[1].split(TAG_SEP) if r[1] else [] for r in rows]
+    times = [r[2] for r in rows]
+    valid = np.fromiter((r[3] for r in rows), dtype=bool, count=n)
+
+    vectors = None
+    if meta.get("vectors"):
+        vectors = np.load(db_path.with_name(meta["vectors"]), mmap_mode="c")
+        if vectors.ndim != 2 or len(vectors) != n:
+            raise ValueError("memory snapshot matrix does not match its records")
+
+    return MemoryStore.from_columns(texts, tags, times, vectors, valid)
+
+
+# ===================== MIGRATION =====================
+
+def read_json(json_path, limit: int = None) -> list:
+    """
+    Records from the legacy JSON file, normalized like the old load().
+    """
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    records = [
+        {
+            "text": m.get("text", ""),
+            "tags": m.get("tags", []),
+            "time": m.get("time", "unknown"),
+            "embedding": m.get("embedding")
+        }
+        for m in data if isinstance(m, dict)
+    ]
+    return records[-limit:] if limit else records
+
+
+def migrate_json(json_path, db_path, limit: int = None) -> MemoryStore:
+    """
+    Converts the legacy JSON file into a snapshot and renames it to
+    *.json.migrated, so this runs once.
+    """
+    json_path = Path(json_path)
+    store = MemoryStore()
+    store.extend(read_json(json_path, limit))
+    write_store(db_path, store)
+    os.replace(json_path, json_path.with_name(json_path.name + ".migrated"))
+    return store
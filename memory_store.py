@@ -0,0 +1,382 @@
+# memory_store.py
+"""
+Columnar Memory Store for JARVIS
+--------------------------------
+• Records are kept column by column (text, tags, time) instead of one
+  dict per memory, plus a BM25 inverted index over the text
+• Embeddings live in one contiguous, pre-normalized float32 matrix that
+  grows by doubling, so a semantic query is a single matrix-vector
+  product plus argpartition
+• O(1) record lookup by row; rows are in insertion order (oldest first)
+• Every record also gets a stable ID (first_id + row) that survives
+  dropping older records; the ANN index is keyed by it
+• Dropping the oldest records is amortized O(1): the matrix is compacted
+  only when it would otherwise have to grow
+• Large stores are searched through an IVF index (ann_index); small ones
+  exactly
+• Records without an embedding are kept but never ranked
+• Not thread-safe on its own: memory_manager guards it with its lock
+"""
+
+import numpy as np
+
+import ann_index
+from bm25_index import BM25Index
+
+# ===================== CONFIG =====================
+
+INITIAL_CAPACITY = 64
+DTYPE = np.float32
+
+ANN_MIN_SIZE = 4096     # embedded records before the ANN index is used
+ANN_REBUILD_GROWTH = 2  # retrain once the store doubles past the trained size
+
+
+def normalize(vec):
+    """
+    float32 unit vector, or None for a missing / zero / malformed vector.
+    """
+    if vec is None:
+        return None
+    try:
+        v = np.asarray(vec, dtype=DTYPE).reshape(-1)
+    except (TypeError, ValueError):
+        return None
+    norm = float(np.linalg.norm(v))
+    if not v.size or not np.isfinite(norm) or norm == 0.0:
+        return None
+    return v / norm
+
+
+class MemoryStore:
+    """
+    In-RAM long-term memory.
+
+        store = MemoryStore()
+        row = store.append("Tony likes coffee", ["fact"], "2025-01-01T09:00", vec)
+        store[row]                      # {"id", "text", "tags", "time"}
+        store.top_k(query_vec, 5)       # [(row, cosine), ...] best first
+        store.keyword_search("coffee")  # [(row, bm25), ...] best first
+        store.drop_oldest(10)
+
+    Index maintenance is split so the expensive part runs outside a lock:
+
+        if store.index_due():
+            ids, vectors = store.index_snapshot()       # under the lock
+            index = ann_index.build(ids, vectors)       # no lock
+            store.install_index(index)                  # under the lock
+    """
+
+    __slots__ = (
+        "texts", "tags", "times",
+        "first_id", "index", "text_index",
+        "_vectors", "_valid", "_start", "_dim"
+    )
+
+    def __init__(self, dim: int = None):
+        self.texts = []
+        self.tags = []
+        self.times = []
+        self.first_id = 0           # ID of row 0
+        self.index = None           # ann_index.IVFIndex, once trained
+        self.text_index = BM25Index()
+        self._dim = dim
+        self._vectors = None        # (capacity, dim) float32, allocated with the first vector
+        self._valid = np.zeros(INITIAL_CAPACITY, dtype=bool)
+        self._start = 0             # physical slot of row 0
+
+    @classmethod
+    def from_columns(cls, texts, tags, times, vectors=None, valid=None):
+        """
+        Adopts ready-made columns without copying: vectors is an (n, dim)
+        matrix of unit rows (e.g. a copy-on-write memory map) and valid
+        marks the rows that have one.
+        """
+        store = cls(vectors.shape[1] if vectors is not None else None)
+        n = len(texts)
+        store.texts = list(texts)
+        for row, text in enumerate(store.texts):
+            store.text_index.add(row, text)
+        store.tags = [list(t) for t in tags]
+        store.times = list(times)
+        if vectors is not None and n:
+            store._vectors = vectors
+            store._valid = np.zeros(n, dtype=bool)
+            if valid is not None:
+                store._valid[:] = valid[:n]
+        else:
+            store._valid = np.zeros(max(n, INITIAL_CAPACITY), dtype=bool)
+        return store
+
+    def __len__(self):
+        return len(self.texts)
+
+    @property
+    def dim(self):
+        return self._dim
+
+    @property
+    def capacity(self) -> int:
+        return len(self._valid)
+
+    @property
+    def next_id(self) -> int:
+        return self.first_id + len(self)
+
+    def row_of(self, memory_id: int):
+        row = memory_id - self.first_id
+        return row if 0 <= row < len(self) else None
+
+    # ===================== WRITES =====================
+
+    def _reserve(self, needed: int):
+        """
+        Makes room for `needed` rows past the start: compacts dropped
+        slots away first, doubles only if that is not enough.
+        """
+        if self._start + needed <= self.capacity:
+            return
+        n = len(self)
+        if self._start:
+            s = self._start
+            self._valid[:n] = self._valid[s:s + n]
+            self._valid[n:] = False
+            if self._vectors is not None:
+                self._vectors[:n] = self._vectors[s:s + n]
+            self._start = 0
+        if needed <= self.capacity:
+            return
+
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        valid = np.zeros(capacity, dtype=bool)
+        valid[:n] = self._valid[:n]
+        self._valid = valid
+        if self._vectors is not None:
+            vectors = np.zeros((capacity, self._dim), dtype=DTYPE)
+            vectors[:n] = self._vectors[:n]
+            self._vectors = vectors
+
+    def append(self, text: str, tags=None, time: str = "unknown", embedding=None) -> int:
+        """
+        Adds one record and returns its row. An embedding of the wrong
+        dimension is dropped (the record is kept, unranked).
+        """
+        row = len(self)
+        self._reserve(row + 1)
+        slot = self._start + row
+
+        vec = normalize(embedding)
+        if vec is not None:
+            if self._dim is None:
+                self._dim = vec.shape[0]
+            if vec.shape[0] != self._dim:
+                vec = None
+        if vec is not None:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.capacity, self._dim), dtype=DTYPE)
+            self._vectors[slot] = vec
+            self._valid[slot] = True
+            if self.index is not None:
+                self.index.add([self.first_id + row], vec)
+
+        self.texts.append(text)
+        self.text_index.add(self.first_id + row, text)
+        self.tags.append(list(tags or []))
+        self.times.append(time)
+        return row
+
+    def extend(self, records):
+        """
+        Bulk append of {"text", "tags", "time", "embedding"} dicts.
+        """
+        for m in records:
+            self.append(m.get("text", ""), m.get("tags", []), m.get("time", "unknown"), m.get("embedding"))
+
+    def drop_oldest(self, count: int) -> int:
+        """
+        Removes the `count` oldest records. Rows shift down; IDs do not.
+        Returns how many were removed.
+        """
+        count = min(max(count, 0), len(self))
+        if not count:
+            return 0
+        s = self._start
+        del self.texts[:count], self.tags[:count], self.times[:count]
+        self._valid[s:s + count] = False
+        self._start += count
+        self.first_id += count
+        self.text_index.drop_below(self.first_id)
+        if self.index is not None:
+            self.index.drop_below(self.first_id)
+        return count
+
+    def clear(self):
+        """
+        Removes every record. IDs keep counting up.
+        """
+        self.first_id = self.next_id
+        self.texts.clear()
+        self.text_index.clear()
+        self.tags.clear()
+        self.times.clear()
+        self._valid[:] = False
+        self._start = 0
+        self.index = None
+
+    # ===================== READS =====================
+
+    def __getitem__(self, row: int) -> dict:
+        return {
+            "id": self.first_id + row,
+            "text": self.texts[row],
+            "tags": self.tags[row],
+            "time": self.times[row]
+        }
+
+    def keyword_search(self, query: str, limit: int = 5, prefix: bool = False) -> list:
+        """
+        [(row, bm25)] for the best keyword matches, best first; ties go
+        to the most recent.
+        """
+        return [
+            (doc_id - self.first_id, score)
+            for doc_id, score in self.text_index.search(query, limit, prefix=prefix)
+        ]
+
+    def vector(self, row: int):
+        """
+        The row's unit embedding (a view), or None.
+        """
+        slot = self._start + row
+        if self._vectors is None or not self._valid[slot]:
+            return None
+        return self._vectors[slot]
+
+    def records(self, with_embeddings: bool = False) -> list:
+        out = []
+        for row in range(len(self)):
+            m = self[row]
+            del m["id"]
+            if with_embeddings:
+                vec = self.vector(row)
+                m["embedding"] = vec.tolist() if vec is not None else None
+            out.append(m)
+        return out
+
+    def columns(self):
+        """
+        (texts, tags, times, vectors, valid) for persisting; list copies
+        and an (n, dim) copy of the matrix, safe to use after the lock
+        is released.
+        """
+        n = len(self)
+        s = self._start
+        valid = self._valid[s:s + n].copy()
+        vectors = self._vectors[s:s + n].copy() if self._vectors is not None else None
+        return list(self.texts), [list(t) for t in self.tags], list(self.times), vectors, valid
+
+    def embedded(self) -> int:
+        return int(self._valid[self._start:self._start + len(self)].sum())
+
+    def _matrix(self):
+        s = self._start
+        return self._vectors[s:s + len(self)], self._valid[s:s + len(self)]
+
+    def score(self, query_vec, rows) -> np.ndarray:
+        """
+        Cosine of the query against the given rows (-inf where a row has
+        no embedding).
+        """
+        q = normalize(query_vec)
+        rows = np.asarray(rows, dtype=np.int64)
+        if q is None or self._vectors is None or q.shape[0] != self._dim:
+            return np.full(len(rows), -np.inf, dtype=DTYPE)
+        vectors, valid = self._matrix()
+        return np.where(valid[rows], vectors[rows] @ q, -np.inf)
+
+    def top_k(self, query_vec, k: int = 5, exact: bool = False) -> list:
+        """
+        [(row, cosine)] for the k most similar embedded records, best
+        first. Goes through the ANN index when there is one, unless
+        exact=True.
+        """
+        q = normalize(query_vec)
+        n = len(self)
+        if q is None or k <= 0 or not n or self._vectors is None or q.shape[0] != self._dim:
+            return []
+        vectors, valid = self._matrix()
+
+        if self.index is not None and not exact:
+            rows = self.index.candidates(q, k) - self.first_id
+            scores = vectors[rows] @ q
+        else:
+            available = int(valid.sum())
+            if not available:
+                return []
+            rows = None
+            scores = vectors @ q
+            if available < n:
+                scores = np.where(valid, scores, -np.inf)
+            k = min(k, available)
+
+        k = min(k, len(scores))
+        if not k:
+            return []
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        if rows is not None:
+            return [(int(rows[i]), float(scores[i])) for i in top]
+        return [(int(i), float(scores[i])) for i in top]
+
+    # ===================== ANN INDEX =====================
+
+    def index_due(self) -> bool:
+        """
+        True when the index should be (re)trained: the store is large
+        enough and has outgrown the last training.
+        """
+        embedded = self.embedded()
+        if embedded < ANN_MIN_SIZE:
+            return False
+        return self.index is None or embedded >= ANN_REBUILD_GROWTH * self.index.trained_size
+
+    def index_snapshot(self):
+        """
+        (ids, vectors) of every embedded record. The vectors are a copy,
+        safe to train on after the lock is released.
+        """
+        vectors, valid = self._matrix()
+        rows = np.flatnonzero(valid)
+        return rows + self.first_id, vectors[rows].copy()
+
+    def install_index(self, index):
+        """
+        Adopts an index built from index_snapshot(): records dropped
+        since the snapshot are deleted from it, records added since are
+        inserted.
+        """
+        index.drop_below(self.first_id)
+        vectors, valid = self._matrix()
+        start = max(index.last_id + 1 - self.first_id, 0)
+        rows = np.flatnonzero(valid[start:]) + start
+        index.add(rows + self.first_id, vectors[rows])
+        self.index = index
+        return index
+
+    def attach_index(self, index) -> bool:
+        """
+        Adopts an index loaded from disk, saved with IDs relative to row
+        0 (see memory_manager.save). Returns False, leaving the store
+        unchanged, if it does not cover exactly the embedded records.
+        """
+        if self.first_id or index.dim != self._dim:
+            return False
+        if len(index) != self.embedded() or index.last_id >= len(self):
+            return False
+        self.index = index
+        return True
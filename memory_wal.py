@@ -0,0 +1,253 @@
+# memory_wal.py
+"""
+Write-Ahead Log for JARVIS Memory
+---------------------------------
+• Append-only: one record per memory added and one per clear, so a
+  write costs O(new entries), not O(store size)
+• Group commit: records are buffered and made durable by one fsync per
+  batch (the memory worker commits once per drained queue batch)
+• Segments: <stem>.<base>.wal holds the records written on top of
+  snapshot generation <base>. Compaction starts a new segment, writes
+  snapshot <new base> from the same state, then deletes older segments
+• Recovery replays, in order, every segment whose base is >= the
+  snapshot's generation; a torn or corrupt tail is detected by length +
+  CRC and cut off, so replay stops at the last durable record
+"""
+
+import os
+import json
+import zlib
+import struct
+import threading
+from pathlib import Path
+
+import numpy as np
+
+# ===================== FORMAT =====================
+
+MAGIC = b"JRVSWAL1"
+HEADER = struct.Struct("<II")       # body length, crc32(body)
+META_LEN = struct.Struct("<I")
+
+ADD = 1
+CLEAR = 2
+
+
+def _segment(stem: Path, base: int) -> Path:
+    return stem.with_name(f"{stem.name}.{base}.wal")
+
+
+def segments(stem) -> list:
+    """
+    [(base, path)] of existing segments, oldest first.
+    """
+    stem = Path(stem)
+    found = []
+    for path in stem.parent.glob(f"{stem.name}.*.wal"):
+        base = path.name[len(stem.name) + 1:-len(".wal")]
+        if base.isdigit():
+            found.append((int(base), path))
+    return sorted(found)
+
+
+def _fsync_dir(path: Path):
+    # Makes a new or renamed file's directory entry durable (POSIX only)
+    try:
+        fd = os.open(str(path.parent), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def encode_add(text: str, tags, time: str, embedding=None) -> bytes:
+    meta = json.dumps([text, list(tags or []), time], ensure_ascii=False).encode("utf-8")
+    vec = b"" if embedding is None else np.asarray(embedding, dtype=np.float32).tobytes()
+    return bytes([ADD]) + META_LEN.pack(len(meta)) + meta + vec
+
+
+def encode_clear() -> bytes:
+    return bytes([CLEAR])
+
+
+def decode(body: bytes):
+    """
+    ("add", text, tags, time, embedding-or-None) or ("clear",).
+    """
+    kind = body[0]
+    if kind == CLEAR:
+        return ("clear",)
+    if kind != ADD:
+        raise ValueError(f"unknown WAL record kind {kind}")
+    (meta_len,) = META_LEN.unpack_from(body, 1)
+    start = 1 + META_LEN.size
+    text, tags, time = json.loads(body[start:start + meta_len].decode("utf-8"))
+    vec = body[start + meta_len:]
+    embedding = np.frombuffer(vec, dtype=np.float32) if vec else None
+    return ("add", text, tags, time, embedding)
+
+
+def read_segment(path) -> tuple:
+    """
+    (records, valid_bytes): every intact record, and the offset where
+    the intact prefix ends.
+    """
+    data = Path(path).read_bytes()
+    if not data.startswith(MAGIC):
+        return [], 0
+    records = []
+    pos = len(MAGIC)
+    while pos + HEADER.size <= len(data):
+        length, crc = HEADER.unpack_from(data, pos)
+        body = data[pos + HEADER.size:pos + HEADER.size + length]
+        if not length or len(body) < length or zlib.crc32(body) != crc:
+            break
+        try:
+            records.append(decode(body))
+        except (ValueError, UnicodeDecodeError, struct.error):
+            break
+        pos += HEADER.size + length
+    return records, pos
+
+
+def replay(stem, generation: int):
+    """
+    Yields the records that belong on top of snapshot `generation`.
+    """
+    for base, path in segments(stem):
+        if base >= generation:
+            records, _ = read_segment(path)
+            yield from records
+
+
+class MemoryWAL:
+    """
+        wal = MemoryWAL.open(stem, generation)   # after replay()
+        wal.append(encode_add(text, tags, time, vec))
+        wal.commit()                             # one fsync for the batch
+        base = wal.rotate()                      # before writing snapshot `base`
+        wal.drop_before(base)                    # once that snapshot is durable
+    """
+
+    def __init__(self, stem: Path, base: int):
+        self.stem = Path(stem)
+        self.base = base
+        self._lock = threading.Lock()
+        self._file = None
+        self._pending = 0
+        self.appended = 0
+        self.commits = 0
+        self._open_segment(base)
+
+    @classmethod
+    def open(cls, stem, generation: int):
+        """
+        Continues the newest segment (cutting off a torn tail), or starts
+        one on top of snapshot `generation`.
+        """
+        stem = Path(stem)
+        existing = [(b, p) for b, p in segments(stem) if b >= generation]
+        base = existing[-1][0] if existing else generation
+        if existing:
+            _, valid = read_segment(existing[-1][1])
+            if valid < len(MAGIC):
+                existing[-1][1].unlink()
+            else:
+                with open(existing[-1][1], "r+b") as f:
+                    f.truncate(valid)
+                    f.flush()
+                    os.fsync(f.fileno())
+        return cls(stem, base)
+
+    def _open_segment(self, base: int):
+        path = _segment(self.stem, base)
+        fresh = not path.exists()
+        self._file = open(path, "ab")
+        if fresh:
+            self._file.write(MAGIC)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            _fsync_dir(path)
+        self.base = base
+
+    @property
+    def path(self) -> Path:
+        return _segment(self.stem, self.base)
+
+    def size(self) -> int:
+        with self._lock:
+            if self._file.closed:
+                return 0
+            self._file.flush()
+            return self._file.tell()
+
+    # ===================== WRITES =====================
+
+    def append(self, body: bytes):
+        """
+        Buffers one record. Not durable until commit().
+        """
+        with self._lock:
+            self._file.write(HEADER.pack(len(body), zlib.crc32(body)))
+            self._file.write(body)
+            self._pending += 1
+            self.appended += 1
+
+    def commit(self) -> int:
+        """
+        Makes every appended record durable. Returns how many were
+        waiting (0 means no fsync was needed). If the fsync raises, the
+        records stay pending and the next commit() retries it. A no-op
+        once closed: close() already synced.
+        """
+        with self._lock:
+            pending = self._pending
+            if pending and not self._file.closed:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._pending = 0
+                self.commits += 1
+            return pending
+
+    def rotate(self) -> int:
+        """
+        Commits the current segment and starts the next. Returns the new
+        base: the generation the caller must write its snapshot as.
+        """
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._pending = 0
+            self._file.close()
+            self._open_segment(self.base + 1)
+            return self.base
+
+    def drop_before(self, base: int):
+        """
+        Deletes segments folded into snapshot `base`.
+        """
+        for b, path in segments(self.stem):
+            if b < base:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def close(self):
+        with self._lock:
+            if self._file and not self._file.closed:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+
+    def stats(self) -> dict:
+        return {
+            "segment": self.path.name,
+            "appended": self.appended,
+            "commits": self.commits,
+            "bytes": self.size()
+        }
@@ -0,0 +1,315 @@
+# model_router.py
+"""
+Adaptive Model Router for JARVIS
+--------------------------------
+• Keyword/length classifier picks the desired thinking level
+• Rolling TTFT and tokens/sec statistics per model; samples age out,
+  so a model skipped after a latency spike is tried again later
+• Per-request TTFT SLO; falls back deep -> mid -> fast when a model's
+  p95 blows the budget or it is being rate-limited
+• Models that answer "model not found" are retired automatically
+• Recent routing decisions kept for inspection
+• Thread-safe
+"""
+
+import time
+import threading
+from collections import deque
+
+# ===================== CONFIG =====================
+
+LEVELS = ("deep", "mid", "fast")          # fallback order
+
+# Time-to-first-token budget per level (seconds)
+DEFAULT_SLO = {
+    "fast": 1.5,
+    "mid": 3.0,
+    "deep": 6.0
+}
+
+STATS_WINDOW = 50         # samples kept per model
+STATS_MAX_AGE = 300.0     # seconds before a sample stops counting
+MIN_SAMPLES = 5           # p95 is ignored until this many samples exist
+DECISION_HISTORY = 100
+RATE_LIMIT_TOLERANCE = 1.0  # seconds of limiter wait before a model counts as limited
+HEDGE_DEFAULT_DELAY = 1.0   # hedge delay before enough TTFT samples exist
+
+DEEP_KEYWORDS = {
+    "architecture", "design", "optimize", "debug deeply",
+    "step by step", "root cause", "full analysis"
+}
+
+MID_KEYWORDS = {
+    "explain", "why", "how", "compare", "difference"
+}
+
+_NOT_FOUND_MARKERS = ("model_not_found", "does not exist", "decommissioned", "not found")
+
+
+def _percentile(values, pct: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class _Window:
+    """
+    The last STATS_WINDOW samples, minus those older than STATS_MAX_AGE.
+    A model skipped for its p95 gets no new samples, so without expiry
+    one spike would retire it for good.
+    """
+    __slots__ = ("values", "times")
+
+    def __init__(self):
+        self.values = deque(maxlen=STATS_WINDOW)
+        self.times = deque(maxlen=STATS_WINDOW)
+
+    def append(self, value: float, now: float):
+        self.values.append(value)
+        self.times.append(now)
+
+    def expire(self, now: float):
+        while self.times and self.times[0] < now - STATS_MAX_AGE:
+            self.times.popleft()
+            self.values.popleft()
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(self.values)
+
+
+class _ModelStats:
+    __slots__ = ("ttft", "tps", "errors", "unavailable")
+
+    def __init__(self):
+        self.ttft = _Window()
+        self.tps = _Window()
+        self.errors = 0
+        self.unavailable = None       # reason string once retired
+
+
+class ModelRouter:
+    """
+    Maps a thinking level to a concrete model under current conditions.
+
+        level = router.classify(query)
+        model = router.route(level)          # or route(level, slo=0.8)
+        router.observe_result(model, result, error)
+    """
+
+    def __init__(self, models: dict, limiter=None, slo: dict = None, clock=time.monotonic):
+        self.models = dict(models)            # level -> model name
+        self.limiter = limiter
+        self.slo = dict(DEFAULT_SLO, **(slo or {}))
+        self._clock = clock
+        self._stats = {}
+        self._decisions = deque(maxlen=DECISION_HISTORY)
+        self._lock = threading.Lock()
+
+    def _model_stats(self, model) -> _ModelStats:
+        stats = self._stats.get(model)
+        if stats is None:
+            stats = self._stats[model] = _ModelStats()
+        now = self._clock()
+        stats.ttft.expire(now)
+        stats.tps.expire(now)
+        return stats
+
+    # ===================== CLASSIFY =====================
+
+    @staticmethod
+    def classify(query: str) -> str:
+        q = query.lower()
+
+        if any(k in q for k in DEEP_KEYWORDS) or len(q.split()) > 20:
+            return "deep"
+
+        if any(k in q for k in MID_KEYWORDS):
+            return "mid"
+
+        return "fast"
+
+    # ===================== ROUTE =====================
+
+    def chain(self, level: str) -> list:
+        """
+        Distinct models from `level` downwards, e.g. deep -> mid -> fast.
+        """
+        start = LEVELS.index(level) if level in LEVELS else len(LEVELS) - 1
+        models = []
+        for lvl in LEVELS[start:]:
+            model = self.models.get(lvl)
+            if model and model not in models:
+                models.append(model)
+        return models
+
+    def fallback(self, model: str):
+        """
+        Next cheaper available model after `model`, or None.
+        """
+        with self._lock:
+            for level in LEVELS:
+                if self.models.get(level) == model:
+                    for candidate in self.chain(level)[1:]:
+                        if not self._model_stats(candidate).unavailable:
+                            return candidate
+                    return None
+        return None
+
+    def route(self, level: str, slo: float = None) -> str:
+        slo = slo if slo is not None else self.slo.get(level, self.slo["fast"])
+        candidates = self.chain(level)
+        skipped = []
+        chosen = None
+
+        with self._lock:
+            for model in candidates:
+                stats = self._model_stats(model)
+
+                if stats.unavailable:
+                    skipped.append((model, "unavailable"))
+                    continue
+
+                if self.limiter is not None:
+                    wait = self.limiter.wait_time(model)
+                    if wait > RATE_LIMIT_TOLERANCE:
+                        skipped.append((model, f"rate_limited {wait:.1f}s"))
+                        continue
+
+                p95 = _percentile(stats.ttft, 95) if len(stats.ttft) >= MIN_SAMPLES else None
+                if p95 is not None and p95 > slo:
+                    skipped.append((model, f"p95 {p95:.2f}s > slo {slo:.2f}s"))
+                    continue
+
+                chosen = model
+                break
+
+            if chosen is None:
+                # Everything is degraded: take the available model with the
+                # best recent p95, preferring the cheapest on ties.
+                available = [
+                    m for m in reversed(candidates)
+                    if not self._model_stats(m).unavailable
+                ] or [self.models.get("fast")]
+                chosen = min(
+                    available,
+                    key=lambda m: _percentile(self._model_stats(m).ttft, 95) or 0.0
+                )
+
+            self._decisions.append({
+                "time": time.time(),
+                "level": level,
+                "slo": slo,
+                "model": chosen,
+                "skipped": skipped
+            })
+
+        return chosen
+
+    # ===================== HEDGING =====================
+
+    def ttft_percentile(self, model: str, pct: float):
+        with self._lock:
+            samples = self._model_stats(model).ttft
+            if len(samples) < MIN_SAMPLES:
+                return None
+            return _percentile(samples, pct)
+
+    def hedge_plan(self, model: str, pct: float = 95):
+        """
+        Returns (delay, backup_model) for hedging a request to `model`:
+        fire after the model's pct-th percentile TTFT, to whichever
+        available, non-limited model has the best median TTFT (the same
+        model on a fresh connection when none is better).
+        """
+        delay = self.ttft_percentile(model, pct) or HEDGE_DEFAULT_DELAY
+
+        with self._lock:
+            def median(m):
+                samples = self._model_stats(m).ttft
+                return _percentile(samples, 50) if len(samples) >= MIN_SAMPLES else None
+
+            backup = model
+            best = median(model)
+            for candidate in sorted(set(self.models.values())):
+                if candidate == model or self._model_stats(candidate).unavailable:
+                    continue
+                if self.limiter is not None and self.limiter.wait_time(candidate) > 0:
+                    continue
+                m = median(candidate)
+                if m is not None and (best is None or m < best):
+                    backup, best = candidate, m
+
+        return delay, backup
+
+    # ===================== FEEDBACK =====================
+
+    def record(self, model: str, ttft: float = None, tokens_per_sec: float = None):
+        with self._lock:
+            stats = self._model_stats(model)
+            now = self._clock()
+            if ttft is not None:
+                stats.ttft.append(ttft, now)
+            if tokens_per_sec is not None:
+                stats.tps.append(tokens_per_sec, now)
+
+    def mark_unavailable(self, model: str, reason: str):
+        with self._lock:
+            self._model_stats(model).unavailable = reason
+        print(f"🚫 Router: retiring {model} ({reason})")
+
+    def is_available(self, model: str) -> bool:
+        with self._lock:
+            return not self._model_stats(model).unavailable
+
+    def observe_result(self, model: str, result=None, error=None):
+        """
+        groq_client result listener: feeds latency stats and retires
+        models the API reports as missing.
+        """
+        if error is not None:
+            with self._lock:
+                self._model_stats(model).errors += 1
+            status = getattr(error, "status_code", None)
+            body = getattr(error, "body", b"") or b""
+            text = body.decode("utf-8", errors="replace").lower()
+            if status in (400, 404) and any(m in text for m in _NOT_FOUND_MARKERS):
+                self.mark_unavailable(model, f"HTTP {status} model not found")
+            return
+
+        if result is None or not result.streamed:
+            return  # non-streamed bodies have no meaningful TTFT
+
+        timings = result.timings
+        ttft = timings.get("first_token")
+        tps = None
+        tokens = (result.usage or {}).get("completion_tokens")
+        if tokens and ttft is not None and timings.get("total"):
+            generation = timings["total"] - ttft
+            if generation > 0:
+                tps = tokens / generation
+        self.record(model, ttft, tps)
+
+    # ===================== INSPECTION =====================
+
+    def decisions(self, limit: int = 20) -> list:
+        with self._lock:
+            return list(self._decisions)[-limit:]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                model: {
+                    "samples": len(s.ttft),
+                    "ttft_p50": _percentile(s.ttft, 50),
+                    "ttft_p95": _percentile(s.ttft, 95),
+                    "tokens_per_sec_p50": _percentile(s.tps, 50),
+                    "errors": s.errors,
+                    "unavailable": s.unavailable
+                }
+                for model, s in ((m, self._model_stats(m)) for m in list(self._stats))
+            }
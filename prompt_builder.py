@@ -0,0 +1,185 @@
+# prompt_builder.py
+"""
+Token-Budget Prompt Builder for JARVIS
+--------------------------------------
+• Heuristic token estimation (no tokenizer download)
+• Per-level prompt budgets (fast / mid / deep)
+• Sections packed by priority; memories and history give way first
+• Static style prefix built once and reused every turn
+• Per-section token report for prompt cost visibility
+"""
+
+from functools import lru_cache
+
+# ===================== CONFIG =====================
+
+# Input-token budgets per thinking level (completion tokens are separate)
+LEVEL_BUDGETS = {
+    "fast": 1200,
+    "mid": 2500,
+    "deep": 5000
+}
+
+MESSAGE_OVERHEAD = 4          # role + framing tokens per chat message
+CHARS_PER_TOKEN = 4           # Llama-3 averages ~4 chars/token on English
+
+STYLE_RULES = (
+    "Style rules:\n"
+    "- Do NOT repeat full names once introduced.\n"
+    "- Use pronouns for follow-ups.\n"
+    "- Maintain conversational continuity."
+)
+
+
+# ===================== ESTIMATION =====================
+
+@lru_cache(maxsize=4096)
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap upper-leaning estimate: the larger of the char-based and
+    word-based counts, so short-word and long-word text both stay safe.
+    """
+    if not text:
+        return 0
+    return max(len(text) // CHARS_PER_TOKEN, len(text.split())) + 1
+
+
+def message_tokens(message: dict) -> int:
+    return estimate_tokens(message.get("content") or "") + MESSAGE_OVERHEAD
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    max_chars = max(0, max_tokens - 1) * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max(0, max_chars - 1)].rstrip() + "…"
+
+
+# ===================== STATIC PREFIX =====================
+
+# Identical on every turn: built once, token count computed once, and
+# placed first so upstream prefix caching sees a stable head.
+_STATIC_PREFIX = ({"role": "system", "content": STYLE_RULES},)
+_STATIC_PREFIX_TOKENS = sum(message_tokens(m) for m in _STATIC_PREFIX)
+
+
+# ===================== BUILDER =====================
+
+def build_prompt(
+    query: str,
+    level: str = "fast",
+    summary: str = "",
+    entity: str = None,
+    memories=(),
+    history=(),
+    budget: int = None
+):
+    """
+    Returns (messages, report).
+
+    Always kept: static style prefix and the user query.
+    Then, in priority order, as budget allows:
+      1. conversation summary (truncated to fit)
+      2. entity anchor
+      3. long-term memories (best first, whole entries)
+      4. recent history (newest first, whole turns)
+
+    report = {"level", "budget", "total", "sections": {name: tokens},
+              "dropped": {name: count}}
+    """
+    budget = budget or LEVEL_BUDGETS.get(level, LEVEL_BUDGETS["fast"])
+
+    query_msg = {"role": "user", "content": query}
+    query_tokens = message_tokens(query_msg)
+    if _STATIC_PREFIX_TOKENS + query_tokens > budget:
+        query_msg["content"] = _truncate(
+            query, budget - _STATIC_PREFIX_TOKENS - MESSAGE_OVERHEAD
+        )
+        query_tokens = message_tokens(query_msg)
+
+    sections = {"style": _STATIC_PREFIX_TOKENS, "query": query_tokens}
+    dropped = {}
+    remaining = budget - _STATIC_PREFIX_TOKENS - query_tokens
+
+    # ----- 1. summary -----
+    summary_msgs = []
+    if summary:
+        header = "Conversation summary so far:\n"
+        available = remaining - MESSAGE_OVERHEAD - estimate_tokens(header)
+        if available > 8:
+            msg = {"role": "system", "content": header + _truncate(summary, available)}
+            summary_msgs.append(msg)
+            sections["summary"] = message_tokens(msg)
+            remaining -= sections["summary"]
+        else:
+            dropped["summary"] = 1
+
+    # ----- 2. entity anchor -----
+    anchor_msgs = []
+    if entity:
+        msg = {"role": "system", "content": f"The user is referring to: {entity}."}
+        cost = message_tokens(msg)
+        if cost <= remaining:
+            anchor_msgs.append(msg)
+            sections["anchor"] = cost
+            remaining -= cost
+        else:
+            dropped["anchor"] = 1
+
+    # ----- 3. memories -----
+    memory_msgs = []
+    if memories:
+        header = "Relevant long-term memories:\n"
+        used = MESSAGE_OVERHEAD + estimate_tokens(header)
+        lines = []
+        for m in memories:
+            line = f"- {m['text']}"
+            cost = estimate_tokens(line)
+            if used + cost > remaining:
+                dropped["memories"] = dropped.get("memories", 0) + 1
+                continue
+            lines.append(line)
+            used += cost
+        if lines:
+            memory_msgs.append({"role": "system", "content": header + "\n".join(lines)})
+            sections["memories"] = used
+            remaining -= used
+
+    # ----- 4. history -----
+    history_msgs = []
+    for i, turn in enumerate(reversed(history)):
+        cost = message_tokens(turn)
+        if cost > remaining:
+            dropped["history"] = len(history) - i
+            break
+        history_msgs.append({"role": turn["role"], "content": turn["content"]})
+        remaining -= cost
+    history_msgs.reverse()
+    if history_msgs:
+        sections["history"] = sum(message_tokens(m) for m in history_msgs)
+
+    messages = (
+        list(_STATIC_PREFIX)
+        + summary_msgs
+        + anchor_msgs
+        + memory_msgs
+        + history_msgs
+        + [query_msg]
+    )
+
+    report = {
+        "level": level,
+        "budget": budget,
+        "total": budget - remaining,
+        "sections": sections,
+        "dropped": dropped
+    }
+    return messages, report
+
+
+def format_report(report: dict) -> str:
+    parts = ", ".join(f"{k} {v}" for k, v in report["sections"].items())
+    line = f"🧾 Prompt[{report['level']}] {report['total']}/{report['budget']} tok — {parts}"
+    if report["dropped"]:
+        line += " | dropped " + ", ".join(f"{k} {v}" for k, v in report["dropped"].items())
+    return line
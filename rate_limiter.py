@@ -0,0 +1,231 @@
+# rate_limiter.py
+"""
+Client-Side Rate Limiter for JARVIS
+-----------------------------------
+• Request + token buckets per model
+• Buckets re-synced from Groq x-ratelimit-* response headers
+• Retry-After penalties block a model until it recovers
+• reserve() answers "how long until this fits?" before sending
+• Wait / downgrade / 429 metrics
+• Thread-safe
+"""
+
+import re
+import time
+import threading
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_reset(value) -> float:
+    """
+    Parses Groq reset durations such as "7.66s", "2m59.56s", "120ms".
+    """
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION.findall(str(value))
+    if not parts:
+        return None
+    return sum(float(n) * _UNITS[u] for n, u in parts)
+
+
+class TokenBucket:
+    """
+    Classic token bucket. capacity None means "limit not known yet",
+    which never throttles.
+    """
+
+    __slots__ = ("capacity", "tokens", "rate", "updated")
+
+    def __init__(self, capacity=None, rate=0.0):
+        self.capacity = capacity
+        self.tokens = capacity or 0.0
+        self.rate = rate
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        if self.capacity is None:
+            return
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        if self.capacity is None:
+            return 0.0
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float, now: float):
+        if self.capacity is None:
+            return
+        self._refill(now)
+        self.tokens -= amount
+
+    def sync(self, limit, remaining, reset_seconds, default_window, now):
+        """
+        Adopts the server's view. The refill rate is whatever brings the
+        bucket back to full by the advertised reset time.
+        """
+        if limit is None or remaining is None:
+            return
+        self.capacity = float(limit)
+        self.tokens = float(remaining)
+        self.updated = now
+        deficit = self.capacity - self.tokens
+        if reset_seconds and reset_seconds > 0 and deficit > 0:
+            self.rate = deficit / reset_seconds
+        else:
+            self.rate = self.capacity / default_window
+
+
+class _ModelLimits:
+    __slots__ = ("requests", "tokens", "blocked_until", "waited", "waits", "rate_limited")
+
+    def __init__(self):
+        self.requests = TokenBucket()
+        self.tokens = TokenBucket()
+        self.blocked_until = 0.0
+        self.waited = 0.0
+        self.waits = 0
+        self.rate_limited = 0
+
+
+class RateLimiter:
+    """
+    Per-model admission control.
+
+        wait = limiter.reserve(model, est_tokens, max_wait=2.0)
+        if wait is None: ...downgrade...
+        else: time.sleep(wait); send()
+        limiter.observe(model, status_code, headers)
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._models = {}
+        self._lock = threading.Lock()
+        self.downgrades = 0
+
+    def _limits(self, model) -> _ModelLimits:
+        limits = self._models.get(model)
+        if limits is None:
+            limits = self._models[model] = _ModelLimits()
+        return limits
+
+    # ===================== ADMISSION =====================
+
+    def wait_time(self, model: str, est_tokens: int = 0) -> float:
+        """
+        Seconds until `model` could accept a request of est_tokens.
+        """
+        with self._lock:
+            limits = self._limits(model)
+            now = self._clock()
+            return max(
+                limits.blocked_until - now,
+                limits.requests.wait_time(1, now),
+                limits.tokens.wait_time(est_tokens, now),
+                0.0
+            )
+
+    def reserve(self, model: str, est_tokens: int = 0, max_wait: float = float("inf")):
+        """
+        Reserves one request and est_tokens if they fit within max_wait.
+        Returns the seconds the caller must wait before sending, or None
+        when the model is saturated beyond max_wait (nothing reserved).
+        """
+        with self._lock:
+            limits = self._limits(model)
+            now = self._clock()
+            wait = max(
+                limits.blocked_until - now,
+                limits.requests.wait_time(1, now),
+                limits.tokens.wait_time(est_tokens, now),
+                0.0
+            )
+            if wait > max_wait:
+                return None
+
+            limits.requests.take(1, now)
+            limits.tokens.take(est_tokens, now)
+            if wait > 0:
+                limits.waited += wait
+                limits.waits += 1
+            return wait
+
+    def record_downgrade(self):
+        with self._lock:
+            self.downgrades += 1
+
+    # ===================== FEEDBACK =====================
+
+    def observe(self, model: str, status_code: int, headers: dict):
+        """
+        Re-syncs buckets from x-ratelimit-* headers; on 429 blocks the
+        model until Retry-After has passed.
+        """
+        def number(name):
+            try:
+                return float(headers[name])
+            except (KeyError, ValueError):
+                return None
+
+        with self._lock:
+            limits = self._limits(model)
+            now = self._clock()
+
+            limits.requests.sync(
+                number("x-ratelimit-limit-requests"),
+                number("x-ratelimit-remaining-requests"),
+                parse_reset(headers.get("x-ratelimit-reset-requests")),
+                86400.0,
+                now
+            )
+            limits.tokens.sync(
+                number("x-ratelimit-limit-tokens"),
+                number("x-ratelimit-remaining-tokens"),
+                parse_reset(headers.get("x-ratelimit-reset-tokens")),
+                60.0,
+                now
+            )
+
+            if status_code == 429:
+                limits.rate_limited += 1
+                retry_after = parse_reset(headers.get("retry-after")) or 2.0
+                limits.blocked_until = max(limits.blocked_until, now + retry_after)
+
+    # ===================== METRICS =====================
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = self._clock()
+            return {
+                "downgrades": self.downgrades,
+                "models": {
+                    model: {
+                        "waited_seconds": round(l.waited, 3),
+                        "waits": l.waits,
+                        "rate_limited": l.rate_limited,
+                        "blocked_for": round(max(0.0, l.blocked_until - now), 2),
+                        "requests_left": (
+                            None if l.requests.capacity is None
+                            else int(l.requests.tokens)
+                        ),
+                        "tokens_left": (
+                            None if l.tokens.capacity is None
+                            else int(l.tokens.tokens)
+                        )
+                    }
+                    for model, l in self._models.items()
+                }
+            }
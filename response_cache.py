@@ -0,0 +1,201 @@
+# response_cache.py
+"""
+Persistent Response Cache for JARVIS
+------------------------------------
+• SQLite-backed (survives watchdog os._exit restarts)
+• Keys are content hashes of (model, messages, params)
+• True LRU eviction under a byte budget
+• Per-entry TTL
+• Hit / miss / eviction counters
+• Thread-safe, never raises into the brain
+"""
+
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+
+# ===================== CONFIG =====================
+
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024   # 8 MB of cached reply text
+DEFAULT_TTL = 6 * 60 * 60             # seconds
+
+
+def make_key(model: str, messages: list, **params) -> str:
+    """
+    Stable SHA-256 over the request content.
+    Only the digest is stored, never the serialized message list.
+    """
+    blob = json.dumps(
+        {"model": model, "messages": messages, "params": params},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Disk-backed LRU + TTL cache of reply text.
+
+    Recency is a monotonically increasing access sequence rather than a
+    wall-clock timestamp, so eviction order is exact even for entries
+    touched within the same clock tick.
+    """
+
+    def __init__(
+        self,
+        path,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        default_ttl: float = DEFAULT_TTL,
+        clock=time.time
+    ):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._db = sqlite3.connect(
+            str(self.path),
+            check_same_thread=False,
+            isolation_level=None      # autocommit: every put is durable
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " expires REAL NOT NULL,"
+            " seq INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_seq ON entries(seq)")
+
+        row = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0), COALESCE(MAX(seq), 0) FROM entries"
+        ).fetchone()
+        self._total_bytes, self._seq = row
+
+    # ===================== PUBLIC API =====================
+
+    def get(self, key: str):
+        """
+        Returns the cached text, or None on miss / expiry.
+        """
+        try:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT value, size, expires FROM entries WHERE key = ?",
+                    (key,)
+                ).fetchone()
+
+                if row is None:
+                    self.misses += 1
+                    return None
+
+                value, size, expires = row
+                if expires <= self._clock():
+                    self._delete(key, size)
+                    self.expirations += 1
+                    self.misses += 1
+                    return None
+
+                self._seq += 1
+                self._db.execute(
+                    "UPDATE entries SET seq = ? WHERE key = ?", (self._seq, key)
+                )
+                self.hits += 1
+                return value
+
+        except sqlite3.Error:
+            return None
+
+    def put(self, key: str, value: str, ttl: float = None):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        expires = self._clock() + (self.default_ttl if ttl is None else ttl)
+
+        try:
+            with self._lock:
+                old = self._db.execute(
+                    "SELECT size FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+
+                self._seq += 1
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, expires, seq) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, value, size, expires, self._seq)
+                )
+                self._total_bytes += size - (old[0] if old else 0)
+                self._evict()
+
+        except sqlite3.Error:
+            pass
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+            self._total_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            count = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": count,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+    # ===================== INTERNAL =====================
+
+    def _delete(self, key: str, size: int):
+        self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+        self._total_bytes -= size
+
+    def _evict(self):
+        """
+        Drops expired entries first, then least recently used ones,
+        until the byte budget holds. Caller holds the lock.
+        """
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        now = self._clock()
+        expired = self._db.execute(
+            "SELECT key, size FROM entries WHERE expires <= ?", (now,)
+        ).fetchall()
+        for key, size in expired:
+            self._delete(key, size)
+            self.expirations += 1
+
+        while self._total_bytes > self.max_bytes:
+            batch = self._db.execute(
+                "SELECT key, size FROM entries ORDER BY seq LIMIT 16"
+            ).fetchall()
+            if not batch:
+                self._total_bytes = 0
+                break
+            for key, size in batch:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                self._delete(key, size)
+                self.evictions += 1
@@ -0,0 +1,227 @@
+# semantic_cache.py
+"""
+Semantic Answer Cache for JARVIS
+--------------------------------
+• Serves rephrased questions from prior answers
+• Cosine similarity over normalized sentence embeddings
+• Matches scoped by a conversation fingerprint; follow-ups ("what
+  about his wife?") also key on the recent turns they refer to
+• Bounded ring of entries with TTL
+• Tuning stats: hits, false-hit overrides, latency saved
+• Thread-safe, never raises into the brain
+"""
+
+import re
+import time
+import hashlib
+import threading
+
+import numpy as np
+
+# ===================== CONFIG =====================
+
+DEFAULT_THRESHOLD = 0.92
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_TTL = 6 * 60 * 60     # seconds
+
+# Queries this short, or with one of these words, lean on the turns
+# before them
+FOLLOW_UP_MAX_WORDS = 3
+FOLLOW_UP_WORDS = frozenset({
+    "it", "its", "he", "him", "his", "she", "her", "hers", "they", "them",
+    "their", "theirs", "this", "that", "these", "those", "there", "then",
+    "one", "ones", "else", "also", "more", "again", "another", "same",
+    "former", "latter", "why", "about"
+})
+
+_WORD_RE = re.compile(r"\w+(?:'\w+)*")
+
+# Best-similarity histogram edges used for threshold tuning
+_BUCKETS = (0.80, 0.85, 0.90, 0.92, 0.94, 0.96, 0.98)
+
+
+def scope_fingerprint(*parts) -> int:
+    """
+    Folds conversation context (summary, session id, ...) into a
+    64-bit scope id. Answers only match within the same scope.
+    """
+    blob = "\x1f".join(p or "" for p in parts)
+    return int.from_bytes(hashlib.blake2b(blob.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+def is_follow_up(query: str) -> bool:
+    """
+    True when the answer to `query` likely depends on the turns before
+    it: very short queries and queries with a referring word.
+    """
+    words = _WORD_RE.findall(query.lower())
+    return len(words) <= FOLLOW_UP_MAX_WORDS or any(w in FOLLOW_UP_WORDS for w in words)
+
+
+def turns_key(turns) -> str:
+    """
+    Stable text for a list of chat turns, to fold into a scope.
+    """
+    return "\x1e".join(f"{t['role']}:{t['content']}" for t in turns)
+
+
+class SemanticCache:
+    """
+    Ring buffer of (query embedding, answer) pairs.
+    Embeddings are kept L2-normalized in one float32 matrix, so a lookup
+    is a single matrix-vector product.
+    """
+
+    def __init__(
+        self,
+        embed_fn,
+        threshold: float = DEFAULT_THRESHOLD,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl: float = DEFAULT_TTL,
+        clock=time.time
+    ):
+        self._embed = embed_fn
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self._vectors = None                      # (max_entries, dim) float32
+        self._scopes = np.zeros(max_entries, dtype=np.int64)
+        self._expires = np.zeros(max_entries, dtype=np.float64)
+        self._answers = [None] * max_entries
+        self._queries = [None] * max_entries
+        self._latency = np.zeros(max_entries, dtype=np.float64)
+        self._next = 0
+
+        self._last_hit = {}                       # session -> slot of its last served answer
+
+        self.lookups = 0
+        self.hits = 0
+        self.false_hits = 0
+        self.latency_saved = 0.0
+        self._histogram = [0] * (len(_BUCKETS) + 1)
+
+    # ===================== INTERNAL =====================
+
+    def _vector(self, text: str):
+        vec = self._embed(text)
+        if vec is None:
+            return None
+        vec = np.asarray(vec, dtype=np.float32)
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm > 0 else None
+
+    def _bucket(self, score: float):
+        for i, edge in enumerate(_BUCKETS):
+            if score < edge:
+                self._histogram[i] += 1
+                return
+        self._histogram[-1] += 1
+
+    # ===================== PUBLIC API =====================
+
+    def lookup(self, query: str, scope: int = 0, session=None):
+        """
+        Returns (answer, similarity) for the closest prior question in
+        the same scope at or above the threshold, else None. A hit is
+        remembered per session for report_false_hit().
+        """
+        try:
+            start = time.perf_counter()
+            q = self._vector(query)
+            if q is None:
+                return None
+
+            with self._lock:
+                self.lookups += 1
+                self._last_hit.pop(session, None)
+                if self._vectors is None:
+                    return None
+
+                valid = (self._scopes == scope) & (self._expires > self._clock())
+                if not valid.any():
+                    return None
+
+                scores = self._vectors @ q
+                scores[~valid] = -1.0
+                slot = int(np.argmax(scores))
+                score = float(scores[slot])
+                self._bucket(score)
+
+                if score < self.threshold:
+                    return None
+
+                self.hits += 1
+                self._last_hit[session] = slot
+                self.latency_saved += max(
+                    0.0, self._latency[slot] - (time.perf_counter() - start)
+                )
+                return self._answers[slot], score
+
+        except Exception:
+            return None
+
+    def store(self, query: str, answer: str, scope: int = 0, latency: float = 0.0):
+        """
+        Remembers an answer produced live. `latency` is what the live
+        call cost, credited to latency_saved on later hits.
+        """
+        try:
+            vec = self._vector(query)
+            if vec is None or not answer:
+                return
+
+            with self._lock:
+                if self._vectors is None:
+                    self._vectors = np.zeros((self.max_entries, vec.shape[0]), dtype=np.float32)
+
+                slot = self._next % self.max_entries
+                self._next += 1
+
+                self._vectors[slot] = vec
+                self._scopes[slot] = scope
+                self._expires[slot] = self._clock() + self.ttl
+                self._answers[slot] = answer
+                self._queries[slot] = query
+                self._latency[slot] = latency
+
+        except Exception:
+            pass
+
+    def report_false_hit(self, session=None):
+        """
+        The user rejected the last cached answer served to `session`:
+        drop it and count it.
+        """
+        with self._lock:
+            slot = self._last_hit.pop(session, None)
+            if slot is None:
+                return False
+            self._expires[slot] = 0.0
+            self.false_hits += 1
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._expires[:] = 0.0
+            self._last_hit.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            labels = (
+                [f"<{_BUCKETS[0]}"]
+                + [f"{lo}-{hi}" for lo, hi in zip(_BUCKETS, _BUCKETS[1:])]
+                + [f">={_BUCKETS[-1]}"]
+            )
+            return {
+                "entries": int((self._expires > self._clock()).sum()),
+                "threshold": self.threshold,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+                "false_hits": self.false_hits,
+                "latency_saved": round(self.latency_saved, 3),
+                "best_similarity": dict(zip(labels, self._histogram))
+            }
@@ -0,0 +1,235 @@
+# single_flight.py
+"""
+Single-Flight Request Coalescing for JARVIS
+-------------------------------------------
+• Identical in-flight LLM calls share one upstream request
+• Streamed tokens fan out to every attached caller
+• Late joiners replay tokens already received, then follow live
+• Upstream is cancelled once the last caller detaches
+• Callers iterate from threads or asyncio tasks (async for)
+• Thread-safe
+"""
+
+import asyncio
+import threading
+
+
+class _Flight:
+    __slots__ = ("tokens", "cond", "done", "result", "error", "future", "subscribers", "waiters")
+
+    def __init__(self):
+        self.tokens = []
+        self.cond = threading.Condition()
+        self.done = False
+        self.result = None
+        self.error = None
+        self.future = None
+        self.subscribers = 0
+        self.waiters = []     # (loop, future) of async iterators
+
+    def push(self, token):
+        with self.cond:
+            self.tokens.append(token)
+            self.wake()
+
+    def wake(self):
+        """
+        Wakes every iterator. Call with `cond` held.
+        """
+        self.cond.notify_all()
+        for loop, future in self.waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+        self.waiters.clear()
+
+
+class FlightStream:
+    """
+    One caller's view of a shared flight. Iterating yields every token
+    from the start of the stream; `result` is set once it finishes.
+    Threads use `for`, asyncio tasks `async for`.
+    """
+
+    def __init__(self, group, key, flight):
+        self._group = group
+        self._key = key
+        self._flight = flight
+        self._closed = False
+        self.result = None
+
+    def __iter__(self):
+        flight = self._flight
+        index = 0
+
+        while True:
+            with flight.cond:
+                while index >= len(flight.tokens) and not flight.done and not self._closed:
+                    flight.cond.wait()
+                if self._closed:
+                    return      # closed from another thread (cancellation)
+                batch = flight.tokens[index:]
+                index += len(batch)
+                finished = flight.done and index >= len(flight.tokens)
+
+            yield from batch
+
+            if finished:
+                break
+
+        if flight.error is not None:
+            raise flight.error
+        self.result = flight.result
+
+    async def __aiter__(self):
+        flight = self._flight
+        loop = asyncio.get_running_loop()
+        index = 0
+
+        while True:
+            with flight.cond:
+                waiter = None
+                if index >= len(flight.tokens) and not flight.done and not self._closed:
+                    waiter = (loop, loop.create_future())
+                    flight.waiters.append(waiter)
+                else:
+                    batch = flight.tokens[index:]
+                    index += len(batch)
+                    finished = flight.done and index >= len(flight.tokens)
+
+            if waiter:
+                try:
+                    await waiter[1]
+                finally:
+                    with flight.cond:
+                        if waiter in flight.waiters:
+                            flight.waiters.remove(waiter)
+                continue
+
+            if self._closed:
+                return
+            for token in batch:
+                yield token
+
+            if finished:
+                break
+
+        if flight.error is not None:
+            raise flight.error
+        self.result = flight.result
+
+    def close(self):
+        """
+        Detaches from the flight. Safe from any thread: an iteration in
+        progress wakes up and stops.
+        """
+        if not self._closed:
+            self._closed = True
+            self._group._detach(self._key, self._flight)
+            with self._flight.cond:
+                self._flight.wake()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SingleFlight:
+    """
+    Keyed coalescing group.
+
+    `start_fn(on_token)` must start the upstream call and return a
+    concurrent.futures.Future; it is only invoked by the first caller
+    for a key. Everyone else attaches to that flight.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+        self.leaders = 0
+        self.followers = 0
+        self.cancelled = 0
+
+    def stream(self, key, start_fn) -> FlightStream:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self.leaders += 1
+            else:
+                self.followers += 1
+            flight.subscribers += 1
+
+        if leader:
+            try:
+                future = start_fn(flight.push)
+            except BaseException as e:
+                self._finish(key, flight, None, e)
+                raise
+            flight.future = future
+            future.add_done_callback(lambda f: self._on_done(key, flight, f))
+
+        return FlightStream(self, key, flight)
+
+    def call(self, key, start_fn):
+        """
+        Non-streaming variant: returns the shared result (or raises).
+        """
+        with self.stream(key, start_fn) as s:
+            for _ in s:
+                pass
+            return s.result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": len(self._flights),
+                "leaders": self.leaders,
+                "coalesced": self.followers,
+                "cancelled": self.cancelled
+            }
+
+    # ===================== INTERNAL =====================
+
+    def _on_done(self, key, flight, future):
+        if future.cancelled():
+            self._finish(key, flight, None, InterruptedError("Upstream request cancelled"))
+            return
+        error = future.exception()
+        self._finish(key, flight, None if error else future.result(), error)
+
+    def _finish(self, key, flight, result, error):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        with flight.cond:
+            flight.result = result
+            flight.error = error
+            flight.done = True
+            flight.wake()
+
+    def _detach(self, key, flight):
+        with self._lock:
+            flight.subscribers -= 1
+            abandon = flight.subscribers <= 0 and not flight.done
+            if abandon:
+                # Nobody is listening: stop the upstream and let the
+                # next identical request start fresh.
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                self.cancelled += 1
+
+        if abandon and flight.future is not None:
+            flight.future.cancel()
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
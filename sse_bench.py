@@ -0,0 +1,179 @@
+# sse_bench.py
+"""
+SSE Decode Micro-Benchmark for JARVIS
+-------------------------------------
+• Replays recorded cassette streams (or a synthetic long answer)
+• Feeds the raw bytes in socket-sized reads
+• Compares the old line-split + json.loads path with SSEDecoder,
+  with and without the fast content path
+• Verifies every path produces the same text
+
+    python sse_bench.py                     # synthetic 2000-token answer
+    python sse_bench.py bench.jsonl -n 50   # recorded streams
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+
+from groq_client import SSEDecoder, fast_content
+from groq_standin import load_cassette
+
+READ_SIZES = (512, 4096)        # min / max bytes per simulated socket read
+
+
+# ===================== STREAMS =====================
+
+def synthetic_stream(tokens: int = 2000) -> bytes:
+    words = ("the", "quick", "brown", "fox", "jumps", "over", "a", "lazy", "dog", "—", "“ok”")
+    frames = [b": keep-alive\n\n"]
+    for i in range(tokens):
+        chunk = {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "bench",
+            "system_fingerprint": "fp_bench",
+            "choices": [{
+                "index": 0,
+                "delta": {"content": " " + words[i % len(words)]},
+                "logprobs": None,
+                "finish_reason": None
+            }]
+        }
+        frames.append(b"data: " + json.dumps(chunk, separators=(",", ":")).encode() + b"\n\n")
+    frames.append(
+        b'data: {"choices":[{"index":0,"delta":{},"finish_reason":"stop"}],'
+        b'"x_groq":{"usage":{"completion_tokens":%d}}}\n\n' % tokens
+    )
+    frames.append(b"data: [DONE]\n\n")
+    return b"".join(frames)
+
+
+def cassette_streams(path) -> list:
+    streams = []
+    for entry in load_cassette(path):
+        if entry.get("events"):
+            streams.append(b"".join(
+                b"data: " + data.encode("utf-8") + b"\n\n" for _, data in entry["events"]
+            ))
+    return streams
+
+
+def split_reads(body: bytes, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    reads, pos = [], 0
+    while pos < len(body):
+        size = rng.randint(*READ_SIZES)
+        reads.append(body[pos:pos + size])
+        pos += size
+    return reads
+
+
+# ===================== DECODERS =====================
+
+def legacy_decode(reads) -> str:
+    """
+    The pre-SSEDecoder path: iter_lines-style splitting, prefix check,
+    slice, and a full json.loads per chunk.
+    """
+    parts = []
+    pending = b""
+    for data in reads:
+        lines = (pending + data).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            line = line.rstrip(b"\r")
+            if not line or not line.startswith(b"data: "):
+                continue
+            payload = line[6:]
+            if payload == b"[DONE]":
+                return "".join(parts)
+            chunk = json.loads(payload)
+            content = (chunk.get("choices") or [{}])[0].get("delta", {}).get("content")
+            if content:
+                parts.append(content)
+    return "".join(parts)
+
+
+def decoder_decode(reads, fast: bool) -> str:
+    parts = []
+    decoder = SSEDecoder()
+    for data in reads:
+        for event in decoder.feed(data):
+            if event == b"[DONE]":
+                return "".join(parts)
+            content = fast_content(event) if fast else None
+            if content is None:
+                chunk = json.loads(event)
+                content = (chunk.get("choices") or [{}])[0].get("delta", {}).get("content")
+            if content:
+                parts.append(content)
+    return "".join(parts)
+
+
+CANDIDATES = {
+    "legacy lines + json.loads": legacy_decode,
+    "SSEDecoder + json.loads": lambda reads: decoder_decode(reads, fast=False),
+    "SSEDecoder + fast_content": lambda reads: decoder_decode(reads, fast=True)
+}
+
+
+# ===================== RUN =====================
+
+def run(streams: list, repeat: int = 20) -> dict:
+    workloads = [split_reads(body, seed=i) for i, body in enumerate(streams)]
+    total_bytes = sum(len(body) for body in streams)
+    events = sum(body.count(b"\n\ndata: ") + 1 for body in streams)
+
+    expected = [legacy_decode(reads) for reads in workloads]
+    results = {}
+
+    for name, fn in CANDIDATES.items():
+        if [fn(reads) for reads in workloads] != expected:
+            raise AssertionError(f"{name} produced different text")
+
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for reads in workloads:
+                fn(reads)
+            best = min(best, time.perf_counter() - start)
+
+        results[name] = {
+            "seconds": best,
+            "us_per_event": best / events * 1e6,
+            "mb_per_sec": total_bytes / best / 1e6
+        }
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SSE decode micro-benchmark")
+    parser.add_argument("cassettes", nargs="*", help="cassette files from groq_standin.py record")
+    parser.add_argument("-n", "--repeat", type=int, default=20)
+    parser.add_argument("--tokens", type=int, default=2000, help="synthetic stream length")
+    args = parser.parse_args(argv)
+
+    streams = []
+    for path in args.cassettes:
+        streams.extend(cassette_streams(path))
+    if not streams:
+        streams = [synthetic_stream(args.tokens)]
+
+    results = run(streams, args.repeat)
+    baseline = next(iter(results.values()))["seconds"]
+
+    print(f"📼 {len(streams)} stream(s), {sum(map(len, streams)) / 1024:.0f} KiB")
+    for name, r in results.items():
+        print(
+            f"  {name:<28} {r['us_per_event']:7.2f} µs/event  "
+            f"{r['mb_per_sec']:7.1f} MB/s  x{baseline / r['seconds']:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
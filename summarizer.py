@@ -0,0 +1,241 @@
+# summarizer.py
+"""
+Background Incremental Summarizer for JARVIS
+--------------------------------------------
+• Turns leaving the context window are handed over without blocking
+• A worker folds only the new turns into the previous summary
+• The new summary is swapped in atomically; readers never wait
+• Failed folds keep their turns and retry with backoff
+• snapshot() pairs the summary with the turns not folded into it yet,
+  so callers can keep those in the prompt until the fold lands
+• close() ends the worker thread (a dropped session's summarizer)
+• Thread-safe
+"""
+
+import time
+import threading
+
+# ===================== CONFIG =====================
+
+SUMMARY_TRIGGER_TURNS = 8              # user turns between folds
+FOLD_BATCH = 2 * SUMMARY_TRIGGER_TURNS  # pending messages (user + reply) that trigger a fold
+MAX_PENDING = 40                        # oldest pending messages are dropped past this
+RETRY_DELAY = 5.0                       # seconds; doubles per consecutive failure
+MAX_RETRY_DELAY = 60.0
+
+FOLD_INSTRUCTIONS = (
+    "Update the running conversation summary with the new turns below. "
+    "Preserve facts, names, roles, and unresolved questions. "
+    "Write in third person. Reply with the updated summary only."
+)
+
+
+def fold_messages(previous: str, turns: list) -> list:
+    """
+    Chat messages asking a model to fold `turns` into `previous`.
+    """
+    transcript = "\n".join(
+        f"{t['role'].capitalize()}: {t['content']}" for t in turns
+    )
+    return [
+        {"role": "system", "content": FOLD_INSTRUCTIONS},
+        {
+            "role": "user",
+            "content": (
+                f"Current summary:\n{previous or '(none yet)'}\n\n"
+                f"New turns:\n{transcript}"
+            )
+        }
+    ]
+
+
+class IncrementalSummarizer:
+    """
+    Rolling summary maintained off the caller's thread.
+
+        summarizer = IncrementalSummarizer(fold_fn, initial=saved_summary)
+        summarizer.add(evicted_turns)     # returns immediately
+        summarizer.summary                # latest complete summary
+        summarizer.snapshot()             # (summary, turns not in it yet)
+
+    fold_fn(previous_summary, turns) -> new summary, or "" on failure.
+    on_update(summary) is called from the worker after each swap.
+    """
+
+    def __init__(self, fold_fn, initial: str = "", on_update=None, batch: int = FOLD_BATCH):
+        self._fold_fn = fold_fn
+        self._on_update = on_update
+        self._batch = batch
+
+        self._summary = initial or ""
+        self._pending = []
+        self._in_flight = []        # turns the running fold is folding
+        self._cond = threading.Condition()
+        self._force = False
+        self._folding = False
+        self._retry_at = 0.0
+        self._failures = 0
+        self._generation = 0
+        self._closed = False
+
+        self.folds = 0
+        self.failed = 0
+        self.dropped = 0
+        self.last_fold_seconds = None
+
+        self._thread = threading.Thread(target=self._worker, daemon=True, name="Summarizer")
+        self._thread.start()
+
+    # ===================== API =====================
+
+    @property
+    def summary(self) -> str:
+        return self._summary
+
+    @property
+    def pending(self) -> list:
+        """
+        Turns handed over but not in the summary yet, oldest first
+        (including those a running fold has taken).
+        """
+        return self.snapshot()[1]
+
+    def snapshot(self) -> tuple:
+        """
+        (summary, pending turns), read together: a fold landing in
+        between cannot drop or repeat a turn.
+        """
+        with self._cond:
+            return self._summary, self._in_flight + self._pending
+
+    def add(self, turns):
+        """
+        Queues turns for folding. Copies them, so the caller may mutate
+        its history right away.
+        """
+        turns = [{"role": t["role"], "content": t["content"]} for t in turns]
+        if not turns:
+            return
+        with self._cond:
+            self._pending.extend(turns)
+            overflow = len(self._pending) - MAX_PENDING
+            if overflow > 0:
+                del self._pending[:overflow]
+                self.dropped += overflow
+            self._cond.notify()
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Folds everything pending now, regardless of batch size, and
+        waits for it. Returns False on timeout, failure or once closed.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            if self._closed:
+                return False
+            self._force = True
+            self._retry_at = 0.0
+            self._cond.notify_all()
+            while self._pending or self._folding:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+                if self._failures and not self._folding:
+                    return False
+            return True
+
+    def reset(self, summary: str = ""):
+        with self._cond:
+            self._pending.clear()
+            self._in_flight = []
+            self._summary = summary
+            self._generation += 1     # an in-progress fold is discarded
+
+    def close(self, timeout: float = None) -> bool:
+        """
+        Stops the worker once a running fold finishes; pending turns are
+        dropped. Returns False if the worker is still busy after timeout.
+        """
+        with self._cond:
+            self._closed = True
+            self._pending.clear()
+            self._in_flight = []
+            self._cond.notify_all()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "folds": self.folds,
+                "failed": self.failed,
+                "pending": len(self._pending),
+                "dropped": self.dropped,
+                "last_fold_seconds": self.last_fold_seconds
+            }
+
+    # ===================== WORKER =====================
+
+    def _ready(self) -> bool:
+        if not self._pending or time.monotonic() < self._retry_at:
+            return False
+        return self._force or len(self._pending) >= self._batch
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._closed and not self._ready():
+                    wait = self._retry_at - time.monotonic() if self._pending else None
+                    self._cond.wait(wait if wait and wait > 0 else None)
+                if self._closed:
+                    self._cond.notify_all()
+                    return
+
+                # Snapshot: the previous summary plus only the new turns
+                base = self._summary
+                delta = self._in_flight = self._pending
+                self._pending = []
+                self._folding = True
+                generation = self._generation
+
+            started = time.perf_counter()
+            try:
+                folded = self._fold_fn(base, delta)
+            except Exception as e:
+                print("Summarizer error:", repr(e))
+                folded = ""
+            elapsed = time.perf_counter() - started
+
+            with self._cond:
+                self._folding = False
+                self._in_flight = []
+                if generation != self._generation:
+                    folded = ""
+                    self._failures = 0
+                elif folded:
+                    self._summary = folded
+                    self._failures = 0
+                    self._force = bool(self._force and self._pending)
+                    self.folds += 1
+                    self.last_fold_seconds = round(elapsed, 3)
+                else:
+                    # Keep the turns for the next attempt, ahead of newer ones
+                    self._pending[:0] = delta
+                    self._failures += 1
+                    self.failed += 1
+                    self._retry_at = time.monotonic() + min(
+                        MAX_RETRY_DELAY, RETRY_DELAY * 2 ** (self._failures - 1)
+                    )
+                self._cond.notify_all()
+
+            if folded and self._on_update:
+                try:
+                    self._on_update(folded)
+                except Exception:
+                    pass
@@ -0,0 +1,93 @@
+import io
+import unittest
+
+import numpy as np
+
+import ann_index
+
+
+def clustered(n, dim=32, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(0, clusters, n)] + 0.3 * rng.normal(size=(n, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+class TestIVFIndex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.vectors = clustered(3000)
+        cls.ids = np.arange(3000)
+
+    def setUp(self):
+        self.index = ann_index.build(self.ids, self.vectors, nlist=32, nprobe=6)
+
+    def recall(self, index, queries, k=10, vectors=None, ids=None):
+        vectors = self.vectors if vectors is None else vectors
+        ids = self.ids if ids is None else ids
+        hits = 0
+        for q in queries:
+            exact = set(ids[np.argsort(-(vectors @ q))[:k]].tolist())
+            cand = index.candidates(q, k)
+            rows = np.searchsorted(ids, cand)
+            approx = cand[np.argsort(-(vectors[rows] @ q))[:k]]
+            hits += len(exact & set(approx.tolist()))
+        return hits / (k * len(queries))
+
+    def test_high_recall_scanning_few_lists(self):
+        queries = clustered(50, seed=1)
+        self.assertGreaterEqual(self.recall(self.index, queries), 0.9)
+        self.assertLess(len(self.index.candidates(queries[0], 10)), len(self.vectors) / 2)
+        self.assertEqual(len(self.index), 3000)
+
+    def test_incremental_add_is_searchable(self):
+        extra = clustered(10, seed=2)
+        self.index.add(np.arange(3000, 3010), extra)
+        self.assertIn(3004, self.index.candidates(extra[4], 1).tolist())
+        self.assertEqual(len(self.index), 3010)
+
+    def test_ids_must_increase(self):
+        with self.assertRaises(ValueError):
+            self.index.add([5], self.vectors[:1])
+
+    def test_remove_and_drop_below(self):
+        self.index.remove([7])
+        self.assertNotIn(7, self.index.candidates(self.vectors[7], 5).tolist())
+        self.index.drop_below(1000)
+        cand = self.index.candidates(self.vectors[10], 5)
+        self.assertTrue((cand >= 1000).all())
+        self.assertEqual(len(self.index), 2000)
+
+        self.index.purge()
+        self.assertEqual(self.index.stats()["stored"], 2000)
+        self.assertEqual(len(self.index), 2000)
+
+    def test_probes_more_lists_when_short(self):
+        index = ann_index.build(self.ids[:40], self.vectors[:40], nlist=16, nprobe=1)
+        self.assertGreaterEqual(len(index.candidates(self.vectors[0], 30)), 30)
+
+    def test_save_and_load(self):
+        self.index.drop_below(500)
+        buf = io.BytesIO()
+        self.index.save(buf, id_offset=-500)
+        buf.seek(0)
+        loaded = ann_index.IVFIndex.load(buf)
+
+        self.assertEqual(len(loaded), 2500)
+        self.assertEqual(loaded.last_id, 2999 - 500)
+        q = self.vectors[1234]
+        self.assertEqual(
+            sorted((loaded.candidates(q, 10) + 500).tolist()),
+            sorted(self.index.candidates(q, 10).tolist())
+        )
+
+    def test_list_count(self):
+        self.assertEqual(ann_index.list_count(10), ann_index.MIN_LISTS)
+        self.assertEqual(ann_index.list_count(1_000_000), 1000)
+        self.assertEqual(ann_index.list_count(10**8), ann_index.MAX_LISTS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+from unittest import mock
+
+import bm25_index
+from bm25_index import BM25Index, tokenize
+
+
+class TestBM25Index(unittest.TestCase):
+
+    def setUp(self):
+        self.index = BM25Index()
+        texts = [
+            "Tony likes coffee in the morning",
+            "Pepper runs the company",
+            "The reactor in the basement needs coffee filters",
+            "Happy's favourite dragons are red dragons",
+            "Tony's workshop is in the basement",
+        ]
+        for doc_id, text in enumerate(texts):
+            self.index.add(doc_id, text)
+
+    def ids(self, query, limit=5, prefix=False):
+        return [doc_id for doc_id, _ in self.index.search(query, limit, prefix=prefix)]
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("What's Tony's café-order?"), ["what's", "tony's", "café", "order"])
+
+    def test_words_in_any_order(self):
+        self.assertEqual(self.ids("basement workshop")[0], 4)
+        self.assertEqual(self.ids("workshop basement")[0], 4)
+        self.assertEqual(self.ids("nothing matches this"), [])
+
+    def test_rare_terms_outweigh_common_ones(self):
+        # "the" is everywhere; "company" is only in doc 1
+        self.assertEqual(self.ids("the company")[0], 1)
+
+    def test_term_frequency_counts(self):
+        self.index.add(5, "dragons")
+        ranked = self.index.search("dragons", 5)
+        self.assertEqual({doc_id for doc_id, _ in ranked}, {3, 5})
+
+    def test_ties_go_to_the_most_recent(self):
+        index = BM25Index()
+        for doc_id in range(10):
+            index.add(doc_id, f"fact number {doc_id}")
+        self.assertEqual([d for d, _ in index.search("fact", 3)], [9, 8, 7])
+        self.assertEqual([d for d, _ in index.search("fact number 3", 2)], [3, 9])
+
+    def test_prefix_matching(self):
+        self.assertEqual(self.ids("dragon"), [])
+        self.assertEqual(self.ids("dragon", prefix=True), [3])
+        self.assertEqual(self.ids("coff", prefix=True)[:2], [0, 2])
+        # Short tokens do not expand
+        self.assertEqual(self.ids("co", prefix=True), [])
+
+    def test_exact_word_beats_its_expansions(self):
+        index = BM25Index()
+        index.add(0, "the basement stairs")
+        index.add(1, "a base camp")
+        self.assertEqual([d for d, _ in index.search("base", 2, prefix=True)], [1, 0])
+
+    def test_drop_below_deletes_oldest(self):
+        self.index.drop_below(3)
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(self.ids("coffee"), [])
+        self.assertEqual(self.index.document_frequency("basement"), 1)
+        self.assertEqual(self.ids("basement"), [4])
+
+    def test_posting_lists_compact(self):
+        index = BM25Index()
+        for doc_id in range(100):
+            index.add(doc_id, "memory")
+        index.drop_below(90)
+        self.assertEqual(index.document_frequency("memory"), 10)
+        self.assertEqual(len(index._postings["memory"].ids), 10)
+        self.assertEqual([d for d, _ in index.search("memory", 2)], [99, 98])
+
+    def test_pruning_common_words_keeps_the_exact_ranking(self):
+        index = BM25Index()
+        for doc_id in range(400):
+            words = ["jarvis"] * (1 + doc_id % 3)
+            if doc_id % 7 == 0:
+                words.append("suit")
+            if doc_id % 50 == 0:
+                words.append("mark")
+            index.add(doc_id, " ".join(words))
+        for query in ("jarvis suit", "jarvis mark", "jarvis", "suit mark jarvis"):
+            pruned = index.search(query, 10)
+            with mock.patch.object(bm25_index, "COMMON_SHARE", 2.0):
+                full = index.search(query, 10)
+            self.assertEqual([d for d, _ in pruned], [d for d, _ in full], query)
+            for (_, a), (_, b) in zip(pruned, full):
+                self.assertAlmostEqual(a, b, places=5)
+
+    def test_ids_must_be_contiguous(self):
+        with self.assertRaises(ValueError):
+            self.index.add(7, "gap")
+
+    def test_clear_then_continue_with_later_ids(self):
+        self.index.clear()
+        self.assertEqual(self.ids("coffee"), [])
+        self.index.add(42, "fresh coffee")
+        self.assertEqual(self.ids("coffee"), [42])
+        self.index.drop_below(43)
+        self.assertEqual(self.ids("coffee"), [])
+        self.index.add(43, "more coffee")
+        self.assertEqual(self.ids("coffee"), [43])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+import time
+import threading
+import unittest
+
+import brain_session
+import cancellation
+import command_bus
+from brain_manager import BrainManager
+
+
+def classify(text, session=None):
+    if text == "stop":
+        return command_bus.CONTROL
+    if text == "yes" and session and session.confirmation_pending:
+        return command_bus.CONFIRM
+    return command_bus.QUERY
+
+
+def make_router(workers=2):
+    return brain_session.SessionRouter(
+        lambda: command_bus.CommandBus(classify, flush_words={"stop"}),
+        brain_session.Session,
+        workers=workers
+    )
+
+
+class TestSessionRouter(unittest.TestCase):
+
+    def test_sessions_are_pinned_and_spread_over_workers(self):
+        router = make_router()
+        a = router.worker_for("a")
+        b = router.worker_for("b")
+        self.assertNotEqual(a, b)
+        self.assertEqual(router.worker_for("a"), a)
+
+        router.put("ui", "first question", session_id="a")
+        router.put("ui", "second question", session_id="a")
+        first = router.get(a, timeout=0)
+        second = router.get(a, timeout=0)
+        self.assertEqual([first.text, second.text], ["first question", "second question"])
+        self.assertIs(first.session, router.session("a"))
+
+    def test_coalescing_and_flush_stay_within_a_session(self):
+        router = make_router(workers=1)
+        router.put("ui", "same question", session_id="a")
+        self.assertTrue(router.put("ui", "same question", session_id="b"))
+        self.assertFalse(router.put("ui", "same question", session_id="a"))
+
+        router.put("ui", "stop", session_id="a")
+        self.assertEqual(router.get(0, timeout=0).text, "stop")
+        remaining = router.get(0, timeout=0)
+        self.assertEqual(remaining.session.id, "b")
+        self.assertEqual(router.depths()["total"], 0)
+
+    def test_confirmation_priority_is_per_session(self):
+        router = make_router(workers=1)
+        router.session("a").pending_confirmation["active"] = True
+        router.put(("voice", "question one", "b"))
+        router.put("voice", "yes", session_id="b")
+        router.put("voice", "yes", session_id="a")
+        self.assertEqual(router.get(0, timeout=0).session.id, "a")
+
+    def test_evict_hands_old_turns_to_summarizer(self):
+        added = []
+
+        class Summarizer:
+            summary = "s"
+
+            def add(self, turns):
+                added.extend(turns)
+
+        session = brain_session.Session("a", Summarizer())
+        session.history.extend({"role": "user", "content": str(i)} for i in range(6))
+        self.assertEqual(session.evict(4), 2)
+        self.assertEqual([t["content"] for t in added], ["0", "1"])
+        self.assertEqual(len(session.history), 4)
+        self.assertEqual(session.summary, "s")
+
+    def test_snapshot_without_a_summarizer(self):
+        self.assertEqual(brain_session.Session("a").snapshot(), ("", []))
+
+    def test_drop_stops_the_summarizer_and_frees_the_worker(self):
+        closed = []
+
+        class Summarizer:
+            summary = ""
+
+            def close(self, timeout=None):
+                closed.append(timeout)
+
+        router = brain_session.SessionRouter(
+            lambda: command_bus.CommandBus(classify),
+            lambda session_id: brain_session.Session(session_id, Summarizer()),
+            workers=2
+        )
+        router.put("ui", "hello", session_id="tab-1")
+        router.put("ui", "hello", session_id="tab-2")
+        self.assertEqual(router.stats()["sessions"], 2)
+
+        self.assertTrue(router.drop("tab-1"))
+        self.assertFalse(router.drop("tab-1"))
+        self.assertEqual(closed, [0])
+        self.assertEqual([s.id for s in router.sessions()], ["tab-2"])
+        self.assertEqual(router.stats()["sessions"], 1)
+
+
+class TestWorkerPool(unittest.TestCase):
+
+    def test_independent_sessions_run_in_parallel(self):
+        router = make_router()
+        stop = threading.Event()
+        running = set()
+        overlap = threading.Event()
+        lock = threading.Lock()
+
+        def brain_loop(worker_id):
+            while not stop.is_set() and not BrainManager.should_stop():
+                try:
+                    command = router.get(worker_id, timeout=0.05)
+                except Exception:
+                    continue
+                with lock:
+                    running.add(command.session.id)
+                    if len(running) == 2:
+                        overlap.set()
+                overlap.wait(1)
+                with lock:
+                    running.discard(command.session.id)
+
+        try:
+            BrainManager.start(brain_loop, workers=2)
+            self.assertEqual(BrainManager.alive_workers(), 2)
+            router.put("ui", "a slow question", session_id="a")
+            router.put("ui", "another question", session_id="b")
+            self.assertTrue(overlap.wait(2))
+        finally:
+            stop.set()
+            deadline = time.monotonic() + 2
+            while BrainManager.alive_workers() and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertFalse(BrainManager.is_running())
+
+    def test_barge_in_cancels_only_its_session(self):
+        a = cancellation.begin("a")
+        b = cancellation.CancelToken("b")
+        with cancellation._lock:
+            cancellation._active.add(b)
+        try:
+            self.assertEqual(cancellation.cancel_active("stop", "a"), 1)
+            self.assertTrue(a.cancelled)
+            self.assertFalse(b.cancelled)
+        finally:
+            cancellation.end(a)
+            cancellation.end(b)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import time
+import threading
+import unittest
+
+import cancellation
+import command_bus
+import groq_client
+import groq_standin
+import groq_transport
+from single_flight import SingleFlight
+
+
+class TestCancelToken(unittest.TestCase):
+
+    def test_callbacks_run_once_and_can_be_removed(self):
+        token = cancellation.CancelToken()
+        calls = []
+        token.add_callback(lambda: calls.append("a"))
+        remove = token.add_callback(lambda: calls.append("b"))
+        remove()
+
+        self.assertTrue(token.cancel("stop"))
+        self.assertFalse(token.cancel("again"))
+        self.assertEqual(calls, ["a"])
+        self.assertEqual(token.reason, "stop")
+
+        token.add_callback(lambda: calls.append("late"))
+        self.assertEqual(calls, ["a", "late"])
+        with self.assertRaises(cancellation.TurnCancelled):
+            token.raise_if_cancelled()
+
+    def test_cancel_active_and_latency(self):
+        token = cancellation.begin()
+        self.assertIs(cancellation.current(), token)
+        self.assertEqual(cancellation.cancel_active("barge-in"), 1)
+
+        latency = cancellation.end(token)
+        self.assertIsNotNone(latency)
+        self.assertIsNone(cancellation.current())
+        self.assertEqual(cancellation.cancel_active("nothing running"), 0)
+        self.assertGreaterEqual(cancellation.stats()["cancellations"], 1)
+
+
+class TestStreamCancellation(unittest.TestCase):
+
+    def test_close_from_other_thread_drops_http_stream(self):
+        server = groq_standin.StandinServer(ttft=0.0, inter_token=0.05, reply=" ".join(["w"] * 100))
+        with server:
+            transport = groq_transport.GroqTransport("k", base_url=server.base_url)
+            token = cancellation.CancelToken()
+            received = []
+
+            with SingleFlight().stream(
+                "key",
+                lambda on_token: groq_client.submit({"model": "m", "stream": True}, 5, on_token, transport)
+            ) as tokens:
+                token.add_callback(tokens.close)
+                threading.Timer(0.2, token.cancel).start()
+                for t in tokens:
+                    received.append(t)
+
+            freed = token.latency()
+            self.assertLess(freed, 0.05)
+            self.assertLess(len(received), 100)
+
+            deadline = time.monotonic() + 2
+            while server.stats()["disconnects"] == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(server.stats()["disconnects"], 1)
+            self.assertEqual(transport.pool.idle_count(), 0)
+
+
+class TestBargeInHook(unittest.TestCase):
+
+    def test_priority_commands_fire_hook_on_arrival(self):
+        fired = []
+        bus = command_bus.CommandBus(
+            lambda text: command_bus.CONTROL if text == "stop" else command_bus.QUERY,
+            on_priority=fired.append
+        )
+        bus.put("voice", "what is a quasar")
+        bus.put("voice", "stop")
+        self.assertEqual([c.text for c in fired], ["stop"])
+
+
+if __name__ == "__main__":
+    unittest.main()
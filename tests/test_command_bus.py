@@ -0,0 +1,71 @@
+import time
+import queue
+import unittest
+
+import command_bus
+
+
+def classify(text):
+    if text.lower() in {"stop", "pause"}:
+        return command_bus.CONTROL
+    if text.lower() in {"yes", "no"}:
+        return command_bus.CONFIRM
+    return command_bus.QUERY
+
+
+class TestCommandBus(unittest.TestCase):
+
+    def setUp(self):
+        self.bus = command_bus.CommandBus(
+            classify,
+            accept_fn=lambda text: len(text.split()) > 1,
+            flush_words={"stop"},
+            max_queries=3
+        )
+
+    def test_control_and_confirm_jump_the_line(self):
+        self.bus.put("ui", "first question here")
+        self.bus.put("voice", "yes")
+        self.bus.put("voice", "pause")
+
+        order = [self.bus.get(0).text for _ in range(3)]
+        self.assertEqual(order, ["pause", "yes", "first question here"])
+        with self.assertRaises(queue.Empty):
+            self.bus.get(0.01)
+
+    def test_filters_and_coalesces_on_arrival(self):
+        self.assertFalse(self.bus.put("voice", "hmm"))
+        self.assertTrue(self.bus.put("voice", "what is a pulsar"))
+        self.assertFalse(self.bus.put("ui", "What is a pulsar"))
+        self.assertTrue(self.bus.put("voice", "yes"))     # never filtered
+
+        self.assertEqual(self.bus.depths(), {"control": 0, "confirm": 1, "query": 1, "total": 2})
+        stats = self.bus.stats()
+        self.assertEqual((stats["filtered"], stats["coalesced"]), (1, 1))
+
+    def test_full_bus_sheds_oldest_question(self):
+        for i in range(5):
+            self.assertTrue(self.bus.put(("voice", f"question number {i}")))
+        self.assertEqual([self.bus.get(0).text for _ in range(3)],
+                         ["question number 2", "question number 3", "question number 4"])
+        self.assertEqual(self.bus.stats()["shed"], 2)
+
+    def test_stale_questions_dropped(self):
+        self.bus.max_age = 0.05
+        self.bus.put("voice", "old question here")
+        time.sleep(0.1)
+        self.bus.put("voice", "new question here")
+        self.assertEqual(self.bus.get(0).text, "new question here")
+        self.assertEqual(self.bus.stats()["stale"], 1)
+
+    def test_stop_flushes_queued_questions(self):
+        self.bus.put("voice", "long question one")
+        self.bus.put("voice", "long question two")
+        self.bus.put("voice", "stop")
+        self.assertEqual(self.bus.depths()["total"], 1)
+        self.assertEqual(self.bus.get(0).text, "stop")
+        self.assertEqual(self.bus.stats()["flushed"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import time
+import asyncio
+import unittest
+
+import context_gather
+
+
+async def after(seconds, value):
+    await asyncio.sleep(seconds)
+    return value
+
+
+async def fail():
+    raise RuntimeError("embedding model unavailable")
+
+
+class TestGather(unittest.TestCase):
+
+    def test_stages_run_concurrently(self):
+        started = time.perf_counter()
+        results, timings, late = asyncio.run(context_gather.gather(
+            {"memories": after(0.1, ["m"]), "level": after(0.1, "deep")},
+            deadline=1.0
+        ))
+        self.assertLess(time.perf_counter() - started, 0.18)
+        self.assertEqual(results, {"memories": ["m"], "level": "deep"})
+        self.assertEqual(late, [])
+        self.assertEqual(set(timings), {"memories", "level", "total"})
+
+    def test_late_stage_falls_back_and_is_cancelled(self):
+        cancelled = []
+
+        async def slow_memories():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def run():
+            result = await context_gather.gather(
+                {"memories": slow_memories(), "entity": after(0, "Paris")},
+                deadline=0.05,
+                defaults={"memories": []}
+            )
+            await asyncio.sleep(0)
+            return result
+
+        started = time.perf_counter()
+        results, timings, late = asyncio.run(run())
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual(results, {"memories": [], "entity": "Paris"})
+        self.assertEqual(late, ["memories"])
+        self.assertNotIn("memories", timings)
+        self.assertEqual(cancelled, [True])
+
+    def test_failing_stage_uses_default(self):
+        results, _, late = asyncio.run(context_gather.gather(
+            {"memories": fail(), "level": after(0, "fast")},
+            defaults={"memories": []}
+        ))
+        self.assertEqual(results, {"memories": [], "level": "fast"})
+        self.assertEqual(late, [])
+
+    def test_format_timings(self):
+        line = context_gather.format_timings({"memories": 0.2, "total": 0.3}, ["entity"])
+        self.assertIn("memories 0.200", line)
+        self.assertIn("late: entity", line)
+
+
+if __name__ == "__main__":
+    unittest.main()
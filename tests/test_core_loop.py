@@ -0,0 +1,132 @@
+import time
+import asyncio
+import threading
+import unittest
+
+import cancellation
+import command_bus
+import core_loop
+from brain_manager import BrainManager
+from single_flight import SingleFlight
+
+
+def run(coro, timeout=2):
+    return core_loop.spawn(coro).result(timeout)
+
+
+class TestCoreLoop(unittest.TestCase):
+
+    def test_run_blocking_carries_the_turn_context(self):
+        async def turn():
+            token = cancellation.begin("s")
+            try:
+                seen = await core_loop.run_blocking("tools", cancellation.current)
+                name = await core_loop.run_blocking("tools", lambda: threading.current_thread().name)
+                return token, seen, name
+            finally:
+                cancellation.end(token)
+
+        token, seen, name = run(turn())
+        self.assertIs(seen, token)
+        self.assertTrue(name.startswith("jarvis-tools"))
+
+    def test_each_task_has_its_own_current_turn(self):
+        async def turn(session):
+            token = cancellation.begin(session)
+            await asyncio.sleep(0.01)
+            try:
+                return cancellation.current().session
+            finally:
+                cancellation.end(token)
+
+        async def both():
+            return await asyncio.gather(turn("a"), turn("b"))
+
+        self.assertEqual(run(both()), ["a", "b"])
+
+    def test_every_stops_with_its_event(self):
+        stop = threading.Event()
+        ticks = []
+        future = core_loop.every(0.01, lambda: ticks.append(1), stop)
+        time.sleep(0.1)
+        stop.set()
+        future.result(1)
+        self.assertGreater(len(ticks), 2)
+
+
+class TestAsyncConsumers(unittest.TestCase):
+
+    def test_bus_aget_wakes_on_put_without_polling(self):
+        bus = command_bus.CommandBus(lambda text: command_bus.QUERY)
+        future = core_loop.spawn(bus.aget())
+        time.sleep(0.05)
+        self.assertFalse(future.done())
+
+        put_at = time.perf_counter()
+        bus.put("ui", "what is a magnetar")
+        command = future.result(1)
+        self.assertEqual(command.text, "what is a magnetar")
+        self.assertLess(time.perf_counter() - put_at, 0.05)
+
+    def test_cancelled_aget_does_not_strand_commands(self):
+        bus = command_bus.CommandBus(lambda text: command_bus.QUERY)
+        first = core_loop.spawn(bus.aget())
+        time.sleep(0.02)
+        first.cancel()
+        time.sleep(0.02)
+        bus.put("ui", "kept question")
+        self.assertEqual(run(bus.aget()).text, "kept question")
+
+    def test_flight_stream_async_iteration(self):
+        flights = SingleFlight()
+
+        async def consume():
+            def start(on_token):
+                async def produce():
+                    for t in ("a", "b", "c"):
+                        await asyncio.sleep(0.005)
+                        on_token(t)
+                    return "abc"
+                return core_loop.spawn(produce())
+
+            with flights.stream("k", start) as tokens:
+                received = [t async for t in tokens]
+            return received, tokens.result
+
+        self.assertEqual(run(consume()), (["a", "b", "c"], "abc"))
+
+
+class TestAsyncWorkers(unittest.TestCase):
+
+    def test_coroutine_brain_runs_as_tasks_and_restart_cancels_them(self):
+        started = []
+
+        async def brain_loop(worker_id):
+            started.append(worker_id)
+            await asyncio.Event().wait()
+
+        try:
+            BrainManager.start(brain_loop, workers=2)
+            deadline = time.monotonic() + 1
+            while len(started) < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(sorted(started), [0, 1])
+            self.assertTrue(BrainManager.is_running())
+
+            BrainManager.restart(brain_loop)
+            deadline = time.monotonic() + 1
+            while len(started) < 4 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(len(started), 4)
+            self.assertEqual(BrainManager.alive_workers(), 2)
+        finally:
+            for worker in list(BrainManager._workers.values()):
+                worker.handle.cancel()
+            deadline = time.monotonic() + 1
+            while BrainManager.alive_workers() and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertFalse(BrainManager.is_running())
+
+
+if __name__ == "__main__":
+    unittest.main()
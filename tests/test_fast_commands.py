@@ -0,0 +1,55 @@
+import asyncio
+import threading
+import unittest
+from unittest import mock
+
+import main
+
+
+class TestFastCommands(unittest.TestCase):
+
+    def match(self, query):
+        intent = main.fast_commands.match(query)
+        return intent.name if intent else None
+
+    def test_time_phrasings(self):
+        for query in (
+            "what time is it", "what is the time", "What's the time?",
+            "jarvis, what's the current time", "time please"
+        ):
+            self.assertEqual(self.match(query), "time", query)
+        self.assertTrue(main.fast_commands.dispatch("time please")[1].startswith("The time is"))
+
+    def test_questions_about_time_go_to_the_llm(self):
+        for query in (
+            "how much time does it take to boil an egg",
+            "what is the best time to visit japan",
+            "what is the time complexity of quicksort",
+            "sometimes I wonder"
+        ):
+            self.assertIsNone(self.match(query), query)
+
+    def test_other_commands_still_match_anywhere(self):
+        self.assertEqual(self.match("take a screenshot this time"), "vision")
+
+    def test_memory_commands_run_off_the_loop(self):
+        threads = []
+
+        def record(result=None):
+            threads.append(threading.current_thread())
+            return result
+
+        async def run(query):
+            _, reply = main.fast_commands.dispatch(query)
+            return await reply
+
+        with mock.patch.object(main.memory_manager, "size", lambda: record(7)), \
+                mock.patch.object(main.memory_manager, "clear", record):
+            self.assertEqual(asyncio.run(run("how many memories")), "I remember 7 things.")
+            self.assertEqual(asyncio.run(run("clear your memory")), "My memory has been cleared.")
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.main_thread(), threads)
+
+
+if __name__ == "__main__":
+    unittest.main()
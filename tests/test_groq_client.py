@@ -0,0 +1,219 @@
+import json
+import asyncio
+import threading
+import unittest
+
+import groq_client
+import groq_transport
+
+
+def _sse(*events):
+    return b"".join(b"data: " + json.dumps(e).encode() + b"\n\n" for e in events)
+
+
+class _CannedServer:
+    """
+    Replies to every request with the next canned
+    (status, content_type, body[, delay]) tuple.
+    """
+
+    def __init__(self):
+        self.replies = []
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        self.server = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self.handle, "127.0.0.1", 0), self.loop
+        ).result()
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def handle(self, reader, writer):
+        while True:
+            if not await reader.readline():
+                break
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+
+            status, content_type, body, *delay = self.replies.pop(0)
+            if delay:
+                await asyncio.sleep(delay[0])
+            writer.write(
+                f"HTTP/1.1 {status} X\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nRetry-After: 3\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        writer.close()
+
+
+class TestSSEDecoder(unittest.TestCase):
+
+    def test_split_chunks_comments_and_multiline(self):
+        decoder = groq_client.SSEDecoder()
+        events = []
+        stream = b": keep-alive\n\ndata: {\"a\":\r\ndata: 1}\r\n\r\ndata: [DONE]\n\n"
+        for i in range(0, len(stream), 3):
+            events.extend(decoder.feed(stream[i:i + 3]))
+        self.assertEqual(events, [b'{"a":\n1}', b"[DONE]"])
+
+    def test_data_without_space_and_unknown_fields(self):
+        decoder = groq_client.SSEDecoder()
+        events = decoder.feed(b"event: x\nid: 1\ndata:abc\n\ndata: partial")
+        self.assertEqual(events, [b"abc"])
+        self.assertEqual(decoder.feed(b"\r\n\r\n"), [b"partial"])
+
+
+class TestFastContent(unittest.TestCase):
+
+    def chunk(self, delta, finish=None, **extra):
+        data = {"model": "m", "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+        data.update(extra)
+        return json.dumps(data, separators=(",", ":")).encode()
+
+    def test_plain_delta(self):
+        self.assertEqual(groq_client.fast_content(self.chunk({"content": "Hi"})), "Hi")
+        self.assertEqual(
+            groq_client.fast_content(json.dumps(
+                {"choices": [{"delta": {"content": "spaced"}, "finish_reason": None}]}
+            ).encode()),
+            "spaced"
+        )
+
+    def test_escapes_match_json(self):
+        text = 'say "content":"x" \\ \u00e9 ☃\n"finish_reason":null'
+        event = self.chunk({"content": text})
+        self.assertEqual(groq_client.fast_content(event), text)
+        event = json.dumps({"choices": [{"delta": {"content": "é"}, "finish_reason": None}]}).encode()
+        self.assertEqual(groq_client.fast_content(event), "é")
+
+    def test_falls_back_for_everything_else(self):
+        for event in (
+            self.chunk({"content": "x"}, finish="stop"),
+            self.chunk({"content": None}),
+            self.chunk({}, x_groq={"usage": {"completion_tokens": 1}}),
+            self.chunk({"tool_calls": [{"index": 0}]}),
+            json.dumps({"choices": [
+                {"delta": {"content": "a"}, "finish_reason": None},
+                {"delta": {"content": "b"}, "finish_reason": None}
+            ]}).encode()
+        ):
+            self.assertIsNone(groq_client.fast_content(event), event)
+
+
+class TestComplete(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = _CannedServer()
+        cls.transport = groq_transport.GroqTransport(
+            "k", base_url=f"http://127.0.0.1:{cls.server.port}/openai/v1"
+        )
+
+    def test_json_body(self):
+        body = json.dumps({
+            "model": "m",
+            "choices": [{"message": {"content": "Hi."}, "finish_reason": "stop"}],
+            "usage": {"total_tokens": 7}
+        }).encode()
+        self.server.replies.append((200, "application/json", body))
+
+        result = groq_client.complete({"model": "m", "messages": []}, 5, self.transport)
+        self.assertEqual(result.text, "Hi.")
+        self.assertEqual(result.finish_reason, "stop")
+        self.assertEqual(result.usage["total_tokens"], 7)
+        self.assertFalse(result.streamed)
+        self.assertIsNotNone(result.timings["first_token"])
+
+    def test_sse_body_streams_tokens(self):
+        body = _sse(
+            {"choices": [{"delta": {"content": "Hel"}}]},
+            {"choices": [{"delta": {"content": "lo"}, "finish_reason": "stop"}],
+             "x_groq": {"usage": {"completion_tokens": 2}}}
+        ) + b"data: [DONE]\n\n"
+        self.server.replies.append((200, "text/event-stream", body))
+
+        with groq_client.stream({"model": "m", "stream": True}, 5, self.transport) as s:
+            tokens = list(s)
+
+        self.assertEqual(tokens, ["Hel", "lo"])
+        self.assertEqual(s.result.text, "Hello")
+        self.assertEqual(s.result.usage["completion_tokens"], 2)
+        self.assertTrue(s.result.streamed)
+
+    def test_error_status_raises(self):
+        self.server.replies.append((429, "application/json", b"{}"))
+        with self.assertRaises(groq_client.CompletionError) as ctx:
+            groq_client.complete({"model": "m"}, 5, self.transport)
+        self.assertEqual(ctx.exception.status_code, 429)
+        self.assertEqual(ctx.exception.retry_after, 3.0)
+
+
+class TestHedging(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = _CannedServer()
+        cls.transport = groq_transport.GroqTransport(
+            "k", base_url=f"http://127.0.0.1:{cls.server.port}/openai/v1"
+        )
+
+    def reply(self, word, delay=0.0):
+        body = _sse({"choices": [{"delta": {"content": word}}]}) + b"data: [DONE]\n\n"
+        return (200, "text/event-stream", body, delay)
+
+    def run_hedged(self, hedge_after, admit_backup=None):
+        tokens = []
+        future = groq_client.submit_hedged(
+            {"model": "m", "stream": True},
+            5,
+            tokens.append,
+            hedge_after=hedge_after,
+            transport=self.transport,
+            admit_backup=admit_backup
+        )
+        return future.result(5), tokens
+
+    def test_backup_wins_against_slow_primary(self):
+        before = groq_client.hedge_stats()
+        self.server.replies += [self.reply("slow", delay=1.0), self.reply("fast")]
+
+        result, tokens = self.run_hedged(hedge_after=0.05)
+
+        self.assertEqual(tokens, ["fast"])
+        self.assertEqual(result.hedge, "backup")
+        after = groq_client.hedge_stats()
+        self.assertEqual(after["fired"] - before["fired"], 1)
+        self.assertEqual(after["backup_won"] - before["backup_won"], 1)
+
+    def test_fast_primary_never_hedges(self):
+        before = groq_client.hedge_stats()
+        self.server.replies.append(self.reply("quick"))
+
+        result, tokens = self.run_hedged(hedge_after=2.0)
+
+        self.assertEqual(tokens, ["quick"])
+        self.assertIsNone(result.hedge)
+        self.assertEqual(groq_client.hedge_stats()["fired"], before["fired"])
+
+    def test_denied_backup_is_not_sent(self):
+        before = groq_client.hedge_stats()
+        self.server.replies.append(self.reply("slow", delay=0.3))
+        asked = []
+
+        result, tokens = self.run_hedged(hedge_after=0.05, admit_backup=lambda: asked.append(1))
+
+        self.assertEqual(asked, [1])
+        self.assertEqual(tokens, ["slow"])
+        self.assertIsNone(result.hedge)
+        after = groq_client.hedge_stats()
+        self.assertEqual(after["fired"], before["fired"])
+        self.assertEqual(after["denied"] - before["denied"], 1)
+        self.assertEqual(self.server.replies, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
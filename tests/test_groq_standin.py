@@ -0,0 +1,93 @@
+import os
+import json
+import tempfile
+import unittest
+
+import groq_client
+import groq_standin
+import groq_transport
+
+PAYLOAD = {
+    "model": "m",
+    "messages": [{"role": "user", "content": "hi"}],
+    "stream": True
+}
+
+
+def transport_for(server):
+    return groq_transport.GroqTransport("k", base_url=server.base_url)
+
+
+class TestStandinServer(unittest.TestCase):
+
+    def test_streams_synthetic_reply_with_ttft(self):
+        with groq_standin.StandinServer(ttft=0.1, inter_token=0.0, reply="one two three") as server:
+            result = groq_client.complete(PAYLOAD, 5, transport_for(server))
+
+        self.assertEqual(result.text, "one two three")
+        self.assertTrue(result.streamed)
+        self.assertEqual(result.finish_reason, "stop")
+        self.assertEqual(result.usage["completion_tokens"], 3)
+        self.assertGreaterEqual(result.timings["first_token"], 0.1)
+
+    def test_json_reply_respects_max_tokens(self):
+        with groq_standin.StandinServer(ttft=0.0, inter_token=0.0, reply="a b c d") as server:
+            result = groq_client.complete(
+                dict(PAYLOAD, stream=False, max_tokens=2), 5, transport_for(server)
+            )
+        self.assertEqual(result.text, "a b")
+        self.assertFalse(result.streamed)
+
+    def test_injected_rate_limit(self):
+        with groq_standin.StandinServer(rate_limit_rate=1.0, retry_after=4) as server:
+            with self.assertRaises(groq_client.CompletionError) as ctx:
+                groq_client.complete(PAYLOAD, 5, transport_for(server))
+            self.assertEqual(server.stats()["rate_limited"], 1)
+
+        self.assertEqual(ctx.exception.status_code, 429)
+        self.assertEqual(ctx.exception.retry_after, 4.0)
+
+
+class TestCassettes(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_record_then_replay(self):
+        with groq_standin.StandinServer(ttft=0.05, inter_token=0.01, reply="recorded reply") as live:
+            recorder = groq_standin.CassetteRecorder(self.path, transport_for(live))
+            entry = recorder.record(PAYLOAD)
+
+        self.assertEqual(entry["status"], 200)
+        self.assertEqual(entry["events"][-1][1], "[DONE]")
+        self.assertEqual(groq_standin.load_cassette(self.path)[0]["key"],
+                         groq_standin.cassette_key(PAYLOAD))
+
+        with groq_standin.StandinServer(cassette=self.path, reply="never used") as replay:
+            result = groq_client.complete(PAYLOAD, 5, transport_for(replay))
+
+        self.assertEqual(result.text, "recorded reply")
+        self.assertGreaterEqual(result.timings["first_token"], 0.04)
+
+    def test_unknown_request_gets_next_recording(self):
+        entry = {
+            "key": "other",
+            "status": 200,
+            "headers": {"content-type": "application/json"},
+            "ttfb": 0.0,
+            "body": json.dumps({"choices": [{"message": {"content": "canned"}}]})
+        }
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+        with groq_standin.StandinServer(cassette=self.path) as replay:
+            result = groq_client.complete(PAYLOAD, 5, transport_for(replay))
+        self.assertEqual(result.text, "canned")
+
+
+if __name__ == "__main__":
+    unittest.main()
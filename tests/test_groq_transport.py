@@ -0,0 +1,152 @@
+import json
+import time
+import asyncio
+import threading
+import unittest
+
+import groq_transport
+
+
+class _KeepAliveServer:
+    """
+    Minimal HTTP/1.1 server: JSON bodies with Content-Length,
+    SSE bodies with chunked transfer encoding.
+    """
+
+    def __init__(self):
+        self.connections = 0
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        self.server = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self.handle, "127.0.0.1", 0), self.loop
+        ).result()
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode().partition(":")
+                headers[name.strip().lower()] = value.strip()
+            payload = json.loads(await reader.readexactly(int(headers["content-length"])))
+
+            if payload.get("stream"):
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: text/event-stream\r\n"
+                    b"Transfer-Encoding: chunked\r\n\r\n"
+                )
+                for word in ("Hello", " there"):
+                    event = f'data: {{"choices":[{{"delta":{{"content":"{word}"}}}}]}}\n\n'.encode()
+                    writer.write(b"%x\r\n%s\r\n" % (len(event), event))
+                done = b"data: [DONE]\n\n"
+                writer.write(b"%x\r\n%s\r\n0\r\n\r\n" % (len(done), done))
+            else:
+                body = json.dumps({"echo": payload["messages"][0]["content"]}).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: %d\r\n\r\n%s" % (len(body), body)
+                )
+            await writer.drain()
+        writer.close()
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.server.close)
+
+
+class TestGroqTransport(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = _KeepAliveServer()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.close()
+
+    def make_transport(self):
+        return groq_transport.GroqTransport(
+            "test-key", base_url=f"http://127.0.0.1:{self.server.port}/openai/v1"
+        )
+
+    def test_connection_is_reused(self):
+        transport = self.make_transport()
+        before = self.server.connections
+
+        for i in range(5):
+            r = transport.post(
+                groq_transport.CHAT_PATH,
+                {"messages": [{"role": "user", "content": f"hi {i}"}]},
+                timeout=5
+            )
+            self.assertEqual(r.status_code, 200)
+            self.assertEqual(r.json()["echo"], f"hi {i}")
+
+        self.assertEqual(self.server.connections - before, 1)
+        stats = transport.stats()
+        self.assertEqual(stats["connections_opened"], 1)
+        self.assertEqual(stats["connections_reused"], 4)
+
+    def test_post_times_out_while_the_loop_is_stalled(self):
+        transport = self.make_transport()
+        loop = groq_transport.get_loop()
+        release = threading.Event()
+        loop.call_soon_threadsafe(release.wait, 5)
+        try:
+            started = time.perf_counter()
+            with self.assertRaises(TimeoutError):
+                transport.post(
+                    groq_transport.CHAT_PATH,
+                    {"messages": [{"role": "user", "content": "stalled"}]},
+                    timeout=0.2
+                )
+            self.assertLess(time.perf_counter() - started, 1.0)
+        finally:
+            release.set()
+
+    def test_stream_lines_and_timings(self):
+        transport = self.make_transport()
+        payload = {"stream": True, "messages": [{"role": "user", "content": "x"}]}
+
+        with transport.stream(groq_transport.CHAT_PATH, payload, timeout=5) as r:
+            r.raise_for_status()
+            lines = [line for line in r.iter_lines() if line]
+
+        self.assertEqual(lines[-1], b"data: [DONE]")
+        self.assertEqual(len(lines), 3)
+
+        timings = transport.recent_timings()[-1]
+        for key in ("connect", "ttfb", "total"):
+            self.assertIsNotNone(timings[key])
+        self.assertGreaterEqual(timings["total"], timings["ttfb"])
+
+        # Fully drained stream returns its socket to the pool
+        self.assertEqual(transport.pool.idle_count(), 1)
+
+    def test_warm_preopens_one_socket_for_the_next_request(self):
+        transport = self.make_transport()
+        before = self.server.connections
+
+        self.assertGreater(groq_transport.run_sync(transport.awarm(), 5), 0.0)
+        self.assertEqual(groq_transport.run_sync(transport.awarm(), 5), 0.0)
+        self.assertEqual(transport.pool.idle_count(), 1)
+
+        r = transport.post(
+            groq_transport.CHAT_PATH,
+            {"messages": [{"role": "user", "content": "warm"}]},
+            timeout=5
+        )
+        self.assertEqual(r.json()["echo"], "warm")
+        self.assertEqual(self.server.connections - before, 1)
+        self.assertEqual(transport.recent_timings()[-1]["connect"], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+from intent_dispatcher import IntentDispatcher, tokenize
+
+
+def make_dispatcher():
+    d = IntentDispatcher()
+    d.register("time", ["what time", "current time"], lambda q: "time")
+    d.register("vision", ["screen"], lambda q: "vision")
+    d.register("memory_count", ["how many memories"], lambda q: "count")
+    d.register("shutdown", ["shut down"], lambda q: "bye", priority=10)
+    return d
+
+
+class TestIntentDispatcher(unittest.TestCase):
+
+    def test_matches_whole_words_only(self):
+        d = make_dispatcher()
+        self.assertIsNone(d.match("what's the screenplay of Alien"))
+        self.assertIsNone(d.match("sometimes I wonder"))
+        self.assertEqual(d.match("what's on my screen?").name, "vision")
+        self.assertEqual(d.match("What TIME is it").name, "time")
+
+    def test_priority_then_longest_phrase_wins(self):
+        d = make_dispatcher()
+        self.assertEqual(d.match("what time should I shut down the screen").name, "shutdown")
+
+        d.register("memory_any", ["memories"], lambda q: "any")
+        self.assertEqual(d.match("how many memories do you have").name, "memory_count")
+
+    def test_overlapping_phrases_found_through_failure_links(self):
+        d = IntentDispatcher()
+        d.register("long", ["a b c d"], lambda q: "long")
+        d.register("inner", ["b c"], lambda q: "inner")
+        self.assertEqual(d.match("a b c x").name, "inner")
+        self.assertEqual(d.match("a a b c d").name, "long")
+
+    def test_dispatch_runs_handler_and_counts_hits(self):
+        d = make_dispatcher()
+        intent, result = d.dispatch("how many memories")
+        self.assertEqual((intent.name, result), ("memory_count", "count"))
+        self.assertIsNone(d.dispatch("tell me a joke"))
+
+        stats = d.stats()
+        self.assertEqual(stats["hits"]["memory_count"], 1)
+        self.assertEqual((stats["lookups"], stats["misses"]), (2, 1))
+
+    def test_registration_recompiles(self):
+        d = make_dispatcher()
+        self.assertIsNone(d.match("wake up"))
+        d.register("wake", "wake up", lambda q: "hi")
+        self.assertEqual(d.match("please wake up").name, "wake")
+        self.assertTrue(d.unregister("wake"))
+        self.assertIsNone(d.match("please wake up"))
+
+    def test_anchored_phrase_must_end_the_query(self):
+        d = IntentDispatcher()
+        d.register("clock", ["what is the time$"], lambda q: "clock")
+        self.assertEqual(d.match("jarvis, what is the time?").name, "clock")
+        self.assertIsNone(d.match("what is the time complexity of quicksort"))
+        with self.assertRaises(ValueError):
+            d.register("empty", ["$"], lambda q: None)
+
+    def test_tokenize_keeps_contractions(self):
+        self.assertEqual(tokenize("What's the TIME?"), ["what's", "the", "time"])
+
+
+if __name__ == "__main__":
+    unittest.main()
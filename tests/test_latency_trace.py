@@ -0,0 +1,77 @@
+import os
+import time
+import tempfile
+import unittest
+
+import latency_trace
+
+
+class TestLatencyTrace(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "latency.jsonl")
+        self.tracer = latency_trace.LatencyTracer(self.path)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_queue_wait_and_spans(self):
+        trace = self.tracer.begin("ui", "hello", enqueued_at=time.perf_counter() - 0.5)
+        self.assertIs(self.tracer.current(), trace)
+        with trace.span("memory_retrieval"):
+            pass
+        trace.mark("first_token")
+        trace.mark("first_token")
+        trace.mark("last_token", overwrite=True)
+        trace.tokens(1)
+        trace.close()
+
+        record = self.tracer.recent(1)[0]
+        self.assertGreaterEqual(record["queue_wait"], 0.5)
+        self.assertIn("memory_retrieval", record)
+        self.assertEqual(record["outcome"], "ok")
+        self.assertEqual(len(record["request_id"]), 12)
+        self.assertIsNone(self.tracer.current())
+
+        self.assertEqual(latency_trace.load_records(self.path), [record])
+
+    def test_commit_waits_for_playback(self):
+        trace = self.tracer.begin("ui", "hi")
+        trace.speech_queued()
+        trace.speech_queued()
+        trace.close()
+        self.assertEqual(self.tracer.recent(), [])
+
+        trace.audio_started()
+        trace.speech_done()
+        self.assertEqual(self.tracer.recent(), [])
+        trace.speech_done()
+
+        record = self.tracer.recent(1)[0]
+        self.assertLessEqual(record["first_speak"], record["first_audio"])
+        self.assertLessEqual(record["first_audio"], record["playback_end"])
+
+    def test_summary_percentiles(self):
+        for i in range(1, 101):
+            trace = self.tracer.begin("ui", str(i))
+            trace.set("first_audio", float(i))
+            trace.close()
+
+        stats = self.tracer.summary()["first_audio"]
+        self.assertEqual(stats["count"], 100)
+        self.assertEqual(stats["p50"], 51.0)
+        self.assertEqual(stats["p95"], 95.0)
+        self.assertEqual(stats["p99"], 99.0)
+
+    def test_log_rolls_over(self):
+        tracer = latency_trace.LatencyTracer(self.path, max_bytes=200)
+        for i in range(5):
+            tracer.begin("ui", "x" * 100).close()
+
+        self.assertTrue(os.path.exists(self.path + ".1"))
+        self.assertLess(len(latency_trace.load_records(self.path)), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,17 +1,50 @@
-import os
+import queue
+import shutil
+import tempfile
+import time
 import unittest
+from pathlib import Path
+from unittest import mock
+
 import memory_manager
+from memory_store import MemoryStore
 from hybrid_memory import hybrid_memory_search
 
 
+def wait_for_size(n, timeout=10):
+    deadline = time.monotonic() + timeout
+    while memory_manager.size() < n:
+        if time.monotonic() > deadline:
+            raise AssertionError(f"memory worker stored {memory_manager.size()} of {n}")
+        time.sleep(0.01)
+
+
 class TestMemoryRegression(unittest.TestCase):
 
-    @classmethod
-    def setUpClass(cls):
-        memory_manager.MEMORY_FILE = "test_memory_regression.json"
-        if os.path.exists(memory_manager.MEMORY_FILE):
-            os.remove(memory_manager.MEMORY_FILE)
+    def setUp(self):
+        # Each test gets its own files and store; the module's own state
+        # comes back when the patches stop
+        self.dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        for name, value in (
+            ("MEMORY_FILE", self.dir / "test_memory_regression.json"),
+            ("_memory", MemoryStore()),
+            ("_wal", None),
+            ("_compact_due", False)
+        ):
+            patcher = mock.patch.object(memory_manager, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        # Adds queued by earlier tests must not land in this store
+        while True:
+            try:
+                memory_manager._memory_queue.get_nowait()
+            except queue.Empty:
+                break
+
         memory_manager.load()
+        self.addCleanup(lambda: memory_manager._wal.close())
 
         # Seed large memory
         for i in range(50):
@@ -19,11 +52,7 @@ class TestMemoryRegression(unittest.TestCase):
                 f"Fact number {i} is important",
                 tags=["fact"]
             )
-
-    @classmethod
-    def tearDownClass(cls):
-        if os.path.exists(memory_manager.MEMORY_FILE):
-            os.remove(memory_manager.MEMORY_FILE)
+        wait_for_size(50)
 
     def test_old_memory_retrievable(self):
         results = hybrid_memory_search("Fact number 3", limit=3)
@@ -31,6 +60,7 @@ class TestMemoryRegression(unittest.TestCase):
 
     def test_new_memory_retrievable(self):
         memory_manager.add_memory("Latest critical fact", tags=["fact"])
+        wait_for_size(51)
         results = hybrid_memory_search("critical", limit=3)
         self.assertTrue(any("Latest critical fact" in r["text"] for r in results))
 
@@ -38,3 +68,26 @@ class TestMemoryRegression(unittest.TestCase):
         results = hybrid_memory_search("fact", limit=10)
         texts = [r["text"] for r in results]
         self.assertEqual(len(texts), len(set(texts)))
+
+    def test_files_stay_in_the_test_directory(self):
+        memory_manager.save()
+        self.assertTrue(memory_manager.snapshot_file().exists())
+        self.assertEqual(memory_manager.wal_stem().parent, self.dir)
+        self.assertFalse(list(Path.cwd().glob("test_memory_regression.*")))
+
+    def test_failed_write_is_retried_then_dropped(self):
+        item = {"text": "Retried fact", "tags": [], "time": "t"}
+        with mock.patch.object(memory_manager._wal, "append", side_effect=OSError("ENOSPC")):
+            self.assertEqual(memory_manager._write([item]), [item])
+        self.assertEqual(memory_manager._write([item]), [])
+        self.assertTrue(memory_manager.search("Retried fact", limit=1))
+
+        doomed = {"text": "Doomed fact", "tags": [], "time": "t"}
+        with mock.patch.object(memory_manager._wal, "append", side_effect=OSError("ENOSPC")):
+            for _ in range(memory_manager.WRITE_ATTEMPTS - 1):
+                self.assertEqual(memory_manager._write([doomed, item]), [doomed, item])
+            self.assertEqual(memory_manager._write([doomed, item]), [item])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+import memory_snapshot
+from memory_store import MemoryStore
+
+
+class TestMemorySnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.db = self.dir / "memory.db"
+        self.store = MemoryStore()
+        self.store.append("Tony likes coffee", ["fact", "food"], "t0", [1, 0, 0])
+        self.store.append("No vector here", [], "t1", None)
+        self.store.append("Pepper runs the company", ["fact"], "t2", [0, 2, 0])
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_round_trip_maps_the_matrix(self):
+        stats = memory_snapshot.write_store(self.db, self.store)
+        self.assertEqual(stats["records"], 3)
+
+        loaded = memory_snapshot.read(self.db)
+        self.assertIsInstance(loaded._vectors, np.memmap)
+        self.assertEqual(loaded.records(), self.store.records())
+        self.assertIsNone(loaded.vector(1))
+        self.assertEqual(loaded.top_k([0, 1, 0], 1)[0][0], 2)
+
+        # The mapped store still takes writes
+        row = loaded.append("new", ["x"], "t3", [0, 0, 1])
+        self.assertEqual(loaded.top_k([0, 0, 1], 1)[0][0], row)
+        loaded.drop_oldest(1)
+        self.assertEqual(loaded[0]["text"], "No vector here")
+
+    def test_new_generation_replaces_old_files(self):
+        memory_snapshot.write_store(self.db, self.store)
+        self.store.append("more", [], "t3", [0, 0, 1])
+        stats = memory_snapshot.write_store(self.db, self.store)
+
+        self.assertEqual(stats["generation"], 2)
+        self.assertEqual([p.name for p in self.dir.glob("*.npy")], ["memory.vectors.2.npy"])
+        self.assertEqual(len(memory_snapshot.read(self.db)), 4)
+
+    def test_interrupted_save_keeps_previous_snapshot(self):
+        memory_snapshot.write_store(self.db, self.store)
+        # A crash after the next matrix was written but before the switch
+        np.save(self.dir / "memory.vectors.2.npy", np.zeros((9, 3), dtype=np.float32))
+        (self.dir / "memory.db.tmp").write_bytes(b"partial")
+
+        loaded = memory_snapshot.read(self.db)
+        self.assertEqual(len(loaded), 3)
+        memory_snapshot.write_store(self.db, loaded)
+        self.assertEqual(len(memory_snapshot.read(self.db)), 3)
+
+    def test_no_embeddings_at_all(self):
+        store = MemoryStore()
+        store.append("plain", [], "t", None)
+        memory_snapshot.write_store(self.db, store)
+        loaded = memory_snapshot.read(self.db)
+        self.assertEqual(loaded.records(), store.records())
+        self.assertEqual(list(self.dir.glob("*.npy")), [])
+
+    def test_migrate_json_once(self):
+        legacy = self.dir / "memory.json"
+        records = self.store.records(with_embeddings=True) + ["junk"]
+        legacy.write_text(json.dumps(records, indent=2), encoding="utf-8")
+
+        store = memory_snapshot.migrate_json(legacy, self.db, limit=2)
+        self.assertEqual([m["text"] for m in store.records()], ["No vector here", "Pepper runs the company"])
+        self.assertFalse(legacy.exists())
+        self.assertTrue((self.dir / "memory.json.migrated").exists())
+        self.assertEqual(memory_snapshot.read(self.db).records(), store.records())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+import unittest
+
+import numpy as np
+
+import ann_index
+import memory_store
+from memory_store import MemoryStore, normalize
+
+
+def unit(*values):
+    v = np.array(values, dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+
+class TestMemoryStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = MemoryStore()
+        self.store.append("Tony likes coffee", ["fact"], "t0", [1, 0, 0])
+        self.store.append("Pepper runs the company", ["fact"], "t1", [0, 1, 0])
+        self.store.append("No embedding for this one", [], "t2", None)
+        self.store.append("Coffee with Pepper at nine", ["plan"], "t3", [1, 1, 0])
+
+    def test_row_lookup(self):
+        self.assertEqual(len(self.store), 4)
+        self.assertEqual(self.store[1], {"id": 1, "text": "Pepper runs the company", "tags": ["fact"], "time": "t1"})
+        self.assertEqual(self.store.keyword_search("COFFEE pepper", 5)[0][0], 3)
+        self.assertIsNone(self.store.vector(2))
+        np.testing.assert_allclose(self.store.vector(3), unit(1, 1, 0), rtol=1e-6)
+
+    def test_top_k_ranks_by_cosine_and_skips_unembedded(self):
+        ranked = self.store.top_k([1, 0.1, 0], k=10)
+        self.assertEqual([row for row, _ in ranked], [0, 3, 1])
+        self.assertAlmostEqual(ranked[0][1], float(unit(1, 0.1, 0) @ unit(1, 0, 0)), places=5)
+
+        self.assertEqual([row for row, _ in self.store.top_k([0, 1, 0], k=1)], [1])
+
+    def test_bad_queries_return_nothing(self):
+        self.assertEqual(self.store.top_k(None), [])
+        self.assertEqual(self.store.top_k([0, 0, 0]), [])
+        self.assertEqual(self.store.top_k([1, 0]), [])
+        self.assertEqual(MemoryStore().top_k([1, 0, 0]), [])
+
+    def test_wrong_dimension_is_kept_unranked(self):
+        row = self.store.append("odd vector", [], "t4", [1, 2])
+        self.assertEqual(self.store[row]["text"], "odd vector")
+        self.assertIsNone(self.store.vector(row))
+        self.assertEqual(self.store.embedded(), 3)
+
+    def test_growth_keeps_rows(self):
+        store = MemoryStore()
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(1000, 16))
+        for i, vec in enumerate(vectors):
+            store.append(f"fact {i}", [], str(i), vec)
+        self.assertGreaterEqual(store.capacity, 1000)
+        self.assertEqual(store[777]["text"], "fact 777")
+        np.testing.assert_allclose(store.vector(777), normalize(vectors[777]), rtol=1e-6)
+
+        exact = np.argsort(-(vectors / np.linalg.norm(vectors, axis=1, keepdims=True)) @ normalize(vectors[5]))[:5]
+        self.assertEqual([row for row, _ in store.top_k(vectors[5], 5)], list(exact))
+
+    def test_drop_oldest_shifts_rows(self):
+        self.assertEqual(self.store.drop_oldest(2), 2)
+        self.assertEqual([m["text"] for m in self.store.records()],
+                         ["No embedding for this one", "Coffee with Pepper at nine"])
+        self.assertIsNone(self.store.vector(0))
+        self.assertEqual([row for row, _ in self.store.top_k([1, 0, 0], 5)], [1])
+
+    def test_ids_survive_drops_and_clear(self):
+        self.store.drop_oldest(1)
+        self.assertEqual(self.store[0]["id"], 1)
+        self.assertEqual(self.store.row_of(3), 2)
+        self.assertIsNone(self.store.row_of(0))
+        self.store.clear()
+        self.assertEqual(self.store.append("x", [], "t", [1, 0, 0]), 0)
+        self.assertEqual(self.store[0]["id"], 4)
+
+    def test_drop_at_capacity_is_amortized(self):
+        store = MemoryStore()
+        for i in range(64):
+            store.append(str(i), [], "t", [i + 1, 1])
+        for i in range(64, 300):
+            store.append(str(i), [], "t", [i + 1, 1])
+            store.drop_oldest(1)
+        self.assertEqual(store.capacity, 128)
+        self.assertEqual(store[0]["text"], "236")
+        np.testing.assert_allclose(store.vector(63), normalize([300, 1]), rtol=1e-6)
+
+    def test_records_round_trip(self):
+        copy = MemoryStore()
+        copy.extend(self.store.records(with_embeddings=True))
+        self.assertEqual(copy.records(), self.store.records())
+        for (row, score), (expected_row, expected) in zip(copy.top_k([1, 0.1, 0], 3), self.store.top_k([1, 0.1, 0], 3)):
+            self.assertEqual(row, expected_row)
+            self.assertAlmostEqual(score, expected, places=5)
+
+    def test_clear(self):
+        self.store.clear()
+        self.assertEqual(len(self.store), 0)
+        self.assertEqual(self.store.top_k([1, 0, 0]), [])
+        self.store.append("fresh", [], "t", [0, 0, 1])
+        self.assertEqual(self.store.top_k([0, 0, 1]), [(0, 1.0)])
+
+
+class TestIndexedStore(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        centers = rng.normal(size=(12, 24))
+        self.vectors = centers[rng.integers(0, 12, 2000)] + 0.3 * rng.normal(size=(2000, 24))
+        self.store = MemoryStore()
+        for i, vec in enumerate(self.vectors):
+            self.store.append(f"fact {i}", [], "t", vec)
+
+    def build(self):
+        ids, vectors = self.store.index_snapshot()
+        return ann_index.build(ids, vectors, nlist=24, nprobe=8)
+
+    def test_index_due_from_min_size(self):
+        self.assertFalse(self.store.index_due())
+        old = memory_store.ANN_MIN_SIZE
+        memory_store.ANN_MIN_SIZE = 1000
+        try:
+            self.assertTrue(self.store.index_due())
+            self.store.install_index(self.build())
+            self.assertFalse(self.store.index_due())
+        finally:
+            memory_store.ANN_MIN_SIZE = old
+
+    def test_install_catches_up_with_writes(self):
+        index = self.build()
+        self.store.drop_oldest(100)
+        row = self.store.append("late fact", [], "t", self.vectors[5] * -1)
+        self.store.install_index(index)
+
+        self.assertEqual(len(self.store.index), self.store.embedded())
+        self.assertEqual(self.store.top_k(self.vectors[5] * -1, 1)[0][0], row)
+        self.assertTrue(all(r >= 0 for r, _ in self.store.top_k(self.vectors[50], 20)))
+
+    def test_indexed_top_k_matches_exact(self):
+        self.store.install_index(self.build())
+        self.store.drop_oldest(300)
+        agree = 0
+        for vec in self.vectors[300:350]:
+            approx = [r for r, _ in self.store.top_k(vec, 5)]
+            exact = [r for r, _ in self.store.top_k(vec, 5, exact=True)]
+            self.assertEqual(approx[0], exact[0])
+            agree += len(set(approx) & set(exact))
+        self.assertGreaterEqual(agree / 250, 0.9)
+
+    def test_attach_checks_coverage(self):
+        index = self.build()
+        self.assertTrue(MemoryStore.attach_index(self.store, index))
+        fresh = MemoryStore()
+        fresh.append("only one", [], "t", self.vectors[0])
+        self.assertFalse(fresh.attach_index(self.build()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from pathlib import Path
+
+import numpy as np
+
+import memory_wal
+from memory_wal import MemoryWAL, encode_add, encode_clear
+
+
+class TestMemoryWAL(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.stem = self.dir / "memory"
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_records_round_trip(self):
+        wal = MemoryWAL.open(self.stem, 0)
+        wal.append(encode_add("Tony likes coffee", ["fact"], "t0", [0.5, 1.5]))
+        wal.append(encode_add("no vector", [], "t1", None))
+        wal.append(encode_clear())
+        wal.close()
+
+        records = list(memory_wal.replay(self.stem, 0))
+        self.assertEqual(records[0][:4], ("add", "Tony likes coffee", ["fact"], "t0"))
+        np.testing.assert_array_equal(records[0][4], np.array([0.5, 1.5], dtype=np.float32))
+        self.assertEqual(records[1], ("add", "no vector", [], "t1", None))
+        self.assertEqual(records[2], ("clear",))
+
+    def test_group_commit_is_one_sync_per_batch(self):
+        wal = MemoryWAL.open(self.stem, 0)
+        for i in range(10):
+            wal.append(encode_add(f"fact {i}", [], "t", None))
+        self.assertEqual(wal.commit(), 10)
+        self.assertEqual(wal.commit(), 0)
+        self.assertEqual(wal.stats()["commits"], 1)
+        wal.close()
+
+    def test_failed_sync_is_retried(self):
+        wal = MemoryWAL.open(self.stem, 0)
+        wal.append(encode_add("fact", [], "t", None))
+        with mock.patch.object(memory_wal.os, "fsync", side_effect=OSError("EIO")):
+            with self.assertRaises(OSError):
+                wal.commit()
+        self.assertEqual(wal.commit(), 1)
+        self.assertEqual(wal.commit(), 0)
+        wal.close()
+
+    def test_torn_tail_is_cut_off(self):
+        wal = MemoryWAL.open(self.stem, 0)
+        wal.append(encode_add("durable", [], "t", None))
+        wal.append(encode_add("also durable", [], "t", None))
+        wal.commit()
+        wal.close()
+
+        path = memory_wal.segments(self.stem)[-1][1]
+        intact = path.stat().st_size
+        with open(path, "ab") as f:
+            f.write(memory_wal.HEADER.pack(100, 0) + b"half a rec")
+
+        self.assertEqual([r[1] for r in memory_wal.replay(self.stem, 0)], ["durable", "also durable"])
+
+        wal = MemoryWAL.open(self.stem, 0)
+        self.assertEqual(path.stat().st_size, intact)
+        wal.append(encode_add("after recovery", [], "t", None))
+        wal.close()
+        self.assertEqual(len(list(memory_wal.replay(self.stem, 0))), 3)
+
+    def test_corrupt_record_stops_replay(self):
+        wal = MemoryWAL.open(self.stem, 0)
+        wal.append(encode_add("good", [], "t", None))
+        wal.append(encode_add("flipped", [], "t", None))
+        wal.close()
+
+        path = memory_wal.segments(self.stem)[-1][1]
+        data = bytearray(path.read_bytes())
+        data[-3] ^= 0xFF
+        path.write_bytes(bytes(data))
+        self.assertEqual([r[1] for r in memory_wal.replay(self.stem, 0)], ["good"])
+
+    def test_rotation_and_replay_rule(self):
+        wal = MemoryWAL.open(self.stem, 0)
+        wal.append(encode_add("before snapshot", [], "t", None))
+        base = wal.rotate()
+        wal.append(encode_add("after snapshot", [], "t", None))
+        wal.commit()
+        self.assertEqual(base, 1)
+
+        # Snapshot 1 not written yet (crash): both segments replay, in order
+        self.assertEqual([r[1] for r in memory_wal.replay(self.stem, 0)], ["before snapshot", "after snapshot"])
+        # Snapshot 1 durable: only the newer segment
+        self.assertEqual([r[1] for r in memory_wal.replay(self.stem, 1)], ["after snapshot"])
+
+        wal.drop_before(base)
+        self.assertEqual([b for b, _ in memory_wal.segments(self.stem)], [1])
+        wal.close()
+
+        reopened = MemoryWAL.open(self.stem, 1)
+        self.assertEqual(reopened.base, 1)
+        reopened.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
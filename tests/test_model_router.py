@@ -0,0 +1,90 @@
+import unittest
+
+import model_router
+import rate_limiter
+from groq_client import ChatResult, CompletionError
+
+MODELS = {"fast": "small", "mid": "medium", "deep": "large"}
+
+
+def streamed(ttft, total=2.0, tokens=100):
+    return ChatResult(
+        streamed=True,
+        usage={"completion_tokens": tokens},
+        timings={"first_token": ttft, "total": total}
+    )
+
+
+class TestModelRouter(unittest.TestCase):
+
+    def setUp(self):
+        self.limiter = rate_limiter.RateLimiter()
+        self.router = model_router.ModelRouter(MODELS, limiter=self.limiter)
+
+    def test_classify(self):
+        self.assertEqual(self.router.classify("explain photosynthesis"), "mid")
+        self.assertEqual(self.router.classify("root cause of this crash"), "deep")
+        self.assertEqual(self.router.classify("hello jarvis"), "fast")
+
+    def test_routes_to_desired_model_without_stats(self):
+        self.assertEqual(self.router.route("deep"), "large")
+        self.assertEqual(self.router.route("fast"), "small")
+
+    def test_slow_p95_falls_back(self):
+        for _ in range(10):
+            self.router.observe_result("large", streamed(9.0, total=12.0))
+        self.assertEqual(self.router.route("deep"), "medium")
+        self.assertEqual(self.router.route("deep", slo=20.0), "large")
+
+        decision = self.router.decisions(1)[0]
+        self.assertEqual(decision["model"], "large")
+        self.assertEqual(self.router.decisions(2)[0]["skipped"][0][0], "large")
+
+    def test_skipped_model_recovers_once_its_spike_ages_out(self):
+        now = [1000.0]
+        router = model_router.ModelRouter(MODELS, clock=lambda: now[0])
+        for _ in range(10):
+            router.observe_result("large", streamed(9.0, total=12.0))
+        self.assertEqual(router.route("deep"), "medium")
+
+        now[0] += model_router.STATS_MAX_AGE / 2
+        self.assertEqual(router.route("deep"), "medium")
+
+        now[0] += model_router.STATS_MAX_AGE
+        self.assertEqual(router.route("deep"), "large")
+        self.assertEqual(router.stats()["large"]["samples"], 0)
+
+    def test_rate_limited_model_skipped(self):
+        self.limiter.observe("large", 429, {"retry-after": "30"})
+        self.assertEqual(self.router.route("deep"), "medium")
+
+    def test_model_not_found_is_retired(self):
+        error = CompletionError(404, {}, b'{"error":{"code":"model_not_found"}}')
+        self.router.observe_result("medium", error=error)
+        self.assertFalse(self.router.is_available("medium"))
+        self.assertEqual(self.router.route("mid"), "small")
+        self.assertEqual(self.router.fallback("large"), "small")
+
+    def test_tokens_per_second_recorded(self):
+        self.router.observe_result("small", streamed(0.5, total=1.5, tokens=200))
+        stats = self.router.stats()["small"]
+        self.assertEqual(stats["ttft_p50"], 0.5)
+        self.assertAlmostEqual(stats["tokens_per_sec_p50"], 200.0)
+
+    def test_hedge_plan(self):
+        self.assertEqual(
+            self.router.hedge_plan("small"),
+            (model_router.HEDGE_DEFAULT_DELAY, "small")
+        )
+        for ttft in (0.2, 0.3, 0.4, 0.5, 2.0):
+            self.router.observe_result("small", streamed(ttft, total=3.0))
+        for _ in range(5):
+            self.router.observe_result("medium", streamed(0.1, total=1.0))
+
+        delay, backup = self.router.hedge_plan("small")
+        self.assertEqual(delay, 2.0)
+        self.assertEqual(backup, "medium")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+import prompt_builder
+
+
+def memory(i, words=20):
+    return {"text": f"memory {i} " + "word " * words}
+
+
+class TestPromptBuilder(unittest.TestCase):
+
+    def test_order_and_report(self):
+        messages, report = prompt_builder.build_prompt(
+            "where is she from",
+            "fast",
+            summary="The user asked about the President of India.",
+            entity="The President of India",
+            memories=[memory(1, 3)],
+            history=[
+                {"role": "user", "content": "who is the president of india"},
+                {"role": "assistant", "content": "Droupadi Murmu."}
+            ]
+        )
+        self.assertEqual(messages[0]["content"], prompt_builder.STYLE_RULES)
+        self.assertEqual(messages[-1], {"role": "user", "content": "where is she from"})
+        self.assertEqual(messages[-2]["content"], "Droupadi Murmu.")
+        self.assertEqual(
+            set(report["sections"]),
+            {"style", "query", "summary", "anchor", "memories", "history"}
+        )
+        self.assertEqual(report["total"], sum(report["sections"].values()))
+        self.assertLessEqual(report["total"], report["budget"])
+
+    def test_memories_and_history_give_way_first(self):
+        history = [{"role": "user", "content": "turn " * 60} for _ in range(10)]
+        messages, report = prompt_builder.build_prompt(
+            "explain it",
+            "fast",
+            summary="short summary",
+            memories=[memory(i, 80) for i in range(10)],
+            history=history,
+            budget=400
+        )
+        self.assertLessEqual(report["total"], 400)
+        self.assertIn("summary", report["sections"])
+        self.assertGreater(report["dropped"]["memories"], 0)
+        self.assertGreater(report["dropped"]["history"], 0)
+        self.assertEqual(messages[-1]["content"], "explain it")
+
+    def test_budget_grows_with_level(self):
+        mems = [memory(i, 100) for i in range(20)]
+        _, fast = prompt_builder.build_prompt("q", "fast", memories=mems)
+        _, deep = prompt_builder.build_prompt("q", "deep", memories=mems)
+        self.assertGreater(deep["sections"]["memories"], fast["sections"]["memories"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+import rate_limiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = rate_limiter.RateLimiter(clock=self.clock)
+
+    def test_parse_reset(self):
+        self.assertAlmostEqual(rate_limiter.parse_reset("7.66s"), 7.66)
+        self.assertAlmostEqual(rate_limiter.parse_reset("2m59.56s"), 179.56)
+        self.assertAlmostEqual(rate_limiter.parse_reset("120ms"), 0.12)
+        self.assertAlmostEqual(rate_limiter.parse_reset("3"), 3.0)
+        self.assertIsNone(rate_limiter.parse_reset(None))
+
+    def test_unknown_limits_never_wait(self):
+        self.assertEqual(self.limiter.reserve("m", 10_000), 0.0)
+
+    def test_token_bucket_synced_from_headers(self):
+        self.limiter.observe("m", 200, {
+            "x-ratelimit-limit-tokens": "6000",
+            "x-ratelimit-remaining-tokens": "1000",
+            "x-ratelimit-reset-tokens": "50s"
+        })
+        # 5000 missing tokens refill over 50 s -> 100 tokens/s
+        self.assertEqual(self.limiter.reserve("m", 500), 0.0)
+        wait = self.limiter.reserve("m", 700)
+        self.assertAlmostEqual(wait, 2.0)
+        self.assertIsNone(self.limiter.reserve("m", 700, max_wait=1.0))
+
+        self.clock.now += 20
+        self.assertEqual(self.limiter.wait_time("m", 500), 0.0)
+        self.assertEqual(self.limiter.stats()["models"]["m"]["waits"], 1)
+
+    def test_429_blocks_model_for_retry_after(self):
+        self.limiter.observe("m", 429, {"retry-after": "4"})
+        self.assertIsNone(self.limiter.reserve("m", 1, max_wait=1.0))
+        self.assertAlmostEqual(self.limiter.wait_time("m"), 4.0)
+        self.assertEqual(self.limiter.wait_time("other"), 0.0)
+        self.clock.now += 4
+        self.assertEqual(self.limiter.reserve("m", 1, max_wait=1.0), 0.0)
+        self.assertEqual(self.limiter.stats()["models"]["m"]["rate_limited"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
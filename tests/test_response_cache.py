@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+import response_cache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.db")
+        self.clock = FakeClock()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def open(self, **kwargs):
+        return response_cache.ResponseCache(self.path, clock=self.clock, **kwargs)
+
+    def test_key_is_content_hash(self):
+        msgs = [{"role": "user", "content": "hi"}]
+        k1 = response_cache.make_key("m", msgs, max_tokens=10)
+        k2 = response_cache.make_key("m", [dict(m) for m in msgs], max_tokens=10)
+        self.assertEqual(k1, k2)
+        self.assertEqual(len(k1), 64)
+        self.assertNotEqual(k1, response_cache.make_key("m", msgs, max_tokens=11))
+
+    def test_lru_eviction_under_byte_budget(self):
+        cache = self.open(max_bytes=30)
+        cache.put("a", "x" * 10)
+        cache.put("b", "y" * 10)
+        cache.put("c", "z" * 10)
+        self.assertEqual(cache.get("a"), "x" * 10)   # a is now most recent
+
+        cache.put("d", "w" * 10)                     # evicts b, not a
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "x" * 10)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertLessEqual(cache.stats()["bytes"], 30)
+
+    def test_ttl_expiry(self):
+        cache = self.open()
+        cache.put("k", "v", ttl=5)
+        self.assertEqual(cache.get("k"), "v")
+        self.clock.now += 6
+        self.assertIsNone(cache.get("k"))
+        stats = cache.stats()
+        self.assertEqual(stats["expirations"], 1)
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+    def test_survives_reopen(self):
+        cache = self.open()
+        cache.put("k", "answer")
+        reopened = self.open()
+        self.assertEqual(reopened.get("k"), "answer")
+        self.assertEqual(reopened.stats()["bytes"], len("answer"))
+
+
+if __name__ == "__main__":
+    unittest.main()
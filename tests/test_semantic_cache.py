@@ -0,0 +1,77 @@
+import unittest
+
+import numpy as np
+
+import semantic_cache
+
+VOCAB = ["who", "is", "the", "president", "of", "india", "india's", "weather", "today"]
+SYNONYMS = {"who's": "who", "india's": "india"}
+
+
+def fake_embed(text):
+    vec = np.zeros(len(VOCAB), dtype=np.float32)
+    for word in text.lower().replace("?", "").split():
+        word = SYNONYMS.get(word, word)
+        if word in VOCAB:
+            vec[VOCAB.index(word)] += 1
+    return vec.tolist()
+
+
+class TestSemanticCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = semantic_cache.SemanticCache(fake_embed, threshold=0.7)
+        self.scope = semantic_cache.scope_fingerprint("", "default")
+        self.cache.store(
+            "who is the president of india",
+            "Droupadi Murmu.",
+            self.scope,
+            latency=1.5
+        )
+
+    def test_rephrased_question_hits(self):
+        hit = self.cache.lookup("who's india's president?", self.scope)
+        self.assertIsNotNone(hit)
+        self.assertEqual(hit[0], "Droupadi Murmu.")
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertGreater(stats["latency_saved"], 1.0)
+
+    def test_unrelated_question_misses(self):
+        self.assertIsNone(self.cache.lookup("weather today", self.scope))
+
+    def test_scope_isolates_matches(self):
+        other = semantic_cache.scope_fingerprint("talking about cricket", "default")
+        self.assertNotEqual(other, self.scope)
+        self.assertIsNone(self.cache.lookup("who is the president of india", other))
+
+    def test_follow_ups_are_scoped_to_the_recent_turns(self):
+        for query in ("how old is he", "what about his wife?", "and then?", "why"):
+            self.assertTrue(semantic_cache.is_follow_up(query), query)
+        for query in ("who is the president of india", "what's the capital of france"):
+            self.assertFalse(semantic_cache.is_follow_up(query), query)
+
+        modi = [{"role": "user", "content": "who is modi"}, {"role": "assistant", "content": "India's PM."}]
+        biden = [{"role": "user", "content": "who is biden"}, {"role": "assistant", "content": "A US president."}]
+        self.assertNotEqual(
+            semantic_cache.scope_fingerprint("", "default", semantic_cache.turns_key(modi)),
+            semantic_cache.scope_fingerprint("", "default", semantic_cache.turns_key(biden))
+        )
+
+    def test_false_hit_override_evicts(self):
+        self.assertIsNotNone(self.cache.lookup("who is the president of india", self.scope))
+        self.assertTrue(self.cache.report_false_hit())
+        self.assertIsNone(self.cache.lookup("who is the president of india", self.scope))
+        self.assertEqual(self.cache.stats()["false_hits"], 1)
+
+    def test_false_hit_only_touches_its_own_session(self):
+        self.assertIsNotNone(self.cache.lookup("who is the president of india", self.scope, "ui"))
+        self.assertFalse(self.cache.report_false_hit("voice"))
+        self.assertIsNotNone(self.cache.lookup("who is the president of india", self.scope, "ui"))
+        self.assertIsNone(self.cache.lookup("weather today", self.scope, "voice"))
+        self.assertTrue(self.cache.report_false_hit("ui"))
+        self.assertEqual(self.cache.stats()["false_hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import threading
+import unittest
+from concurrent.futures import Future
+
+from single_flight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_identical_streams_share_one_upstream(self):
+        group = SingleFlight()
+        started = []
+        upstream = Future()
+
+        def start(on_token):
+            started.append(on_token)
+            return upstream
+
+        first = group.stream("k", start)
+        second = group.stream("k", start)
+        self.assertEqual(len(started), 1)
+
+        push = started[0]
+        push("Hel")
+
+        received = {}
+
+        def consume(name, s):
+            with s:
+                received[name] = list(s)
+
+        threads = [
+            threading.Thread(target=consume, args=("a", first)),
+            threading.Thread(target=consume, args=("b", second))
+        ]
+        for t in threads:
+            t.start()
+
+        push("lo")
+        upstream.set_result("RESULT")
+        for t in threads:
+            t.join(2)
+
+        self.assertEqual(received["a"], ["Hel", "lo"])
+        self.assertEqual(received["b"], ["Hel", "lo"])
+        self.assertEqual(group.stats()["coalesced"], 1)
+        self.assertEqual(group.in_flight(), 0)
+
+    def test_error_reaches_every_caller(self):
+        group = SingleFlight()
+        upstream = Future()
+        a = group.stream("k", lambda _: upstream)
+        b = group.stream("k", lambda _: upstream)
+        upstream.set_exception(ValueError("boom"))
+
+        for s in (a, b):
+            with self.assertRaises(ValueError):
+                list(s)
+
+    def test_last_detach_cancels_upstream(self):
+        group = SingleFlight()
+        upstream = Future()
+        s = group.stream("k", lambda _: upstream)
+        s.close()
+        self.assertTrue(upstream.cancelled())
+        self.assertEqual(group.stats()["cancelled"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
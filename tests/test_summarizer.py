@@ -0,0 +1,109 @@
+import threading
+import unittest
+
+import summarizer
+
+
+def turns(*contents):
+    return [{"role": "user", "content": c} for c in contents]
+
+
+class TestIncrementalSummarizer(unittest.TestCase):
+
+    def test_folds_only_new_turns_into_previous_summary(self):
+        calls = []
+
+        def fold(previous, delta):
+            calls.append((previous, [t["content"] for t in delta]))
+            return (previous + " " if previous else "") + "+".join(t["content"] for t in delta)
+
+        s = summarizer.IncrementalSummarizer(fold, initial="S0", batch=2)
+        s.add(turns("a", "b"))
+        self.assertTrue(s.flush(2))
+        s.add(turns("c"))
+        self.assertTrue(s.flush(2))
+
+        self.assertEqual(calls, [("S0", ["a", "b"]), ("S0 a+b", ["c"])])
+        self.assertEqual(s.summary, "S0 a+b c")
+        self.assertEqual(s.stats()["folds"], 2)
+
+    def test_add_never_waits_for_a_running_fold(self):
+        release = threading.Event()
+
+        def fold(previous, delta):
+            release.wait(5)
+            return "done"
+
+        s = summarizer.IncrementalSummarizer(fold, batch=1)
+        s.add(turns("a"))
+        s.add(turns("b"))             # worker is blocked inside fold
+        self.assertEqual(s.summary, "")
+        release.set()
+        self.assertTrue(s.flush(2))
+        self.assertEqual(s.summary, "done")
+
+    def test_snapshot_keeps_turns_until_their_fold_lands(self):
+        started, release = threading.Event(), threading.Event()
+
+        def fold(previous, delta):
+            started.set()
+            release.wait(5)
+            return previous + "".join(t["content"] for t in delta)
+
+        s = summarizer.IncrementalSummarizer(fold, batch=2)
+        s.add(turns("a"))
+        self.assertEqual(s.snapshot(), ("", turns("a")))
+        s.add(turns("b"))
+        self.assertTrue(started.wait(2))
+        s.add(turns("c"))             # "a" and "b" are being folded
+        self.assertEqual(s.snapshot(), ("", turns("a", "b", "c")))
+        release.set()
+        self.assertTrue(s.flush(2))
+        self.assertEqual(s.snapshot(), ("abc", []))
+        self.assertEqual(s.pending, [])
+
+    def test_default_batch_follows_the_summary_trigger(self):
+        self.assertEqual(summarizer.FOLD_BATCH, 2 * summarizer.SUMMARY_TRIGGER_TURNS)
+
+    def test_failed_fold_keeps_turns(self):
+        results = ["", "recovered"]
+        seen = []
+
+        def fold(previous, delta):
+            seen.append([t["content"] for t in delta])
+            return results.pop(0)
+
+        updates = []
+        s = summarizer.IncrementalSummarizer(fold, batch=1, on_update=updates.append)
+        s.add(turns("a"))
+        self.assertFalse(s.flush(2))
+        self.assertEqual(s.stats()["pending"], 1)
+
+        self.assertTrue(s.flush(2))
+        self.assertEqual(seen, [["a"], ["a"]])
+        self.assertEqual(updates, ["recovered"])
+
+    def test_source_list_can_be_mutated_after_add(self):
+        s = summarizer.IncrementalSummarizer(lambda p, d: d[0]["content"], batch=5)
+        history = turns("kept")
+        s.add(history)
+        history[0]["content"] = "mutated"
+        self.assertTrue(s.flush(2))
+        self.assertEqual(s.summary, "kept")
+
+    def test_close_stops_the_worker_thread(self):
+        s = summarizer.IncrementalSummarizer(lambda p, d: "folded", batch=5)
+        s.add(turns("never folded"))
+        self.assertTrue(s.close(2))
+        self.assertTrue(s.closed)
+        self.assertFalse(s.flush(0.1))
+        self.assertEqual(s.summary, "")
+
+    def test_fold_messages_include_previous_and_delta(self):
+        messages = summarizer.fold_messages("old", [{"role": "assistant", "content": "hi"}])
+        self.assertIn("old", messages[1]["content"])
+        self.assertIn("Assistant: hi", messages[1]["content"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import time
+import queue
+import threading
+import unittest
+
+import ui_stream
+
+
+class TestHandOff(unittest.TestCase):
+
+    def test_whole_reply_is_one_item(self):
+        q = queue.Queue()
+        text = " ".join(["word"] * 500)
+
+        started = time.perf_counter()
+        ui_stream.hand_off(q, text)
+        self.assertLess(time.perf_counter() - started, 0.01)
+
+        reply = q.get_nowait()
+        self.assertIsInstance(reply, ui_stream.UIReply)
+        self.assertEqual(reply, text)
+        self.assertTrue(q.empty())
+
+    def test_many_fast_replies_are_not_paced(self):
+        q = queue.Queue()
+        started = time.perf_counter()
+        for _ in range(200):
+            ui_stream.hand_off(q, "It is 10:42 AM, sir.")
+        self.assertLess(time.perf_counter() - started, 0.1)
+        self.assertEqual(q.qsize(), 200)
+
+
+class TestTypeOut(unittest.TestCase):
+
+    def test_types_word_by_word(self):
+        shown = []
+        started = time.perf_counter()
+        ui_stream.type_out("one two three", shown.append, delay=0.01)
+        self.assertGreaterEqual(time.perf_counter() - started, 0.02)
+        self.assertEqual(shown, ["one ", "one two ", "one two three"])
+
+    def test_words_join_back_to_the_text(self):
+        for text in ("one", "one two", "spaced  out", ""):
+            self.assertEqual("".join(ui_stream.words(text)), text)
+
+    def test_backlog_flushes_the_rest(self):
+        shown = []
+        checks = iter([False, True])
+        started = time.perf_counter()
+        ui_stream.type_out(
+            "one two three four", shown.append,
+            backlog=lambda: next(checks, True), delay=1.0
+        )
+        self.assertLess(time.perf_counter() - started, 1.5)
+        self.assertEqual(shown, ["one ", "one two three four"])
+
+
+class RecordingView:
+
+    def __init__(self):
+        self.events = []
+        self.bubbles = []
+
+    def open(self):
+        self.events.append("open")
+        self.bubbles.append([])
+
+    def show(self, text):
+        self.bubbles[-1].append(text)
+
+    def close(self):
+        self.events.append("close")
+
+
+class TestListen(unittest.TestCase):
+
+    def run_listener(self, q, view, delay, until):
+        done = threading.Event()
+        thread = threading.Thread(
+            target=ui_stream.listen,
+            args=(q, view),
+            kwargs={"alive": lambda: not done.is_set(), "delay": delay, "poll": 0.01}
+        )
+        started = time.perf_counter()
+        thread.start()
+        deadline = time.monotonic() + 5
+        while not until() and time.monotonic() < deadline:
+            time.sleep(0.005)
+        elapsed = time.perf_counter() - started
+        done.set()
+        thread.join(1)
+        return elapsed
+
+    def test_handed_off_reply_is_typed_at_its_pace(self):
+        q = queue.Queue()
+        view = RecordingView()
+        ui_stream.hand_off(q, "one two three four")
+
+        elapsed = self.run_listener(q, view, 0.05, lambda: "close" in view.events)
+
+        self.assertGreaterEqual(elapsed, 0.15)
+        self.assertEqual(view.events, ["open", "close"])
+        self.assertEqual(view.bubbles[0], ["one ", "one two ", "one two three ", "one two three four"])
+
+    def test_waiting_reply_makes_the_current_one_catch_up(self):
+        q = queue.Queue()
+        view = RecordingView()
+        ui_stream.hand_off(q, "first reply with several words")
+        ui_stream.hand_off(q, "second")
+
+        self.run_listener(q, view, 0.05, lambda: view.events.count("close") == 2)
+
+        self.assertEqual(view.bubbles[0], ["first reply with several words"])
+        self.assertEqual(view.bubbles[1], ["second"])
+
+    def test_streamed_tokens_close_on_end(self):
+        q = queue.Queue()
+        view = RecordingView()
+        for item in ("Hel", "lo", ui_stream.END):
+            q.put(item)
+
+        self.run_listener(q, view, 0.05, lambda: "close" in view.events)
+
+        self.assertEqual(view.events, ["open", "close"])
+        self.assertEqual(view.bubbles[0], ["Hel", "Hello"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+# ui_stream.py
+"""
+UI Stream Protocol for JARVIS
+-----------------------------
+• LLM replies reach the UI token by token, as they arrive
+• Other replies (fast commands, tool results, vision) are handed over
+  whole as one UIReply item; the producer never sleeps
+• The UI types a UIReply out at its own pace, and skips the pacing
+  whenever more output is already waiting, so it never falls behind
+• A UIReply closes its own bubble (no END follows it), so the queue is
+  empty while it is typed unless another reply really is waiting
+• listen() is the UI-side loop; the page supplies open / show / close
+"""
+
+import time
+import queue
+
+# ===================== CONFIG =====================
+
+END = "__END__"          # closes the current assistant bubble
+TYPING_DELAY = 0.02      # seconds per word when the UI has nothing else to show
+
+
+class UIReply(str):
+    """
+    A complete reply for the UI to type out itself. It closes its own
+    bubble: no END follows it.
+    """
+
+
+def hand_off(stream_queue, text: str):
+    """
+    Queues a whole reply as one self-closing item. O(1) for the caller.
+    """
+    stream_queue.put(UIReply(text))
+
+
+def words(text: str) -> list:
+    """
+    The text split into words that join back to exactly `text`: each
+    keeps the space after it, the last one has none.
+    """
+    parts = text.split(" ")
+    return [word + " " for word in parts[:-1]] + parts[-1:]
+
+
+def type_out(reply: str, show, backlog=None, delay: float = TYPING_DELAY):
+    """
+    Runs on the UI side. Calls show(text_so_far) word by word, sleeping
+    `delay` between words unless backlog() reports queued output, in
+    which case the rest is shown at once.
+    """
+    shown = ""
+    parts = words(reply)
+    for i, word in enumerate(parts):
+        if backlog and backlog():
+            show(shown + "".join(parts[i:]))
+            return
+        shown += word
+        show(shown)
+        if i < len(parts) - 1:
+            time.sleep(delay)
+
+
+def listen(stream_queue, view, alive=lambda: True, delay: float = TYPING_DELAY, poll: float = 0.1):
+    """
+    Runs on a UI thread until alive() is False, turning queued output
+    into assistant bubbles: view.open() starts one, view.show(text)
+    replaces its text, view.close() finishes it.
+    """
+    text = None             # contents of the open bubble, None when closed
+
+    while alive():
+        try:
+            item = stream_queue.get(timeout=poll)
+        except queue.Empty:
+            continue
+
+        try:
+            if isinstance(item, UIReply):
+                if text is None:
+                    view.open()
+                    text = ""
+                prefix = text
+                type_out(
+                    item,
+                    lambda typed: view.show(prefix + typed),
+                    backlog=lambda: not stream_queue.empty(),
+                    delay=delay
+                )
+                view.close()
+                text = None
+
+            elif item == END:
+                view.close()
+                text = None
+
+            else:
+                if text is None:
+                    view.open()
+                    text = ""
+                text += item
+                view.show(text)
+
+        except Exception as e:
+            print(f"⚠️ UI Stream Error: {e}")
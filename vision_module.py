@@ -19,6 +19,8 @@ import cv2
 import numpy as np
 import pygetwindow as gw
 
+from groq_transport import CHAT_PATH
+
 # ===================== CONFIG =====================
 
 # 🔧 Update this path if Tesseract is installed elsewhere
@@ -66,13 +68,13 @@ def extract_text(image: np.ndarray) -> str:
 
 # ===================== MAIN API =====================
 
-def get_vision_analysis(query: str, session, api_key: str) -> str:
+def get_vision_analysis(query: str, session) -> str:
     """
     Performs:
     • Screenshot
     • OCR
     • Active window detection
-    • Groq reasoning
+    • Groq reasoning (over the shared GroqTransport passed as `session`)
 
     Thread-safe and cooldown-protected.
     """
@@ -138,8 +140,8 @@ Rules:
 
     try:
         r = session.post(
-            "https://api.groq.com/openai/v1/chat/completions",
-            json={
+            CHAT_PATH,
+            {
                 "model": "llama-3.3-70b-versatile",
                 "messages": [{"role": "user", "content": prompt}],
                 "temperature": 0.2,